@@ -1,5 +1,7 @@
+from .activity import activity_command_group as activity_command_group
 from .config import config_command_group as config_command_group
 from .core import core_command_group as core_command_group
+from .helios import helios_command_group as helios_command_group
 from .logs import logs_command_group as logs_command_group
 from .remove_filelocks import remove_filelocks as remove_filelocks
 from .state import state_command_group as state_command_group
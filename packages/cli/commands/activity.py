@@ -0,0 +1,70 @@
+"""Query the activity history."""
+
+# pyright: reportUnusedFunction=false
+
+import datetime
+import json
+from typing import Literal, Optional
+
+import click
+
+from packages.core import interfaces, types, utils
+
+logger = utils.Logger(origin="cli")
+
+
+@click.group()
+def activity_command_group() -> None:
+    pass
+
+
+@activity_command_group.command(
+    name="query",
+    help="Print the activity (uptime, measuring, error and uploading fractions and minutes, startup and CLI call counts) per minute, hour, day or month from the yearly activity files. Times are local times like in the activity history. Defaults to today.",
+)
+@click.option("--from", "from_time", type=click.DateTime(), help="Start of the range (inclusive)")
+@click.option("--to", "to_time", type=click.DateTime(), help="End of the range (exclusive)")
+@click.option(
+    "--resolution",
+    type=click.Choice(["minute", "hour", "day", "month"]),
+    default="hour",
+    show_default=True,
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["csv", "json"]),
+    default="csv",
+    show_default=True,
+)
+def _query_activity(
+    from_time: Optional[datetime.datetime],
+    to_time: Optional[datetime.datetime],
+    resolution: Literal["minute", "hour", "day", "month"],
+    output_format: Literal["csv", "json"],
+) -> None:
+    logger.debug('running command "activity query"')
+
+    if from_time is None:
+        from_time = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    if to_time is None:
+        to_time = from_time + datetime.timedelta(days=1)
+    periods = interfaces.ActivityArchive.query(from_time, to_time, resolution)
+
+    if output_format == "json":
+        click.echo(json.dumps([p.model_dump(mode="json") for p in periods]))
+        return
+    click.echo(",".join(types.ActivityHistoryPeriod.model_fields.keys()))
+    for p in periods:
+        click.echo(",".join(str(v) for v in p.model_dump(mode="json").values()))
+
+
+@activity_command_group.command(
+    name="import-json",
+    help="Write the days of all daily activity JSON files (`logs/activity/activity-%Y-%m-%d.json`) into the yearly activity files, e.g. to query the activity recorded before the yearly files existed.",
+)
+def _import_json_files() -> None:
+    logger.debug('running command "activity import-json"')
+
+    imported_days = interfaces.ActivityArchive.import_json_files()
+    click.echo(click.style(f"Imported {len(imported_days)} day(s)", fg="green"))
@@ -6,11 +6,10 @@ import json
 from typing import Literal
 
 import click
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 
 
 @click.group(name="aemet-enclosure")
@@ -29,10 +28,9 @@ def _print_red(text: str) -> None:
 def _get_enclosure_interface() -> interfaces.AEMETEnclosureInterface:
     config = types.Config.load()
     interface = None
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
 
     try:
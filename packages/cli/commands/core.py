@@ -2,9 +2,9 @@
 
 # pyright: reportUnusedFunction=false
 
-from typing import Optional
 import os
 import subprocess
+import time
 import click
 import filelock
 import tum_esm_utils
@@ -23,8 +23,8 @@ _run_pyra_core_lock = filelock.FileLock(
     timeout=0.5,
 )
 
-logger = utils.Logger(origin="cli", lock=None)
-lifecycle_logger = utils.Logger(origin="lifecycle", lock=None)
+logger = utils.Logger(origin="cli")
+lifecycle_logger = utils.Logger(origin="lifecycle")
 
 
 def _print_green(text: str) -> None:
@@ -96,10 +96,9 @@ def _stop_pyra_core() -> None:
     lifecycle_logger.info('running command "core stop"')
 
     config = types.Config.load(ignore_path_existence=True)
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
     state = interfaces.StateInterface.load_state(state_lock, logger)
 
@@ -121,7 +120,7 @@ def _stop_pyra_core() -> None:
                 _print_red(f"Failed to close cover: {e}")
                 exit(1)
 
-    camtracker_logger = utils.Logger(origin="camtracker", lock=None)
+    camtracker_logger = utils.Logger(origin="camtracker")
     try:
         if threads.camtracker_thread.CamTrackerProgram.is_running():
             threads.camtracker_thread.CamTrackerProgram.stop(config, camtracker_logger)
@@ -130,7 +129,7 @@ def _stop_pyra_core() -> None:
         _print_red(f"Failed to close CamTracker: {e}")
         exit(1)
 
-    opus_logger = utils.Logger(origin="opus", lock=None)
+    opus_logger = utils.Logger(origin="opus")
     try:
         if threads.opus_thread.OpusProgram.is_running(opus_logger):
             try:
@@ -166,54 +165,55 @@ def _pyra_core_is_running() -> None:
 
         # CHECK WHETHER PYRA CORE WAS PROPERLY SHUT DOWN
 
-        # 1. search for the latest time the core was running
+        # 1. search for the latest time the core was running (in the last 5 days)
 
-        logs_archive_path = os.path.join(_PROJECT_DIR, "logs", "archive")
-        logfile_names = [
-            f for f in sorted(os.listdir(logs_archive_path)) if f.endswith("-debug.log")
-        ][-5:]
-
-        log_lines: list[str] = []
-        for logfile_name in logfile_names:
-            log_lines.extend(
-                tum_esm_utils.files.load_file(os.path.join(logs_archive_path, logfile_name))
-                .strip("\n\t ")
-                .split("\n")
-            )
-
-        # find the last core start
-        last_start_index: Optional[int] = None
-        for i in range(len(log_lines) - 1, -1, -1):
-            if 'lifecycle - INFO - running command "core start"' in log_lines[i]:
-                if last_start_index is None:
-                    last_start_index = i
+        from_time = time.time() - 5 * 24 * 3600
+        last_start = next(
+            utils.LogIndex.query(
+                from_time=from_time,
+                origins=["lifecycle"],
+                substring='running command "core start"',
+                newest_first=True,
+            ),
+            None,
+        )
 
         # only consider the logs since the last start
-        if last_start_index is not None:
-            log_lines = log_lines[last_start_index:]
-
-        # fine the last core stop and the last main log
-        last_stop_index: Optional[int] = None
-        last_mainlog_index: Optional[int] = None
-        for i in range(len(log_lines) - 1, -1, -1):
-            if 'lifecycle - INFO - running command "core stop"' in log_lines[i]:
-                if last_stop_index is None:
-                    last_stop_index = i
-            if ("main - INFO - " in log_lines[i]) or ("main - DEBUG - " in log_lines[i]):
-                if last_mainlog_index is None:
-                    last_mainlog_index = i
+        if last_start is not None:
+            from_time = last_start[0]
+
+        # find the last core stop and the last main log
+        last_stop = next(
+            utils.LogIndex.query(
+                from_time=from_time,
+                origins=["lifecycle"],
+                substring='running command "core stop"',
+                newest_first=True,
+                update=False,
+            ),
+            None,
+        )
+        last_mainlog = next(
+            utils.LogIndex.query(
+                from_time=from_time,
+                origins=["main"],
+                levels=["INFO", "DEBUG"],
+                newest_first=True,
+                update=False,
+            ),
+            None,
+        )
 
         # detect if core has stopped running without a "stop" command
-        if last_mainlog_index is None:
+        if last_mainlog is None:
             print("core has not been running in the last 5 days")
             return
 
-        if last_stop_index is None:
+        if last_stop is None:
             print("core has not been shut down properly")
-            state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+            state_lock = utils.InterProcessLock(
                 filepath=interfaces.state_interface.STATE_LOCK_PATH,
                 timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-                poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
             )
             new_exception_state_item = types.ExceptionStateItem(
                 origin="cli",
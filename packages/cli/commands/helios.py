@@ -0,0 +1,214 @@
+"""Evaluate archived Helios images."""
+
+# pyright: reportUnusedFunction=false
+
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Optional, TextIO
+
+import click
+
+from packages.core import threads, types, utils
+
+_dir = os.path.dirname
+_PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
+_CONFIG_FILE_PATH = os.path.join(_PROJECT_DIR, "config", "config.json")
+_DEFAULT_HELIOS_CONFIG_FILE_PATH = os.path.join(
+    _PROJECT_DIR, "config", "helios.config.default.json"
+)
+
+logger = utils.Logger(origin="cli")
+
+
+@click.group()
+def helios_command_group() -> None:
+    pass
+
+
+def _print_red(text: str) -> None:
+    click.echo(click.style(text, fg="red"), err=True)
+
+
+def _replay_options(function: Callable[..., None]) -> Callable[..., None]:
+    """Options shared by the replay commands."""
+
+    for option in reversed(
+        [
+            click.argument("days", nargs=-1, required=True),
+            click.option(
+                "--archive-dir",
+                default=threads.helios_replay.HELIOS_ARCHIVE_DIR,
+                help="Directory containing the daily archive files and image directories",
+            ),
+            click.option("--evaluation-size", type=int, default=None),
+            click.option("--edge-pixel-threshold", type=float, default=None),
+            click.option("--edge-color-threshold", type=int, default=None),
+            click.option("--target-pixel-brightness", type=int, default=None),
+            click.option("--min-seconds-between-state-changes", type=int, default=None),
+            click.option(
+                "--edge-detection-engine", type=click.Choice(["skimage", "opencv"]), default=None
+            ),
+            click.option(
+                "--processes", type=int, default=None, help="Number of days to replay in parallel"
+            ),
+        ]
+    ):
+        function = option(function)
+    return function
+
+
+def _load_helios_config(overrides: dict[str, Any]) -> types.config.HeliosConfig:
+    """Load the Helios config from the config.json (or the default Helios
+    config) and apply the overrides that are not None."""
+
+    helios_config: Optional[types.config.HeliosConfig] = None
+    if os.path.isfile(_CONFIG_FILE_PATH):
+        helios_config = types.Config.load(ignore_path_existence=True).helios
+    if helios_config is None:
+        with open(_DEFAULT_HELIOS_CONFIG_FILE_PATH) as f:
+            helios_config = types.config.HeliosConfig.model_validate_json(f.read())
+    return types.config.HeliosConfig.model_validate(
+        {
+            **helios_config.model_dump(),
+            **{k: v for k, v in overrides.items() if v is not None},
+        }
+    )
+
+
+def _get_archived_days(days: tuple[str, ...], archive_dir: str) -> list[str]:
+    archived_days = sorted(
+        set(
+            d for day in days for d in threads.helios_replay.HeliosReplay.get_days(day, archive_dir)
+        )
+    )
+    if len(archived_days) == 0:
+        _print_red(f"No archived images found for {', '.join(days)} in {archive_dir}")
+        exit(1)
+    return archived_days
+
+
+@helios_command_group.command(
+    name="replay",
+    help="Re-run the Helios evaluation on the raw images archived with `save_images_to_archive`. DAYS are `%Y%m%d` or `%Y%m` strings. The Helios config from the config.json (or the default Helios config) is used unless overridden by the options. Prints a CSV timeseries of the edge fractions and decisions and a summary for each day.",
+)
+@_replay_options
+@click.option(
+    "--edge-detection-resolution",
+    type=click.Choice(["full", "half", "quarter"]),
+    default=None,
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), default=None, help="Write the CSV to this file"
+)
+def _replay(
+    days: tuple[str, ...],
+    archive_dir: str,
+    processes: Optional[int],
+    output: Optional[str],
+    **overrides: Any,
+) -> None:
+    logger.debug(f'running command "helios replay {" ".join(days)}"')
+
+    helios_config = _load_helios_config(overrides)
+    archived_days = _get_archived_days(days, archive_dir)
+
+    t = time.time()
+    csv_file: TextIO = sys.stdout if output is None else open(output, "w")
+    summaries: list[str] = []
+    try:
+        csv_file.write("time,edge_fraction,lense_x,lense_y,lense_r,outcome,state\n")
+        for day, steps in threads.helios_replay.HeliosReplay.replay_days(
+            archived_days, helios_config, archive_dir, processes
+        ):
+            for step in steps:
+                lense = ",," if step.lense is None else ",".join(map(str, step.lense))
+                state = {True: "good", False: "bad", None: ""}[step.state]
+                csv_file.write(
+                    f"{step.time.isoformat()},{step.edge_fraction},{lense},{step.outcome},{state}\n"
+                )
+            good_count = len([s for s in steps if s.state])
+            summaries.append(
+                f"{day}: {len(steps)} images, state good for {good_count} "
+                + f"({good_count / max(len(steps), 1) * 100:.1f}%), "
+                + f"{len([s for s in steps if s.outcome == 'changed'])} state changes"
+            )
+    finally:
+        if output is not None:
+            csv_file.close()
+
+    for summary in summaries:
+        click.echo(summary, err=(output is None))
+    click.echo(
+        f"Replayed {len(archived_days)} day(s) in {time.time() - t:.2f}s", err=(output is None)
+    )
+
+
+@helios_command_group.command(
+    name="compare-resolutions",
+    help="Replay the archived images of the given DAYS (`%Y%m%d` or `%Y%m` strings) with every `edge_detection_resolution` and print how the edge fractions, decisions and processing times differ from the full resolution.",
+)
+@_replay_options
+def _compare_resolutions(
+    days: tuple[str, ...],
+    archive_dir: str,
+    processes: Optional[int],
+    **overrides: Any,
+) -> None:
+    logger.debug(f'running command "helios compare-resolutions {" ".join(days)}"')
+
+    archived_days = _get_archived_days(days, archive_dir)
+    results: dict[str, list[threads.helios_replay.HeliosReplayStep]] = {}
+    for resolution in utils.helios_image_processing.EDGE_DETECTION_SCALES.keys():
+        helios_config = _load_helios_config({**overrides, "edge_detection_resolution": resolution})
+        results[resolution] = [
+            step
+            for _, steps in threads.helios_replay.HeliosReplay.replay_days(
+                archived_days, helios_config, archive_dir, processes
+            )
+            for step in steps
+        ]
+
+    reference = results["full"]
+    if len(reference) == 0:
+        _print_red("No archived images found")
+        exit(1)
+    click.echo(f"Compared {len(reference)} images of {len(archived_days)} day(s)")
+    for resolution, steps in results.items():
+        differences = [abs(a.edge_fraction - b.edge_fraction) for a, b in zip(steps, reference)]
+        same_decision_count = len([1 for a, b in zip(steps, reference) if a.state == b.state])
+        edge_fraction_time = statistics.mean(s.edge_fraction_time for s in steps)
+        click.echo(
+            f"{resolution:8s} edge fraction time (mean): {edge_fraction_time * 1000:7.1f} ms, "
+            + f"edge fraction difference (mean/max): {statistics.mean(differences):.5f}/"
+            + f"{max(differences):.5f}, "
+            + f"same decision: {same_decision_count / len(steps) * 100:5.1f}%, "
+            + f"state changes: {len([s for s in steps if s.outcome == 'changed'])}"
+        )
+
+
+@helios_command_group.command(
+    name="export-images",
+    help='Render the raw and the processed images of a daily Helios archive file (`%Y%m%d.helios`, written with the `image_archive_format` "container") and save them as JPEG pairs to OUTPUT_DIR, named like with the `image_archive_format` "jpeg".',
+)
+@click.argument("archive_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+def _export_images(archive_file: str, output_dir: str) -> None:
+    logger.debug(f'running command "helios export-images {archive_file} {output_dir}"')
+
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for record in utils.HeliosArchive.iterate(archive_file):
+        raw_image, processed_image = utils.HeliosImageProcessing.render_archive_record(record)
+        edge_fraction_str = str(record.metadata.edge_fraction)
+        edge_fraction_str += "0" * (8 - len(edge_fraction_str))
+        image_slug = os.path.join(
+            output_dir,
+            f"{record.metadata.station_id}-{record.metadata.time.strftime('%Y%m%d-%H%M%S')}-"
+            + edge_fraction_str,
+        )
+        raw_image.save(image_slug + "-raw.jpg")
+        processed_image.save(image_slug + "-processed.jpg")
+        count += 1
+    click.echo(f"Exported {count} image pair(s) to {output_dir}")
@@ -2,10 +2,13 @@
 
 # pyright: reportUnusedFunction=false
 
+import concurrent.futures
+import datetime
 import glob
 import os
 import re
-from typing import Optional
+import time
+from typing import Optional, TextIO
 
 import click
 import tum_esm_utils
@@ -17,7 +20,7 @@ _PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
 _DEBUG_LOG_FILE = os.path.join(_PROJECT_DIR, "logs", "debug.log")
 _LOG_FILES_LOCK = os.path.join(_PROJECT_DIR, "logs", ".logs.lock")
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 
 
 @click.group()
@@ -52,6 +55,52 @@ def _read_logs(level: str) -> None:
         click.echo("".join(f.readlines()))
 
 
+@logs_command_group.command(
+    name="query",
+    help="Print the log entries from the archive that match the given filters. Times are in UTC.",
+)
+@click.option(
+    "--from", "from_time", type=click.DateTime(), help="Only entries at or after this time"
+)
+@click.option("--to", "to_time", type=click.DateTime(), help="Only entries before this time")
+@click.option(
+    "--origin", "origins", multiple=True, help="Only entries from this origin (repeatable)"
+)
+@click.option("--level", "levels", multiple=True, help="Only entries with this level (repeatable)")
+@click.option("--contains", default=None, help="Only entries containing this text")
+@click.option("--newest-first", is_flag=True, help="Print the newest entries first")
+@click.option("--limit", type=int, default=None, help="Print at most this many entries")
+def _query_logs(
+    from_time: Optional[datetime.datetime],
+    to_time: Optional[datetime.datetime],
+    origins: tuple[str, ...],
+    levels: tuple[str, ...],
+    contains: Optional[str],
+    newest_first: bool,
+    limit: Optional[int],
+) -> None:
+    logger.debug('running command "logs query"')
+
+    def _to_timestamp(dt: Optional[datetime.datetime]) -> Optional[float]:
+        if dt is None:
+            return None
+        return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    entries = utils.LogIndex.query(
+        from_time=_to_timestamp(from_time),
+        to_time=_to_timestamp(to_time),
+        origins=list(origins) if len(origins) > 0 else None,
+        levels=[l.upper() for l in levels] if len(levels) > 0 else None,
+        substring=contains,
+        newest_first=newest_first,
+    )
+    for i, (_, text) in enumerate(entries):
+        if (limit is not None) and (i >= limit):
+            entries.close()
+            break
+        click.echo(text, nl=False)
+
+
 # FIXME: remove this with the next breaking release
 @logs_command_group.command(
     name="archive",
@@ -61,6 +110,88 @@ def _archive_logs() -> None:
     _print_red("this command is deprecated without a replacement")
 
 
+# 2024-10-09 01:40:16.089891 UTC+0 - enclosure-control - INFO -
+_LINE_WITH_ORIGIN_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+ [^\s]+) \- ([\w\d\-_]+) \- (?:([A-Z]+) \- )?"
+)
+
+
+def _get_utc_time_string(time_string: str) -> Optional[str]:
+    """Convert the time of a log line to "%Y-%m-%d %H:%M:%S.%f" in UTC. These
+    strings can be compared directly. Log lines are written in UTC, so the
+    slow parsing is only needed for lines from other timezones."""
+
+    if time_string.endswith(" UTC+0000") and len(time_string) == 35:
+        return time_string[:26]
+    try:
+        return (
+            datetime.datetime.strptime(time_string, "%Y-%m-%d %H:%M:%S.%f UTC%z")
+            .astimezone(datetime.timezone.utc)
+            .strftime("%Y-%m-%d %H:%M:%S.%f")
+        )
+    except ValueError:
+        return None
+
+
+def _split_log_file_by_origin(
+    path: str,
+    levels: Optional[list[str]],
+    from_time: Optional[str],
+    to_time: Optional[str],
+) -> tuple[int, list[str]]:
+    """Split one log file by origin. Reads the file line by line and appends
+    every line to the file of its origin right away, so the memory usage
+    does not depend on the file size. Lines without a timestamp (e.g.
+    tracebacks) belong to the preceding line. Returns the number of bytes
+    read and the messages to be printed."""
+
+    messages: list[str] = [f"Splitting {path}"]
+    output_paths: dict[str, str] = {}
+    output_files: dict[str, TextIO] = {}
+    byte_count = os.path.getsize(path)
+    try:
+        with open(path, "r") as file:
+            origin: Optional[str] = None
+            line_is_included: bool = False
+            for line in file:
+                m = _LINE_WITH_ORIGIN_PATTERN.match(line)
+                if m is not None:
+                    origin = m.group(2)
+                    line_is_included = (levels is None) or (m.group(3) in levels)
+                    if line_is_included and ((from_time is not None) or (to_time is not None)):
+                        line_time = _get_utc_time_string(m.group(1))
+                        line_is_included = (
+                            (line_time is not None)
+                            and ((from_time is None) or (line_time >= from_time))
+                            and ((to_time is None) or (line_time < to_time))
+                        )
+
+                if (origin is None) or (not line_is_included):
+                    continue
+
+                if origin not in output_files:
+                    output_paths[origin] = f"{path[:-4]}-{origin}.log"
+                    output_files[origin] = open(output_paths[origin] + ".tmp", "w")
+                output_files[origin].write(line if line.endswith("\n") else line + "\n")
+    finally:
+        for f in output_files.values():
+            f.close()
+
+    if len(output_files) <= 1:
+        for origin in output_paths:
+            os.remove(output_paths[origin] + ".tmp")
+        if len(output_files) == 0:
+            messages.append(f"No origin found in {path}")
+        else:
+            messages.append(f"Only one origin found in {path} (not splitting)")
+        return byte_count, messages
+
+    for origin, output_path in output_paths.items():
+        messages.append(f"Writing logs subset to {output_path}")
+        os.replace(output_path + ".tmp", output_path)
+    return byte_count, messages
+
+
 @logs_command_group.command(
     name="split-log-files-by-origin",
     help="Split a set of logfiles by origin into different files. You can use UNIX-style wildcards.",
@@ -70,51 +201,62 @@ def _archive_logs() -> None:
     type=str,
     default="./*.log",
 )
-def split_log_files_by_origin(path: str) -> None:
+@click.option(
+    "--level", "levels", multiple=True, help="Only keep lines with this level (repeatable)"
+)
+@click.option(
+    "--from", "from_time", type=click.DateTime(), help="Only keep lines at or after this time (UTC)"
+)
+@click.option(
+    "--to", "to_time", type=click.DateTime(), help="Only keep lines before this time (UTC)"
+)
+@click.option("--processes", type=int, default=None, help="Number of files to process in parallel")
+def split_log_files_by_origin(
+    path: str,
+    levels: tuple[str, ...],
+    from_time: Optional[datetime.datetime],
+    to_time: Optional[datetime.datetime],
+    processes: Optional[int],
+) -> None:
     """Split log files by origin."""
 
     logger.debug(f'running command "logs split-log-files-by-origin {path}"')
-    line_with_origin_pattern = re.compile(
-        r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+ [^\s]+ \- ([\w\d\-_]+) \- "
-    )
-    # 2024-10-09 01:40:16.089891 UTC+0 - enclosure-control -
 
-    filepaths = glob.glob(path)
-
-    for f in filepaths:
+    filepaths: list[str] = []
+    for f in glob.glob(path):
         if not os.path.isfile(f):
             print(f"Not a file: {f}")
-            continue
-        if not f.endswith(".log"):
+        elif not f.endswith(".log"):
             print(f"Not a log file: {f} (has to end with `.log`)")
-            continue
-
-        print(f"Splitting {f}")
-        with open(f, "r") as file:
-            lines = file.read().strip(" \t\n").split("\n")
-
-        data: dict[str, list[str]] = {}
-        origin: Optional[str] = None
-        for line in lines:
-            if line_with_origin_pattern.match(line):
-                m = line_with_origin_pattern.match(line)
-                assert m is not None
-                origin = m.group(1)
-                if origin not in data:
-                    data[str(origin)] = []
-
-            if origin is not None:
-                data[origin].append(line)
-
-        if len(data) == 0:
-            print(f"No origin found in {f}")
-            continue
-        if len(data) == 1:
-            print(f"Only one origin found in {f} (not splitting)")
-            continue
-
-        for origin, lines in data.items():
-            new_path = f"{f[:-4]}-{origin}.log"
-            print(f"Writing logs subset to {new_path}")
-            with open(new_path, "w") as file:
-                file.write("\n".join(lines))
+        else:
+            filepaths.append(f)
+    if len(filepaths) == 0:
+        return
+
+    arguments = (
+        [l.upper() for l in levels] if len(levels) > 0 else None,
+        None if from_time is None else from_time.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        None if to_time is None else to_time.strftime("%Y-%m-%d %H:%M:%S.%f"),
+    )
+    t = time.time()
+    total_byte_count: int = 0
+    if len(filepaths) == 1 or processes == 1:
+        for f in filepaths:
+            byte_count, messages = _split_log_file_by_origin(f, *arguments)
+            total_byte_count += byte_count
+            print("\n".join(messages))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(len(filepaths), processes or os.cpu_count() or 1)
+        ) as executor:
+            futures = [executor.submit(_split_log_file_by_origin, f, *arguments) for f in filepaths]
+            for future in concurrent.futures.as_completed(futures):
+                byte_count, messages = future.result()
+                total_byte_count += byte_count
+                print("\n".join(messages))
+
+    elapsed_time = max(time.time() - t, 1e-6)
+    print(
+        f"Processed {len(filepaths)} file(s) with {total_byte_count / 1e6:.1f} MB in "
+        + f"{elapsed_time:.2f}s ({total_byte_count / 1e6 / elapsed_time:.1f} MB/s)"
+    )
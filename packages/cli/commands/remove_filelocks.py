@@ -14,10 +14,12 @@ def _print_green(text: str) -> None:
     help="NRemove file locks that might be corrupted.",
 )
 def remove_filelocks() -> None:
-    for f in [
-        interfaces.state_interface.STATE_LOCK_PATH,
-        interfaces.state_interface.STATE_LOCK_PATH + "-journal",
-    ]:
+    # the OS releases the state lock when the holding process exits, so it
+    # can not be corrupted - only the SQLite lock files used before are removed
+    sqlite_lock_path = os.path.join(
+        os.path.dirname(interfaces.state_interface.STATE_LOCK_PATH), "state.sqlitelock"
+    )
+    for f in [sqlite_lock_path, sqlite_lock_path + "-journal"]:
         if os.path.exists(f):
             os.remove(f)
             _print_green(f"Removed {f} lock.")
@@ -2,12 +2,14 @@
 
 # pyright: reportUnusedFunction=false
 
+import json
+from typing import Optional
+
 import click
-import tum_esm_utils
 
 from packages.core import utils, interfaces
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 
 
 @click.group()
@@ -15,14 +17,47 @@ def state_command_group() -> None:
     pass
 
 
-@state_command_group.command(name="get", help="Read the current state.json file.")
+@state_command_group.command(
+    name="get",
+    help='Read the current state. While Pyra Core is running, its state snapshot is read without waiting for the state lock, otherwise the state.json file. With `--if-newer-than VERSION`, prints `{"version": ..., "state": ...}` instead, where the state is null if it has not changed since the given version.',
+)
 @click.option("--indent", is_flag=True, help="Print the JSON in an indented manner")
-def _get_state(indent: bool) -> None:
+@click.option(
+    "--if-newer-than",
+    type=int,
+    default=None,
+    help="Only print the state if its version is newer than this (-1 to always print it)",
+)
+def _get_state(indent: bool, if_newer_than: Optional[int]) -> None:
     logger.debug('running command "state get"')
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
-        filepath=interfaces.state_interface.STATE_LOCK_PATH,
-        timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
-    )
-    state = interfaces.StateInterface.load_state(state_lock, logger)
-    click.echo(state.model_dump_json(indent=(2 if indent else None)))
+
+    snapshot = interfaces.StateInterface.read_state_snapshot(if_newer_than)
+    if snapshot is not None:
+        version, state_json = snapshot
+    else:
+        version = interfaces.StateInterface.get_version()
+        state_json = None
+        if (if_newer_than is None) or (version > if_newer_than):
+            state_lock = utils.InterProcessLock(
+                filepath=interfaces.state_interface.STATE_LOCK_PATH,
+                timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
+            )
+            state = interfaces.StateInterface.load_state(state_lock, logger)
+            state_json = state.model_dump_json()
+
+    if if_newer_than is None:
+        assert state_json is not None
+        if indent:
+            state_json = json.dumps(json.loads(state_json), indent=2, ensure_ascii=False)
+        click.echo(state_json)
+    else:
+        click.echo(
+            json.dumps(
+                {
+                    "version": version,
+                    "state": None if state_json is None else json.loads(state_json),
+                },
+                indent=(2 if indent else None),
+                ensure_ascii=False,
+            )
+        )
@@ -4,11 +4,10 @@ import threading
 import circadian_scp_upload
 import click
 import fabric.runners  # pyright: ignore[reportMissingTypeStubs]
-import tum_esm_utils
 
 from packages.core import threads, types, utils, interfaces
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 state_lock = threading.Lock()
 
 
@@ -30,10 +29,9 @@ def _test_opus() -> None:
     """Start OPUS, run a macro, stop the macro, close opus."""
     logger.info('running command "test opus"')
     config = types.Config.load()
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
     try:
         threads.OpusThread.test_setup(config, state_lock, logger)
@@ -47,10 +45,9 @@ def _test_camtracker() -> None:
     """Start CamTracker, check if it is running, stop CamTracker."""
     logger.info('running command "test camtracker"')
     config = types.Config.load()
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
     try:
         threads.camtracker_thread.CamTrackerThread.test_setup(config, state_lock, logger)
@@ -7,11 +7,10 @@ import time
 from typing import Callable, Literal, Optional
 
 import click
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 
 
 @click.group(name="tum-enclosure")
@@ -30,10 +29,9 @@ def _print_red(text: str) -> None:
 def _get_plc_interface() -> Optional[interfaces.TUMEnclosureInterface]:
     config = types.Config.load()
     plc_interface = None
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
 
     try:
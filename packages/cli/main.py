@@ -10,8 +10,10 @@ _PROJECT_DIR = tum_esm_utils.files.get_parent_dir_path(__file__, current_depth=3
 sys.path.append(_PROJECT_DIR)
 
 from packages.cli.commands import (
+    activity_command_group,
     config_command_group,
     core_command_group,
+    helios_command_group,
     logs_command_group,
     remove_filelocks,
     state_command_group,
@@ -21,7 +23,7 @@ from packages.cli.commands import (
 )
 from packages.core import utils
 
-logger = utils.Logger(origin="cli", lock=None)
+logger = utils.Logger(origin="cli")
 
 
 @click.command(help="Print Pyra version and code directory path.")
@@ -41,8 +43,10 @@ def cli() -> None:
 
 
 cli.add_command(print_cli_information, name="info")
+cli.add_command(activity_command_group, name="activity")
 cli.add_command(config_command_group, name="config")
 cli.add_command(core_command_group, name="core")
+cli.add_command(helios_command_group, name="helios")
 cli.add_command(logs_command_group, name="logs")
 cli.add_command(tum_enclosure_command_group, name="tum-enclosure")
 cli.add_command(aemet_enclosure_command_group, name="aemet-enclosure")
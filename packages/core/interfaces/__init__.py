@@ -1,5 +1,9 @@
+from .activity_archive import ActivityArchive as ActivityArchive
 from .activity_history import ActivityHistoryInterface as ActivityHistoryInterface
 from .em27_interface import EM27Interface as EM27Interface
+from .helios_camera import HeliosCamera as HeliosCamera
+from .helios_camera import HeliosCameraCapabilities as HeliosCameraCapabilities
+from .helios_camera import open_helios_camera as open_helios_camera
 from .state_interface import StateInterface as StateInterface
 
 from .enclosures.tum import TUMEnclosureInterface as TUMEnclosureInterface
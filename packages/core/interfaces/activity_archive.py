@@ -0,0 +1,260 @@
+"""Yearly binary files of the activity history.
+
+The daily JSON files (`logs/activity/activity-%Y-%m-%d.json`) are still
+written for compatibility. Additionally, every day is stored in a fixed-size
+block of the file of its year (`logs/activity/activity-%Y.bin`), so that
+long-term activity can be queried without parsing one JSON file per day:
+
+```
+| header (64 bytes) | index (366 bytes, 1 if the day has been written) | padding |
+| day block of January 1st (at byte 512) | day block of January 2nd | ...
+```
+
+A day block contains the flag series (`is_running`, `is_measuring`,
+`has_errors`, `is_uploading`) as bit-packed arrays of 1440 minutes and
+the count series (`camtracker_startups`, `opus_startups`, `cli_calls`)
+as uint8 arrays of 1440 minutes. Counts above 255 per minute are stored
+as 255. The file only grows up to the last day that has been written."""
+
+from __future__ import annotations
+import datetime
+import glob
+import os
+import struct
+from typing import Any, Literal, Optional
+import numpy as np
+import tum_esm_utils
+from packages.core import types
+
+_PROJECT_DIR = tum_esm_utils.files.get_parent_dir_path(__file__, current_depth=4)
+ACTIVITY_DIR = os.path.join(_PROJECT_DIR, "logs", "activity")
+
+_MAGIC = b"PYRAACTV"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHHH")  # magic, format version, year, days, minutes per day
+_INDEX_OFFSET = 64
+_DATA_OFFSET = 512
+_DAYS_PER_FILE = 366
+_MINUTES_PER_DAY = 24 * 60
+
+_FLAG_SERIES = ("is_running", "is_measuring", "has_errors", "is_uploading")
+_COUNT_SERIES = ("camtracker_startups", "opus_startups", "cli_calls")
+_PACKED_FLAGS_SIZE = len(_FLAG_SERIES) * _MINUTES_PER_DAY // 8
+DAY_BLOCK_SIZE = _PACKED_FLAGS_SIZE + len(_COUNT_SERIES) * _MINUTES_PER_DAY
+
+_RESOLUTION_UNITS = {"minute": "m", "hour": "h", "day": "D", "month": "M"}
+
+
+class ActivityArchive:
+    """Reads and writes the yearly activity files. Days are only
+    written by the system monitor thread."""
+
+    @staticmethod
+    def get_path(year: int, directory: Optional[str] = None) -> str:
+        return os.path.join(directory or ACTIVITY_DIR, f"activity-{year}.bin")
+
+    @staticmethod
+    def write_day(ah: types.ActivityHistory, directory: Optional[str] = None) -> None:
+        """Write the activity history of a day into the file of its year."""
+
+        path = ActivityArchive.get_path(ah.date.year, directory)
+        day_index = ah.date.timetuple().tm_yday - 1
+        flags = np.array([getattr(ah, s) for s in _FLAG_SERIES], dtype=np.int64) != 0
+        counts = np.clip(np.array([getattr(ah, s) for s in _COUNT_SERIES], dtype=np.int64), 0, 255)
+        block = np.packbits(flags, axis=1).tobytes() + counts.astype(np.uint8).tobytes()
+
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(
+                    _HEADER.pack(
+                        _MAGIC, _FORMAT_VERSION, ah.date.year, _DAYS_PER_FILE, _MINUTES_PER_DAY
+                    ).ljust(_DATA_OFFSET, b"\x00")
+                )
+        with open(path, "r+b") as f:
+            ActivityArchive._check_header(f.read(_HEADER.size), path, ah.date.year)
+            f.seek(_DATA_OFFSET + day_index * DAY_BLOCK_SIZE)
+            f.write(block)
+            # mark the day as written after its block
+            f.flush()
+            f.seek(_INDEX_OFFSET + day_index)
+            f.write(b"\x01")
+
+    @staticmethod
+    def _check_header(header: bytes, path: str, year: int) -> None:
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not an activity file")
+        magic, version, file_year, days, minutes = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not an activity file")
+        if (version, file_year, days, minutes) != (
+            _FORMAT_VERSION,
+            year,
+            _DAYS_PER_FILE,
+            _MINUTES_PER_DAY,
+        ):
+            raise ValueError(f"{path} has an unsupported format or belongs to another year")
+
+    @staticmethod
+    def _read_blocks(
+        year: int, first_day_index: int, last_day_index: int, directory: Optional[str]
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """Return whether the days `first_day_index..last_day_index` (day of
+        the year - 1, inclusive) have been written and their day blocks.
+        Blocks of days that have not been written are zeros."""
+
+        day_count = last_day_index - first_day_index + 1
+        written = np.zeros(day_count, dtype=np.bool_)
+        blocks = np.zeros((day_count, DAY_BLOCK_SIZE), dtype=np.uint8)
+        path = ActivityArchive.get_path(year, directory)
+        if not os.path.isfile(path):
+            return written, blocks
+
+        with open(path, "rb") as f:
+            ActivityArchive._check_header(f.read(_HEADER.size), path, year)
+        stored_day_count = min(
+            max((os.path.getsize(path) - _DATA_OFFSET) // DAY_BLOCK_SIZE, 0), _DAYS_PER_FILE
+        )
+        index = np.fromfile(path, dtype=np.uint8, count=_DAYS_PER_FILE, offset=_INDEX_OFFSET)
+        written[:] = index[first_day_index : last_day_index + 1] != 0
+        available_day_count = min(last_day_index + 1, stored_day_count) - first_day_index
+        if available_day_count > 0:
+            data = np.memmap(
+                path,
+                dtype=np.uint8,
+                mode="r",
+                offset=_DATA_OFFSET,
+                shape=(stored_day_count, DAY_BLOCK_SIZE),
+            )
+            blocks[:available_day_count] = data[
+                first_day_index : first_day_index + available_day_count
+            ]
+            del data
+        blocks[~written] = 0
+        return written, blocks
+
+    @staticmethod
+    def _decode_blocks(blocks: np.ndarray[Any, Any]) -> dict[str, np.ndarray[Any, Any]]:
+        """Return every series of the day blocks as an array of
+        shape (days, minutes per day)."""
+
+        day_count = blocks.shape[0]
+        flags = np.unpackbits(
+            blocks[:, :_PACKED_FLAGS_SIZE].reshape(day_count, len(_FLAG_SERIES), -1), axis=2
+        )
+        counts = blocks[:, _PACKED_FLAGS_SIZE:].reshape(
+            day_count, len(_COUNT_SERIES), _MINUTES_PER_DAY
+        )
+        series = {name: flags[:, i, :] for i, name in enumerate(_FLAG_SERIES)}
+        series.update({name: counts[:, i, :] for i, name in enumerate(_COUNT_SERIES)})
+        return series
+
+    @staticmethod
+    def read_day(
+        date: datetime.date, directory: Optional[str] = None
+    ) -> Optional[types.ActivityHistory]:
+        """Return the activity history of a day, or None if it has not been written."""
+
+        day_index = date.timetuple().tm_yday - 1
+        written, blocks = ActivityArchive._read_blocks(date.year, day_index, day_index, directory)
+        if not written[0]:
+            return None
+        series = ActivityArchive._decode_blocks(blocks)
+        return types.ActivityHistory(
+            date=date,
+            **{name: values[0].astype(np.int64).tolist() for name, values in series.items()},
+        )
+
+    @staticmethod
+    def get_minutes(
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+        directory: Optional[str] = None,
+    ) -> dict[str, np.ndarray[Any, Any]]:
+        """Return every series for the minutes from `from_time` (inclusive)
+        to `to_time` (exclusive) as one array each."""
+
+        from_time = from_time.replace(second=0, microsecond=0)
+        minute_count = max(int((to_time - from_time).total_seconds() // 60), 0)
+        if minute_count == 0:
+            return {name: np.zeros(0, dtype=np.int64) for name in _FLAG_SERIES + _COUNT_SERIES}
+        last_date = (from_time + datetime.timedelta(minutes=minute_count - 1)).date()
+
+        chunks: list[dict[str, np.ndarray[Any, Any]]] = []
+        for year in range(from_time.year, last_date.year + 1):
+            first_day = max(from_time.date(), datetime.date(year, 1, 1))
+            last_day = min(last_date, datetime.date(year, 12, 31))
+            _, blocks = ActivityArchive._read_blocks(
+                year,
+                first_day.timetuple().tm_yday - 1,
+                last_day.timetuple().tm_yday - 1,
+                directory,
+            )
+            chunks.append(ActivityArchive._decode_blocks(blocks))
+
+        first_minute = from_time.hour * 60 + from_time.minute
+        return {
+            name: np.concatenate([c[name].reshape(-1) for c in chunks]).astype(np.int64)[
+                first_minute : first_minute + minute_count
+            ]
+            for name in _FLAG_SERIES + _COUNT_SERIES
+        }
+
+    @staticmethod
+    def query(
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+        resolution: Literal["minute", "hour", "day", "month"],
+        directory: Optional[str] = None,
+    ) -> list[types.ActivityHistoryPeriod]:
+        """Return the activity from `from_time` (inclusive) to `to_time`
+        (exclusive), aggregated per minute, hour, day or month. The first
+        and the last period only cover the part inside the range."""
+
+        from_time = from_time.replace(second=0, microsecond=0)
+        series = ActivityArchive.get_minutes(from_time, to_time, directory)
+        minute_count = len(series["is_running"])
+        if minute_count == 0:
+            return []
+
+        times = np.datetime64(from_time, "m") + np.arange(minute_count)
+        keys = times.astype(f"datetime64[{_RESOLUTION_UNITS[resolution]}]")
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        minutes: list[int] = np.diff(np.append(starts, minute_count)).tolist()
+        start_times: list[datetime.datetime] = times[starts].tolist()
+        sums: dict[str, list[int]] = {
+            name: np.add.reduceat(values, starts).tolist() for name, values in series.items()
+        }
+
+        return [
+            types.ActivityHistoryPeriod(
+                start=start_time,
+                minutes=minutes[i],
+                running_minutes=sums["is_running"][i],
+                measuring_minutes=sums["is_measuring"][i],
+                error_minutes=sums["has_errors"][i],
+                uploading_minutes=sums["is_uploading"][i],
+                camtracker_startups=sums["camtracker_startups"][i],
+                opus_startups=sums["opus_startups"][i],
+                cli_calls=sums["cli_calls"][i],
+                uptime_fraction=sums["is_running"][i] / minutes[i],
+                measuring_fraction=sums["is_measuring"][i] / minutes[i],
+                error_fraction=sums["has_errors"][i] / minutes[i],
+                uploading_fraction=sums["is_uploading"][i] / minutes[i],
+            )
+            for i, start_time in enumerate(start_times)
+        ]
+
+    @staticmethod
+    def import_json_files(directory: Optional[str] = None) -> list[datetime.date]:
+        """Write the days of all daily JSON files into the yearly files.
+        Returns the imported days."""
+
+        imported_days: list[datetime.date] = []
+        for path in sorted(
+            glob.glob(os.path.join(directory or ACTIVITY_DIR, "activity-*-*-*.json"))
+        ):
+            ah = types.ActivityHistory.model_validate_json(tum_esm_utils.files.load_file(path))
+            ActivityArchive.write_day(ah, directory)
+            imported_days.append(ah.date)
+        return imported_days
@@ -5,6 +5,7 @@ import time
 from typing import Optional
 import tum_esm_utils
 from packages.core import types, utils
+from .activity_archive import ActivityArchive
 
 _PROJECT_DIR = tum_esm_utils.files.get_parent_dir_path(__file__, current_depth=4)
 _MINUTES_BETWEEN_DUMPS = 2
@@ -60,9 +61,7 @@ class ActivityHistoryInterface:
 
         ah = self.activity_history
         if ah is not None:
-            tum_esm_utils.files.dump_file(
-                ActivityHistoryInterface._filepath(ah.date), ah.model_dump_json()
-            )
+            ActivityHistoryInterface._dump(ah)
 
     @staticmethod
     def _filepath(date: datetime.date) -> str:
@@ -72,6 +71,10 @@ class ActivityHistoryInterface:
 
     @staticmethod
     def _dump(ah: types.ActivityHistory) -> None:
+        """Write the daily JSON file (read by the UI) and the
+        day block in the yearly file (used for queries)."""
+
         tum_esm_utils.files.dump_file(
             ActivityHistoryInterface._filepath(ah.date), ah.model_dump_json()
         )
+        ActivityArchive.write_day(ah)
@@ -88,7 +88,7 @@ class AEMETEnclosureInterface:
     def __init__(
         self,
         config: types.aemet.AEMETEnclosureConfig,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         self.enclosure_config = config
@@ -5,7 +5,6 @@ from typing import Literal, Optional
 
 import snap7
 import snap7.util
-import tum_esm_utils.sqlitelock
 from tum_esm_utils.validators import StrictIPv4Adress
 
 from packages.core import interfaces, types, utils
@@ -116,7 +115,7 @@ class TUMEnclosureInterface:
         self,
         plc_version: Literal[1, 2],
         plc_ip: StrictIPv4Adress,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         self.plc_version = plc_version
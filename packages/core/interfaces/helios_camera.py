@@ -0,0 +1,261 @@
+import abc
+import glob
+import os
+import sys
+import time
+from typing import Any, Optional, Protocol
+
+import cv2 as cv
+import numpy as np
+import pydantic
+from tum_esm_utils.validators import StricterBaseModel
+
+from packages.core import types
+
+_dir = os.path.dirname
+_PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
+HELIOS_CAMERA_CAPABILITIES_PATH = os.path.join(
+    _PROJECT_DIR, "logs", "helios-camera-capabilities.json"
+)
+
+# exposures accepted by the simulated cameras, like most webcams these
+# are (roughly) the log2 of the exposure time in seconds
+SIMULATED_EXPOSURES = range(-13, 0)
+
+# exposure at which the images of the `FileHeliosCamera` are returned unchanged
+_FILE_CAMERA_REFERENCE_EXPOSURE = -7
+
+_IMAGE_FILE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class HeliosCamera(Protocol):
+    """The subset of OpenCV's `VideoCapture` used by the `HeliosInterface`."""
+
+    def isOpened(self) -> bool: ...
+
+    def read(self) -> tuple[bool, Any]: ...
+
+    def set(self, propId: int, value: float) -> bool: ...
+
+    def get(self, propId: int) -> float: ...
+
+    def release(self) -> None: ...
+
+
+def open_helios_camera(helios_config: types.config.HeliosConfig) -> HeliosCamera:
+    """Open the camera backend selected in the config:
+
+    * `opencv`: the webcam with the id `camera_id`
+    * `file`: replays the images in the directory or the video file `camera_source`
+    * `synthetic`: generates frames of a lense with moving shadows"""
+
+    if helios_config.camera_backend == "file":
+        assert helios_config.camera_source is not None, (
+            "camera_source is required for the file camera backend"
+        )
+        return FileHeliosCamera(helios_config.camera_source)
+    if helios_config.camera_backend == "synthetic":
+        return SyntheticHeliosCamera()
+    if sys.platform.startswith("win"):
+        return cv.VideoCapture(helios_config.camera_id, cv.CAP_DSHOW)
+    return cv.VideoCapture(helios_config.camera_id)
+
+
+class HeliosCameraCapabilities(StricterBaseModel):
+    """What the `HeliosInterface` has probed and learned about a camera.
+    Cached on disk per camera signature, so that reinitializing the
+    camera (after camera errors, the night or config changes) does not
+    have to probe all exposures again."""
+
+    available_exposures: list[int]
+    resolution: tuple[int, int]  # (width, height) delivered by the camera
+    last_good_exposure: int
+    exposure_brightness_slope: float
+    target_pixel_brightness: int  # target of the last autoexposure
+    last_autoexposure_time: float
+    # camera settings of the last autoexposure, it is only reused with the same settings
+    camera_brightness: Optional[int] = None
+    camera_contrast: Optional[int] = None
+
+    @staticmethod
+    def get_signature(helios_config: types.config.HeliosConfig) -> str:
+        """Identifies the camera: the backend, the camera id or source and
+        (on Linux) the name of the video device, so that the cache is not
+        used when another camera model has been plugged in.
+
+        On Windows, there is no device name and the signature is only the
+        camera id. Another camera model is detected when revalidating the
+        cached capabilities instead: its resolution or exposure range
+        differs (see `HeliosInterface._validate_capabilities`)."""
+
+        if helios_config.camera_backend != "opencv":
+            return f"{helios_config.camera_backend}:{helios_config.camera_source}"
+        device_name = ""
+        device_name_path = f"/sys/class/video4linux/video{helios_config.camera_id}/name"
+        if os.path.isfile(device_name_path):
+            with open(device_name_path) as f:
+                device_name = f.read().strip()
+        return f"opencv:{helios_config.camera_id}:{device_name}"
+
+    @staticmethod
+    def load(
+        signature: str, path: str = HELIOS_CAMERA_CAPABILITIES_PATH
+    ) -> Optional["HeliosCameraCapabilities"]:
+        """Return the cached capabilities of the camera, None if there are
+        none or the cache file is invalid."""
+
+        try:
+            with open(path) as f:
+                cache = _HeliosCameraCapabilitiesCache.model_validate_json(f.read())
+        except (OSError, pydantic.ValidationError):
+            return None
+        return cache.cameras.get(signature)
+
+    def save(self, signature: str, path: str = HELIOS_CAMERA_CAPABILITIES_PATH) -> None:
+        """Update the cache entry of the camera. The file is replaced
+        atomically, the entries of other cameras are kept."""
+
+        cache = _HeliosCameraCapabilitiesCache(cameras={})
+        try:
+            with open(path) as f:
+                cache = _HeliosCameraCapabilitiesCache.model_validate_json(f.read())
+        except (OSError, pydantic.ValidationError):
+            pass
+        cache.cameras[signature] = self
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(cache.model_dump_json(indent=4))
+        os.replace(tmp_path, path)
+
+
+class _HeliosCameraCapabilitiesCache(StricterBaseModel):
+    cameras: dict[str, HeliosCameraCapabilities]
+
+
+class _SimulatedHeliosCamera(abc.ABC):
+    """Behaves like a webcam: it delivers frames at `frames_per_second`
+    (as fast as possible if None), only accepts the `SIMULATED_EXPOSURES`
+    and scales the brightness of the scene by two for every exposure step."""
+
+    def __init__(self, frames_per_second: Optional[float]) -> None:
+        self.frames_per_second = frames_per_second
+        self.last_read_time: float = 0.0
+        self.is_open: bool = True
+        self.properties: dict[int, float] = {
+            cv.CAP_PROP_EXPOSURE: float(_FILE_CAMERA_REFERENCE_EXPOSURE),
+            cv.CAP_PROP_FRAME_WIDTH: 1280.0,
+            cv.CAP_PROP_FRAME_HEIGHT: 720.0,
+        }
+
+    @abc.abstractmethod
+    def _get_scene(self, width: int, height: int) -> np.ndarray[Any, Any]:
+        """Return the next scene as a float32 BGR frame, at the reference exposure."""
+
+    def isOpened(self) -> bool:
+        return self.is_open
+
+    def read(self) -> tuple[bool, Any]:
+        if not self.is_open:
+            return False, None
+        if self.frames_per_second is not None:
+            time.sleep(max(0, self.last_read_time + (1 / self.frames_per_second) - time.time()))
+        self.last_read_time = time.time()
+        scene = self._get_scene(
+            int(self.properties[cv.CAP_PROP_FRAME_WIDTH]),
+            int(self.properties[cv.CAP_PROP_FRAME_HEIGHT]),
+        )
+        exposure = self.properties[cv.CAP_PROP_EXPOSURE]
+        scene *= 2 ** (exposure - _FILE_CAMERA_REFERENCE_EXPOSURE)
+        return True, np.clip(scene, 0, 255).astype(np.uint8)
+
+    def set(self, propId: int, value: float) -> bool:
+        if (propId == cv.CAP_PROP_EXPOSURE) and (value not in SIMULATED_EXPOSURES):
+            return False
+        self.properties[propId] = float(value)
+        return True
+
+    def get(self, propId: int) -> float:
+        return self.properties.get(propId, 0.0)
+
+    def release(self) -> None:
+        self.is_open = False
+
+
+class FileHeliosCamera(_SimulatedHeliosCamera):
+    """Replays the images in a directory (in alphabetical order) or the
+    frames of a video file in an endless loop. The images are taken as
+    being shot at an exposure of -7."""
+
+    def __init__(self, source: str, frames_per_second: Optional[float] = 30) -> None:
+        super().__init__(frames_per_second)
+        self.image_paths: list[str] = []
+        self.video: Optional[cv.VideoCapture] = None
+        self.image_index: int = 0
+        if os.path.isdir(source):
+            self.image_paths = sorted(
+                p
+                for p in glob.glob(os.path.join(source, "*"))
+                if p.lower().endswith(_IMAGE_FILE_EXTENSIONS)
+            )
+            self.is_open = len(self.image_paths) > 0
+        else:
+            self.video = cv.VideoCapture(source)
+            self.is_open = self.video.isOpened()
+
+    def _get_scene(self, width: int, height: int) -> np.ndarray[Any, Any]:
+        frame: Any = None
+        if self.video is not None:
+            ret, frame = self.video.read()
+            if not ret:
+                self.video.set(cv.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.video.read()
+            assert ret, "could not read from the video file"
+        else:
+            frame = cv.imread(self.image_paths[self.image_index % len(self.image_paths)])
+            self.image_index += 1
+        scene: np.ndarray[Any, Any] = np.asarray(frame, dtype=np.float32)
+        if (scene.shape[1], scene.shape[0]) != (width, height):
+            scene = np.asarray(cv.resize(scene, (width, height)))
+        return scene
+
+    def release(self) -> None:
+        super().release()
+        if self.video is not None:
+            self.video.release()
+
+
+class SyntheticHeliosCamera(_SimulatedHeliosCamera):
+    """Generates frames of a bright lense on a dark background with
+    shadows drifting over it. The shadows vanish for the second half of
+    every `period` frames (like a cloud passing by), by default 5 minutes
+    at 30 frames per second."""
+
+    def __init__(
+        self,
+        frames_per_second: Optional[float] = 30,
+        period: int = 9000,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(frames_per_second)
+        self.period = period
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.frame_number: int = 0
+        self.background: Optional[np.ndarray[Any, Any]] = None
+
+    def _get_scene(self, width: int, height: int) -> np.ndarray[Any, Any]:
+        if (self.background is None) or (self.background.shape[:2] != (height, width)):
+            yy, xx = np.ogrid[:height, :width]
+            radius = 0.42 * min(width, height)
+            inside = ((yy - height / 2) ** 2 + (xx - width / 2) ** 2) <= radius**2
+            self.background = np.where(inside, 90.0, 10.0).astype(np.float32)
+
+        scene: np.ndarray[Any, Any] = self.background.copy()
+        if (self.frame_number % self.period) < (self.period / 2):
+            offset = self.frame_number % width
+            for x, y in [(0.35, 0.3), (0.5, 0.55), (0.6, 0.35)]:
+                x0 = int(x * width + offset) % width
+                y0 = int(y * height)
+                scene[y0 : y0 + height // 6, x0 : x0 + width // 40] *= 0.4
+        self.frame_number += 1
+        noise: np.ndarray[Any, Any] = self.rng.standard_normal((height, width), dtype=np.float32)
+        return np.repeat((scene + noise * 1.5)[:, :, None], 3, axis=2)
@@ -1,60 +1,583 @@
 from __future__ import annotations
 
+import atexit
 import contextlib
 import datetime
+import json
+import mmap
 import os
+import struct
+import threading
 import time
+import zlib
+import psutil
 import pydantic
-import tum_esm_utils.sqlitelock
-from typing import Generator
+from typing import Any, Generator, Optional
 
 from packages.core import types, utils
 
 _dir = os.path.dirname
 _PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
-_STATE_FILE_PATH = os.path.join(_PROJECT_DIR, "logs", "state.json")
+STATE_FILE_PATH = os.path.join(_PROJECT_DIR, "logs", "state.json")
 
-# shared lock file based on SQLite
-STATE_LOCK_PATH = os.path.join(_PROJECT_DIR, "logs", "state.sqlitelock")
+# patches that have not been compacted into the state file yet
+STATE_JOURNAL_PATH = os.path.join(_PROJECT_DIR, "logs", "state.journal")
+
+# lock file shared by all threads and processes accessing the state files
+STATE_LOCK_PATH = os.path.join(_PROJECT_DIR, "logs", "state.lock")
 STATE_LOCK_TIMEOUT = 20
-STATE_LOCK_POLL_INTERVAL = 0.2
+
+# how long the in-memory store collects updates before writing them to disk
+STATE_WRITE_BEHIND_DELAY = 0.5
+
+# how often the journal is compacted into the state file; readers that
+# need the current state use the snapshot (e.g. the UI via `state get`)
+STATE_COMPACTION_INTERVAL = 5
+STATE_JOURNAL_MAX_SIZE = 256 * 1024
+
+# a patch sets the value at a path in the JSON representation of the state
+StatePatch = tuple[tuple[str, ...], Any]
+
+# snapshot of the in-memory state published by Pyra Core for lock-free readers
+STATE_SNAPSHOT_PATH = os.path.join(_PROJECT_DIR, "logs", "state.snapshot")
+STATE_SNAPSHOT_SIZE = 1024 * 1024
+STATE_SNAPSHOT_READ_TRIES = 50
+
+# magic, format version, pid of the writer, sequence number (odd while the
+# snapshot is being written), state version, length and CRC32 of the JSON payload
+_SNAPSHOT_HEADER = struct.Struct("<8sIIQQQI")
+_SNAPSHOT_MAGIC = b"PYRASNAP"
+_SNAPSHOT_FORMAT_VERSION = 2
+_SNAPSHOT_PAYLOAD_OFFSET = 64
+
+
+def _get_file_signature(path: str) -> Optional[tuple[int, int]]:
+    """Return (modification time in ns, size in bytes) of a file
+    or None if the file does not exist."""
+
+    try:
+        s = os.stat(path)
+        return (s.st_mtime_ns, s.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def _get_state_files_signature() -> tuple[Optional[tuple[int, int]], ...]:
+    return (
+        _get_file_signature(STATE_FILE_PATH),
+        _get_file_signature(STATE_JOURNAL_PATH),
+    )
+
+
+def _get_state_files_version() -> int:
+    """The state version outside of Pyra Core: the latest modification
+    time of the state file and the journal in microseconds."""
+
+    return max(
+        [0] + [s[0] // 1000 for s in _get_state_files_signature() if s is not None],
+    )
+
+
+def _diff_json(before: Any, after: Any, path: tuple[str, ...]) -> list[StatePatch]:
+    """Return the patches that turn `before` into `after`. Objects with
+    the same keys are compared key by key, all other values (including
+    lists) are replaced as a whole."""
+
+    if isinstance(before, dict) and isinstance(after, dict):
+        if before.keys() == after.keys():  # pyright: ignore[reportUnknownMemberType]
+            patches: list[StatePatch] = []
+            for key in after.keys():  # pyright: ignore[reportUnknownVariableType]
+                patches += _diff_json(before[key], after[key], (*path, str(key)))  # pyright: ignore[reportUnknownArgumentType]
+            return patches
+    if before == after:
+        return []
+    return [(path, after)]
+
+
+def _apply_patches(content: dict[str, Any], patches: list[StatePatch]) -> None:
+    """Apply patches to the JSON representation of the state in place."""
+
+    for path, value in patches:
+        d = content
+        for key in path[:-1]:
+            if not isinstance(d.get(key), dict):
+                d[key] = {}
+            d = d[key]
+        d[path[-1]] = value
+
+
+def _read_journal() -> list[StatePatch]:
+    """Read all patches from the journal. An incomplete last line
+    (from a crash while appending) is ignored."""
+
+    patches: list[StatePatch] = []
+    try:
+        with open(STATE_JOURNAL_PATH, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    patches += [(tuple(p), v) for p, v in entry["patches"]]
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return patches
+
+
+def _write_state_file(state: types.StateObject) -> None:
+    """Write the whole state to the state file and remove the journal,
+    its patches are contained in the state file now."""
+
+    with open(STATE_FILE_PATH, "w") as f:
+        f.write(state.model_dump_json(indent=4))
+        f.flush()
+    if os.path.exists(STATE_JOURNAL_PATH):
+        os.remove(STATE_JOURNAL_PATH)
+
+
+def _load_state_file(logger: utils.Logger, repair: bool = True) -> types.StateObject:
+    """Load the state from the state file and apply the patches from the
+    journal on top of it. Creates a new state file if it does not exist
+    or is invalid - unless `repair` is False, then only a new state object
+    is returned."""
+
+    try:
+        with open(STATE_FILE_PATH, "r") as f:
+            content = json.load(f)
+        _apply_patches(content, _read_journal())
+        state = types.StateObject.model_validate(content)
+    except (
+        FileNotFoundError,
+        json.JSONDecodeError,
+        pydantic.ValidationError,
+        UnicodeDecodeError,
+    ) as e:
+        state = types.StateObject(last_updated=datetime.datetime.now())
+        if repair:
+            logger.warning(f"Could not load state file - Creating new one: {e}")
+            _write_state_file(state)
+        else:
+            logger.warning(f"Could not load state file - Using an empty state: {e}")
+    return state
+
+
+class _StateSnapshotWriter:
+    """Publishes the JSON of the state into a memory-mapped file, so that
+    other processes can read the current state without taking the state
+    lock, without the journal and without validating anything.
+
+    Works like a seqlock: the sequence number is odd while the payload is
+    being written. Readers retry when the sequence number is odd or has
+    changed while they copied the payload; the CRC32 catches torn reads
+    the sequence number misses. There must only be one writer."""
+
+    def __init__(self, path: str) -> None:
+        self.sequence: int = 0
+        with open(path, "a+b") as f:
+            if os.path.getsize(path) != STATE_SNAPSHOT_SIZE:
+                f.truncate(STATE_SNAPSHOT_SIZE)
+            self.mmap = mmap.mmap(f.fileno(), STATE_SNAPSHOT_SIZE)
+        self.reported_oversize: bool = False
+
+    def _write(self, payload: bytes, pid: int, state_version: int) -> None:
+        self.sequence += 1
+        self.mmap[: _SNAPSHOT_HEADER.size] = _SNAPSHOT_HEADER.pack(
+            _SNAPSHOT_MAGIC, _SNAPSHOT_FORMAT_VERSION, pid, self.sequence, 0, 0, 0
+        )
+        self.mmap[_SNAPSHOT_PAYLOAD_OFFSET : _SNAPSHOT_PAYLOAD_OFFSET + len(payload)] = payload
+        self.sequence += 1
+        self.mmap[: _SNAPSHOT_HEADER.size] = _SNAPSHOT_HEADER.pack(
+            _SNAPSHOT_MAGIC,
+            _SNAPSHOT_FORMAT_VERSION,
+            pid,
+            self.sequence,
+            state_version,
+            len(payload),
+            zlib.crc32(payload),
+        )
+
+    def publish(self, state: types.StateObject, state_version: int, logger: utils.Logger) -> None:
+        payload = state.model_dump_json().encode()
+        if len(payload) > (STATE_SNAPSHOT_SIZE - _SNAPSHOT_PAYLOAD_OFFSET):
+            # readers fall back to the state file
+            if not self.reported_oversize:
+                logger.warning(f"State is too large for the snapshot ({len(payload)} bytes)")
+                self.reported_oversize = True
+            self._write(b"", pid=0, state_version=0)
+            return
+        self._write(payload, pid=os.getpid(), state_version=state_version)
+
+    def close(self) -> None:
+        """Mark the snapshot as unavailable, readers use the state file again."""
+
+        self._write(b"", pid=0, state_version=0)
+        self.mmap.close()
+
+
+def _read_state_snapshot(
+    path: str, if_newer_than: Optional[int] = None
+) -> Optional[tuple[int, Optional[str]]]:
+    """Read the state version and the state JSON from the snapshot without
+    any lock. The JSON is None if the version is not newer than
+    `if_newer_than`, the payload is not even copied then. Returns None if
+    there is no snapshot, its writer is not running anymore or no
+    consistent read was possible."""
+
+    try:
+        with open(path, "rb") as f:
+            if os.path.getsize(path) <= _SNAPSHOT_PAYLOAD_OFFSET:
+                return None
+            snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        for i in range(STATE_SNAPSHOT_READ_TRIES):
+            magic, format_version, pid, sequence, state_version, length, crc = (
+                _SNAPSHOT_HEADER.unpack(snapshot[: _SNAPSHOT_HEADER.size])
+            )
+            if (magic != _SNAPSHOT_MAGIC) or (format_version != _SNAPSHOT_FORMAT_VERSION):
+                return None
+            if sequence % 2 == 0:
+                if (length == 0) or (pid == 0) or (not psutil.pid_exists(pid)):
+                    return None
+                if (if_newer_than is not None) and (state_version <= if_newer_than):
+                    return state_version, None
+                payload = snapshot[_SNAPSHOT_PAYLOAD_OFFSET : _SNAPSHOT_PAYLOAD_OFFSET + length]
+                if (_SNAPSHOT_HEADER.unpack(snapshot[: _SNAPSHOT_HEADER.size])[3] == sequence) and (
+                    zlib.crc32(payload) == crc
+                ):
+                    return state_version, payload.decode()
+            # torn read: the writer is in the middle of an update
+            time.sleep(0 if i < 10 else 0.001)
+        return None
+    finally:
+        snapshot.close()
+
+
+def _get_changed_fields(before: types.StateObject, after: types.StateObject) -> list[str]:
+    return [
+        field_name
+        for field_name in types.StateObject.model_fields.keys()
+        if getattr(before, field_name) != getattr(after, field_name)
+    ]
+
+
+def _publish_state_changes(changed_fields: list[str]) -> None:
+    """Wake up the threads waiting for changes of these state fields."""
+
+    for field_name in changed_fields:
+        if field_name != "last_updated":
+            utils.EventBus.publish(f"state.{field_name}")
+
+
+class _InMemoryStateStore:
+    """Owns the state object inside the Pyra Core process.
+
+    Updates are applied to the in-memory object under a thread lock. The
+    paths changed by each update are recorded as patches and appended to
+    the journal by a background thread after collecting updates for
+    `STATE_WRITE_BEHIND_DELAY` seconds. Every `STATE_COMPACTION_INTERVAL`
+    seconds, the journal is compacted into the state file. The state file
+    keeps its format but can be up to `STATE_COMPACTION_INTERVAL` seconds
+    old, so the UI reads the state snapshot via `pyra-cli state get`.
+
+    Other processes (the CLI) might write to the state file in between.
+    This is detected via the modification time and size of the state file
+    and the journal. In that case, the files are loaded and the patches not
+    written to disk yet are applied on top of them.
+
+    After every flush, the current state is published as a snapshot for
+    lock-free readers (see `_StateSnapshotWriter`)."""
+
+    def __init__(self, logger: utils.Logger) -> None:
+        self.logger = logger
+        self.lock = threading.Lock()
+
+        state_lock = utils.InterProcessLock(
+            filepath=STATE_LOCK_PATH,
+            timeout=STATE_LOCK_TIMEOUT,
+        )
+        # the published state object is never mutated, `update_state`
+        # works on a copy and replaces it when the copy has changed
+        with state_lock:
+            self.state: types.StateObject = _load_state_file(logger)
+            # compact a journal left over from a previous run
+            if os.path.exists(STATE_JOURNAL_PATH):
+                _write_state_file(self.state)
+            self.files_signature = _get_state_files_signature()
+        self.pending_patches: dict[tuple[str, ...], Any] = {}
+        self.last_compaction_time: float = time.time()
+
+        # incremented on every change, starting at the current time in
+        # microseconds so that versions keep increasing across restarts
+        self.version: int = max(time.time_ns() // 1000, _get_state_files_version() + 1)
+        self.section_versions: dict[str, int] = {
+            field_name: self.version for field_name in types.StateObject.model_fields.keys()
+        }
+        self.is_flushing: bool = False
+
+        self.snapshot_writer: Optional[_StateSnapshotWriter] = None
+        self.published_state: Optional[types.StateObject] = None
+        try:
+            self.snapshot_writer = _StateSnapshotWriter(STATE_SNAPSHOT_PATH)
+            self.publish_snapshot()
+        except OSError as e:
+            logger.warning(f"Could not create the state snapshot: {repr(e)}")
+
+        self.dirty_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+
+    def get(self) -> types.StateObject:
+        """Return the current state object. Must be called with `self.lock` held.
+        The caller must not mutate the returned object."""
+
+        # the state lock is only ever acquired by the flushing thread, so
+        # changes from other processes are merged in the background
+        if (not self.is_flushing) and (_get_state_files_signature() != self.files_signature):
+            self.dirty_event.set()
+        return self.state
+
+    def commit(self, new_state: types.StateObject) -> list[str]:
+        """Publish a changed state object and record the changed paths.
+        Must be called with `self.lock` held. Returns the names of the
+        changed top-level fields."""
+
+        changed_fields = _get_changed_fields(self.state, new_state)
+        self._increment_version(changed_fields)
+        for field_name in changed_fields:
+            for path, value in _diff_json(
+                self.state.model_dump(mode="json", include={field_name})[field_name],
+                new_state.model_dump(mode="json", include={field_name})[field_name],
+                (field_name,),
+            ):
+                # keep the patches in the order of their last update
+                self.pending_patches.pop(path, None)
+                self.pending_patches[path] = value
+        self.state = new_state
+        self.dirty_event.set()
+        return changed_fields
+
+    def _increment_version(self, changed_fields: list[str]) -> None:
+        if len(changed_fields) > 0:
+            self.version += 1
+            for field_name in changed_fields:
+                self.section_versions[field_name] = self.version
+
+    def compaction_is_due(self) -> bool:
+        if (time.time() - self.last_compaction_time) >= STATE_COMPACTION_INTERVAL:
+            return True
+        journal_signature = _get_file_signature(STATE_JOURNAL_PATH)
+        return (journal_signature is not None) and (journal_signature[1] > STATE_JOURNAL_MAX_SIZE)
+
+    def flush(self, compact: bool = False) -> None:
+        """Merge changes from other processes into the in-memory state and
+        append the pending patches to the journal. The journal is compacted
+        into the state file instead when `compact` is set or when the
+        compaction is due."""
+
+        state_lock = utils.InterProcessLock(
+            filepath=STATE_LOCK_PATH,
+            timeout=STATE_LOCK_TIMEOUT,
+        )
+        with utils.LockMetrics.measure(state_lock, "state-file", "state-flush", self.logger):
+            with utils.LockMetrics.measure(self.lock, "state", "state-flush", self.logger):
+                if _get_state_files_signature() != self.files_signature:
+                    self.logger.debug("State file has been modified by another process")
+                    self._merge_external_state()
+
+                compact = compact or self.compaction_is_due()
+                journal_exists = self.files_signature[1] is not None
+                if (len(self.pending_patches) == 0) and not (compact and journal_exists):
+                    return
+
+                flushed_patches = self.pending_patches
+                self.pending_patches = {}
+                state = self.state
+                self.is_flushing = True
+
+            # the thread lock is not held while writing, so that the other
+            # threads can continue to update the in-memory state
+            try:
+                if compact:
+                    _write_state_file(state)
+                    self.last_compaction_time = time.time()
+                else:
+                    journal_line = json.dumps(
+                        {
+                            "timestamp": time.time(),
+                            "patches": [[list(p), v] for p, v in flushed_patches.items()],
+                        },
+                        separators=(",", ":"),
+                    )
+                    with open(STATE_JOURNAL_PATH, "a") as f:
+                        f.write(journal_line + "\n")
+            except Exception:
+                with self.lock:
+                    self.pending_patches = {**flushed_patches, **self.pending_patches}
+                raise
+            finally:
+                with self.lock:
+                    self.files_signature = _get_state_files_signature()
+                    self.is_flushing = False
+
+    def _merge_external_state(self) -> None:
+        """Load the state written by another process and apply the patches
+        not written to disk yet on top of it. Must be called with `self.lock`
+        and the state lock held."""
+
+        external_state = _load_state_file(self.logger)
+        if len(self.pending_patches) > 0:
+            content = external_state.model_dump(mode="json")
+            _apply_patches(content, list(self.pending_patches.items()))
+            external_state = types.StateObject.model_validate(content)
+        changed_fields = _get_changed_fields(self.state, external_state)
+        self._increment_version(changed_fields)
+        _publish_state_changes(changed_fields)
+        self.state = external_state
+        self.files_signature = _get_state_files_signature()
+
+    def publish_snapshot(self) -> None:
+        """Publish the current state if it has changed since the last
+        snapshot. Only called from one thread at a time."""
+
+        if self.snapshot_writer is None:
+            return
+        with self.lock:
+            state, version = self.state, self.version
+        if state is not self.published_state:
+            self.snapshot_writer.publish(state, version, self.logger)
+            self.published_state = state
+
+    def stop(self) -> None:
+        """Stop the flushing thread and write all pending patches
+        to the state file. Readers of the snapshot use the state
+        file from now on."""
+
+        self.stop_event.set()
+        self.dirty_event.set()
+        self.flush_thread.join()
+        self.flush(compact=True)
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.close()
+            self.snapshot_writer = None
+
+    def _flush_loop(self) -> None:
+        while not self.stop_event.is_set():
+            # while the journal exists, wake up at least once per compaction
+            # interval, so that the state file does not lag behind for long
+            if not self.dirty_event.wait(timeout=STATE_COMPACTION_INTERVAL):
+                if self.files_signature[1] is None:
+                    continue
+            if self.stop_event.is_set():
+                return
+            # collect more updates before writing to disk
+            time.sleep(STATE_WRITE_BEHIND_DELAY)
+            self.dirty_event.clear()
+            try:
+                self.flush()
+                self.publish_snapshot()
+            except Exception as e:
+                self.logger.error("Could not write state file")
+                self.logger.exception(e)
+                self.dirty_event.set()
+                time.sleep(5)
+
+
+_store: Optional[_InMemoryStateStore] = None
+_store_initialization_lock = threading.Lock()
 
 
 class StateInterface:
+    @staticmethod
+    def enable_in_memory_store(logger: utils.Logger) -> None:
+        """Keep the state in memory for the rest of the process lifetime.
+
+        Only Pyra Core should do this: it is the long running process doing
+        most of the state updates. Short-lived processes like the CLI read and
+        write the state file directly."""
+
+        global _store
+        with _store_initialization_lock:
+            if _store is None:
+                _store = _InMemoryStateStore(logger)
+                atexit.register(StateInterface.flush)
+
+    @staticmethod
+    def disable_in_memory_store() -> None:
+        """Write the in-memory state to the state file and read/write
+        the state file directly from now on."""
+
+        global _store
+        with _store_initialization_lock:
+            if _store is not None:
+                _store.stop()
+                _store = None
+
+    @staticmethod
+    def flush() -> None:
+        """Write pending updates of the in-memory store to the state file
+        and compact the journal."""
+
+        if _store is not None:
+            _store.flush(compact=True)
+
     @staticmethod
     def load_state(
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> types.StateObject:
-        """Load the state from the state file."""
+        """Load the state from the state file.
 
-        with state_lock:
-            return StateInterface._load_state_without_lock(logger)
+        When the in-memory store is enabled, this returns the current
+        snapshot without reading or validating anything. The returned object
+        is shared between threads and must not be mutated - use `update_state`
+        for that."""
+
+        if _store is not None:
+            with utils.LockMetrics.measure(_store.lock, "state", logger.origin, logger):
+                return _store.get()
+
+        with utils.LockMetrics.measure(state_lock, "state-file", logger.origin, logger):
+            return _load_state_file(logger, repair=False)
 
     @staticmethod
-    def _load_state_without_lock(
-        logger: utils.Logger,
-    ) -> types.StateObject:
-        """Load the state from the state file."""
+    def read_state_snapshot(
+        if_newer_than: Optional[int] = None,
+    ) -> Optional[tuple[int, Optional[str]]]:
+        """Return the version and the JSON of the state published by a
+        running Pyra Core, without taking the state lock and without
+        validating it. The JSON is None if the version is not newer than
+        `if_newer_than`. Returns None when Pyra Core is not running - use
+        `get_version` and `load_state` then."""
 
-        try:
-            with open(_STATE_FILE_PATH, "r") as f:
-                state = types.StateObject.model_validate_json(f.read())
-        except (
-            FileNotFoundError,
-            pydantic.ValidationError,
-            UnicodeDecodeError,
-        ) as e:
-            logger.warning(f"Could not load state file - Creating new one: {e}")
-            state = types.StateObject(last_updated=datetime.datetime.now())
-            with open(_STATE_FILE_PATH, "w") as f:
-                f.write(state.model_dump_json(indent=4))
-        return state
+        return _read_state_snapshot(STATE_SNAPSHOT_PATH, if_newer_than)
+
+    @staticmethod
+    def get_version(section: Optional[str] = None) -> int:
+        """Return a number that increases whenever the state changes, or
+        whenever the given section (a field of the `StateObject`) changes.
+        Does not lock, load or validate anything, so callers can skip
+        loading the state when the version they have seen is still current.
+
+        With the in-memory store, this is the version of the store (which
+        is published with the snapshot). Otherwise, it is derived from
+        the modification times of the state files and covers all sections."""
+
+        if _store is not None:
+            with _store.lock:
+                _store.get()  # schedules merging changes of other processes
+                if section is None:
+                    return _store.version
+                return _store.section_versions[section]
+        return _get_state_files_version()
 
     @staticmethod
     @contextlib.contextmanager
     def update_state(
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> Generator[types.StateObject, None, None]:
         """Update the state file in a context manager.
@@ -67,11 +590,29 @@ class StateInterface:
         ```
 
         The file will be locked correctly, so that no other process can
-        interfere with the state file and the state
-        """
+        interfere with the state file and the state. With the in-memory
+        store enabled, only a thread lock is held while the block runs
+        and the changed paths are written in the background.
 
-        with state_lock:
-            state = StateInterface._load_state_without_lock(logger)
+        The time spent waiting for and holding the lock is recorded
+        per origin of the `logger` (see `utils.LockMetrics`)."""
+
+        if _store is not None:
+            with utils.LockMetrics.measure(_store.lock, "state", logger.origin, logger):
+                state_before = _store.get()
+                state = state_before.model_copy(deep=True)
+
+                yield state
+
+                changed_fields: list[str] = []
+                if state != state_before:
+                    state.last_updated = datetime.datetime.now()
+                    changed_fields = _store.commit(state)
+            _publish_state_changes(changed_fields)
+            return
+
+        with utils.LockMetrics.measure(state_lock, "state-file", logger.origin, logger):
+            state = _load_state_file(logger)
             state_before = state.model_copy(deep=True)
 
             yield state
@@ -79,7 +620,6 @@ class StateInterface:
             state_changed = state != state_before
             if state_changed:
                 state.last_updated = datetime.datetime.now()
-                with open(_STATE_FILE_PATH, "w") as f:
-                    f.write(state.model_dump_json(indent=4))
-                    f.flush()
-                time.sleep(0.05)  # ensure that the file is written before releasing the lock
+                _write_state_file(state)
+        if state_changed:
+            _publish_state_changes(_get_changed_fields(state_before, state))
@@ -1,19 +1,25 @@
 import os
 import sys
-import threading
 import time
+from typing import Optional
 
-import tum_esm_utils
 
 from packages.core import interfaces, threads, types, utils
 
 
 def _send_exception_emails(
-    state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+    state_lock: utils.InterProcessLock,
     logger: utils.Logger,
     config: types.Config,
-) -> None:
-    """Send emails on occured/resolved exceptions."""
+    handled_version: Optional[int] = None,
+) -> int:
+    """Send emails on occured/resolved exceptions. Returns the version of
+    the exceptions state that has been handled. Does not touch the state
+    when it is still at the `handled_version`."""
+
+    version = interfaces.StateInterface.get_version("exceptions_state")
+    if version == handled_version:
+        return version
 
     with interfaces.StateInterface.update_state(state_lock, logger) as s:
         current_exceptions = s.exceptions_state.current
@@ -32,6 +38,10 @@ def _send_exception_emails(
 
         s.exceptions_state.notified = s.exceptions_state.current
 
+    # updating `notified` increments the version, the next call
+    # finds nothing to do and returns the incremented version
+    return version
+
 
 def run() -> None:
     """The entrypoint of PYRA Core.
@@ -40,16 +50,17 @@ def run() -> None:
     and stopping the different threads, and sendinging out emails on occured
     and resolved exceptions. The actual work is done by the threads."""
 
-    logs_lock = threading.Lock()
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
 
-    logger = utils.Logger(origin="main", lock=logs_lock, main_thread=True)
+    logger = utils.Logger(origin="main", main_thread=True)
     logger.info(f"Starting mainloop inside process with process ID {os.getpid()}")
 
+    # all threads of this process share the state object in memory
+    interfaces.StateInterface.enable_in_memory_store(logger)
+
     # Loop until a valid config has been found. Without
     # an invalid config, the mainloop cannot initialize
     while True:
@@ -88,26 +99,30 @@ def run() -> None:
     # load the config periodically and stop themselves
     logger.info("Initializing threads")
     thread_instances: list[threads.abstract_thread.AbstractThread] = [
-        threads.CamTrackerThread(logs_lock),
-        threads.CASThread(logs_lock),
-        threads.HeliosThread(logs_lock),
-        threads.OpusThread(logs_lock),
-        threads.SystemMonitorThread(logs_lock),
-        threads.TUMEnclosureThread(logs_lock),
-        threads.AEMETEnclosureThread(logs_lock),
-        threads.UploadThread(logs_lock),
+        threads.CamTrackerThread(),
+        threads.CASThread(),
+        threads.HeliosThread(),
+        threads.OpusThread(),
+        threads.SystemMonitorThread(),
+        threads.TUMEnclosureThread(),
+        threads.AEMETEnclosureThread(),
+        threads.UploadThread(),
     ]
 
     logger.info("Removing temporary state from previous runs")
     with interfaces.StateInterface.update_state(state_lock, logger) as s:
         s.reset()
 
+    previous_config_version = types.Config.get_version()
+    exceptions_state_version: Optional[int] = None
+
     while True:
         start_time = time.time()
         logger.debug("Starting iteration")
 
         # load config at the beginning of each mainloop iteration
         try:
+            config_version = types.Config.get_version()
             config = types.Config.load()
         except ValueError as e:
             logger.error(
@@ -121,6 +136,11 @@ def run() -> None:
             time.sleep(10)
             continue
 
+        # wake up the threads waiting for config changes
+        if config_version != previous_config_version:
+            utils.EventBus.publish("config")
+            previous_config_version = config_version
+
         try:
             # check whether the threads are running and possibly (re)start them
             thread_states: list[bool] = []
@@ -135,7 +155,12 @@ def run() -> None:
                 time.sleep(0.1)  # for the tests to work
 
             # send emails on occured/resolved exceptions
-            _send_exception_emails(state_lock, logger, config)
+            exceptions_state_version = _send_exception_emails(
+                state_lock, logger, config, exceptions_state_version
+            )
+
+            # publish how long the threads wait for and hold the shared locks
+            utils.LockMetrics.write()
 
             # wait rest of loop time
             logger.debug("Finished iteration")
@@ -143,7 +168,10 @@ def run() -> None:
             time_to_wait = config.general.seconds_per_core_iteration - elapsed_time
             if time_to_wait > 0:
                 logger.debug(f"Waiting {round(time_to_wait, 2)} second(s)")
-                time.sleep(time_to_wait)
+                # start the next iteration early when the config changes, so
+                # that threads are started/stopped without waiting for the timer
+                if types.Config.wait_for_change(config_version, timeout=time_to_wait):
+                    logger.info("Config has changed, starting next iteration early")
 
         except Exception as e:
             logger.exception(e)
@@ -1,4 +1,5 @@
 from . import abstract_thread as abstract_thread
+from . import helios_replay as helios_replay
 from .camtracker_thread import CamTrackerThread as CamTrackerThread
 from .cas_thread import CASThread as CASThread
 from .helios_thread import HeliosThread as HeliosThread
@@ -5,16 +5,17 @@ from typing import Optional
 
 from packages.core import types, utils
 
+# how long `update_thread_state` waits for a thread to stop. If it
+# takes longer, the mainloop checks again in its next iteration
+THREAD_STOP_TIMEOUT = 5
+
 
 class AbstractThread(abc.ABC):
     """Abstract base class for all threads"""
 
     logger_origin: Optional[str] = None
 
-    def __init__(
-        self,
-        logs_lock: threading.Lock,
-    ) -> None:
+    def __init__(self) -> None:
         """Initialize the thread instance. This does not start the
         thread but only initializes the instance that triggers the
         thread to start and stop correctly."""
@@ -22,13 +23,51 @@ class AbstractThread(abc.ABC):
         assert self.__class__.logger_origin is not None
         self.logger: utils.Logger = utils.Logger(
             origin=self.__class__.logger_origin,
-            lock=logs_lock,
         )
+        self.stop_event = threading.Event()
         self.thread = self.get_new_thread_object(
-            logs_lock=logs_lock,
+            stop_event=self.stop_event,
         )
         self.thread_start_time: Optional[float] = None
-        self.logs_lock: threading.Lock = logs_lock
+
+        # time between requesting the thread to stop and the thread
+        # having stopped, i.e. the latency of config-driven restarts
+        self.stop_request_time: Optional[float] = None
+        self.last_shutdown_latency: Optional[float] = None
+
+    def _reset_thread_object(self) -> None:
+        """Set up a new thread instance for the next time the thread should start."""
+
+        self.stop_event = threading.Event()
+        self.thread = self.get_new_thread_object(
+            stop_event=self.stop_event,
+        )
+        self.thread_start_time = None
+        self.stop_request_time = None
+
+    def stop(self, timeout: float = THREAD_STOP_TIMEOUT) -> bool:
+        """Request the thread to stop and wait at most `timeout` seconds
+        for it. Returns True if the thread has stopped."""
+
+        if self.stop_request_time is None:
+            self.stop_request_time = time.time()
+            utils.EventBus.notify_stop(self.stop_event)
+
+        self.thread.join(timeout=timeout)
+        if self.thread.is_alive():
+            self.logger.warning(
+                f"Thread has not stopped {time.time() - self.stop_request_time:.2f} "
+                + "seconds after requesting it to stop"
+            )
+            return False
+
+        self.last_shutdown_latency = time.time() - self.stop_request_time
+        assert self.__class__.logger_origin is not None
+        utils.LockMetrics.record_thread_shutdown(
+            self.__class__.logger_origin, self.last_shutdown_latency
+        )
+        self.logger.info(f"Thread has stopped, shutdown latency: {self.last_shutdown_latency:.3f}s")
+        return True
 
     def update_thread_state(
         self,
@@ -45,6 +84,12 @@ class AbstractThread(abc.ABC):
         should_be_running: bool = self.__class__.should_be_running(config, self.logger)
 
         if should_be_running:
+            if self.stop_request_time is not None:
+                # the thread has been requested to stop in a previous
+                # iteration, it is started again once it has stopped
+                if self.stop():
+                    self._reset_thread_object()
+                return False
             if self.thread_start_time is not None:
                 if self.thread.is_alive():
                     self.logger.debug("Thread is running correctly")
@@ -54,9 +99,7 @@ class AbstractThread(abc.ABC):
                     if (now - self.thread_start_time) <= 43080:  # 43200 seconds = 12 hours
                         self.logger.debug("Thread has crashed/stopped, running teardown")
                     self.thread.join()
-                    self.thread_start_time = None
-                    # set up a new thread instance for the next time the thread should start
-                    self.thread = self.get_new_thread_object(logs_lock=self.logs_lock)
+                    self._reset_thread_object()
             else:
                 self.logger.debug("Starting the thread")
                 self.thread.start()
@@ -64,10 +107,9 @@ class AbstractThread(abc.ABC):
 
         else:
             if self.thread_start_time is not None:
-                self.logger.debug("Joining the thread")
-                self.thread.join()
-                self.thread = self.get_new_thread_object(logs_lock=self.logs_lock)
-                self.thread_start_time = None
+                self.logger.debug("Stopping the thread")
+                if self.stop():
+                    self._reset_thread_object()
             else:
                 self.logger.debug("Thread is pausing")
                 return True
@@ -85,15 +127,18 @@ class AbstractThread(abc.ABC):
     @staticmethod
     @abc.abstractmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
 
     @staticmethod
     @abc.abstractmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
-        don't write to log files but print to console."""
+        don't write to log files but print to console.
+
+        The thread has to return soon after `stop_event` has been
+        set, so all waiting should be done with `stop_event.wait`."""
@@ -30,7 +30,7 @@ class CamTrackerProgram:
     @staticmethod
     def start(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         """Starts the OPUS.exe with os.startfile()."""
@@ -189,31 +189,32 @@ class CamTrackerThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=CamTrackerThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread."""
 
-        logger = utils.Logger(origin="camtracker", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="camtracker", just_print=headless)
         logger.info("Starting CamTracker thread")
         last_camtracker_start_time: Optional[float] = None
         thread_start_time = time.time()
+        # instead of sleeping for the whole iteration time, wake up when these events happen
+        subscription = utils.EventBus.subscribe("config", "state.measurements_should_be_running")
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         # STOP CAMTRACKER IF IT IS RUNNING
@@ -240,7 +241,8 @@ class CamTrackerThread(AbstractThread):
 
                 if config.general.test_mode:
                     logger.info("CamTracker thread is skipped in test mode")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 # RESOLVE COVER CLOSED WARNING WHEN IT IS RAINING
@@ -297,7 +299,8 @@ class CamTrackerThread(AbstractThread):
                                 logger.warning(
                                     "CamTracker motor offsets are zero, waiting 30 seconds to confirm this state."
                                 )
-                                time.sleep(30)
+                                if stop_event.wait(30):
+                                    return
                                 result_after_waiting = (
                                     CamTrackerThread.check_tracker_motor_positions(config, logger)
                                 )
@@ -326,7 +329,8 @@ class CamTrackerThread(AbstractThread):
                         ):
                             t1 = time.time()
                             while True:
-                                time.sleep(5)
+                                if stop_event.wait(5):
+                                    return
                                 state = interfaces.StateInterface.load_state(state_lock, logger)
 
                                 # if rain detected in last 3 minutes -> cover can be closed
@@ -401,7 +405,11 @@ class CamTrackerThread(AbstractThread):
                 t2 = time.time()
                 sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                 logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
+                events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                if stop_event.is_set():
+                    return
+                if len(events) > 0:
+                    logger.debug(f"Woken up by event(s): {', '.join(events)}")
 
             except Exception as e:
                 logger.exception(e)
@@ -409,7 +417,8 @@ class CamTrackerThread(AbstractThread):
                 with interfaces.StateInterface.update_state(state_lock, logger) as s:
                     s.exceptions_state.add_exception(origin="camtracker", exception=e)
                 logger.info("Sleeping 2 minutes")
-                time.sleep(120)
+                if stop_event.wait(120):
+                    return
                 logger.info("Stopping thread")
                 break
 
@@ -454,7 +463,7 @@ class CamTrackerThread(AbstractThread):
     @staticmethod
     def get_enclosure_cover_state(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> Literal["not configured", "angle not reported", "open", "closed"]:
         """Checks whether the TUM PLC cover is open or closed. Returns
@@ -488,7 +497,7 @@ class CamTrackerThread(AbstractThread):
     @staticmethod
     def test_setup(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         """Function to test the functonality of this module. Starts up
@@ -2,7 +2,6 @@ import datetime
 import threading
 import time
 
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
@@ -27,34 +26,35 @@ class CASThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=CASThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="cas", lock=logs_lock)
+        logger = utils.Logger(origin="cas")
         logger.info("Starting Condition Assessment System (CAS) thread.")
         last_good_automatic_decision: float = 0
         last_bad_weather_detection: float = 0
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
         thread_start_time = time.time()
+        # instead of sleeping for the whole iteration time, wake up when these events happen
+        subscription = utils.EventBus.subscribe("config", "state.helios_indicates_good_conditions")
 
         while True:
             try:
@@ -164,7 +164,11 @@ class CASThread(AbstractThread):
                 t2 = time.time()
                 sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                 logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
+                events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                if stop_event.is_set():
+                    return
+                if len(events) > 0:
+                    logger.debug(f"Woken up by event(s): {', '.join(events)}")
 
             except Exception as e:
                 logger.exception(e)
@@ -185,18 +189,20 @@ class CASThread(AbstractThread):
 
         logger.debug("Evaluating automatic decision")
 
+        # the config object is shared between threads, so it is not modified here
         triggers = config.measurement_triggers
+        consider_helios = triggers.consider_helios
         if config.helios is None:
-            if triggers.consider_helios:
+            if consider_helios:
                 logger.warning("Helios is not configured, but is set as a trigger.")
-            triggers.consider_helios = False
+            consider_helios = False
 
         # If not triggers are considered during automatic mode return False
         if not any(
             [
                 triggers.consider_sun_elevation,
                 triggers.consider_time,
-                triggers.consider_helios,
+                consider_helios,
             ]
         ):
             logger.warning("No triggers are activated. This might be a mistake.")
@@ -230,7 +236,7 @@ class CASThread(AbstractThread):
 
         # Read latest Helios decision from StateInterface if trigger is active
         # Helios runs in a thread and evaluates the sun conditions consistanly during day.
-        if triggers.consider_helios:
+        if consider_helios:
             logger.debug("Helios as a trigger is considered.")
             helios_result = state.helios_indicates_good_conditions
 
@@ -2,7 +2,6 @@ import threading
 import time
 from typing import Literal, Optional
 
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
@@ -21,33 +20,34 @@ class AEMETEnclosureThread(AbstractThread):
         return config.aemet_enclosure is not None
 
     @staticmethod
-    def get_new_thread_object(logs_lock: threading.Lock) -> threading.Thread:
+    def get_new_thread_object(stop_event: threading.Event) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=AEMETEnclosureThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
-    def main(logs_lock: threading.Lock, headless: bool = False) -> None:
+    def main(stop_event: threading.Event, headless: bool = False) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="aemet-enclosure", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="aemet-enclosure", just_print=headless)
         logger.info("Starting AEMET Enclosure thread")
 
         enclosure_interface: Optional[interfaces.AEMETEnclosureInterface] = None
 
         exception_was_set: Optional[bool] = None
         thread_start_time = time.time()
+        # instead of sleeping for the whole iteration time, wake up when these events happen
+        subscription = utils.EventBus.subscribe("config", "state.measurements_should_be_running")
         last_sun_evaluation_result_change: Optional[float] = time.time()
         cover_position_check: Literal["valid", "invalid-once", "invalid-persisting"] = "valid"
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         try:
@@ -71,7 +71,8 @@ class AEMETEnclosureThread(AbstractThread):
 
                 if config.general.test_mode:
                     logger.info("AEMET Enclosure thread is skipped in test mode")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 # SETTING UP INTERFACE
@@ -187,7 +188,8 @@ class AEMETEnclosureThread(AbstractThread):
                             logger.info(
                                 f"Enclosure has Averia fault code {enclosure_interface.state.averia_fault_code}, waiting for 90s to see whether it resolves itself."
                             )
-                            time.sleep(90)
+                            if stop_event.wait(90):
+                                return
                             new_code = enclosure_interface.read().averia_fault_code
                             if new_code not in [0, None]:
                                 raise interfaces.AEMETEnclosureInterface.DataloggerError(
@@ -305,14 +307,19 @@ class AEMETEnclosureThread(AbstractThread):
                     t2 = time.time()
                     sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                     logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                    time.sleep(sleep_time)
+                    events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                    if stop_event.is_set():
+                        return
+                    if len(events) > 0:
+                        logger.debug(f"Woken up by event(s): {', '.join(events)}")
 
                 except interfaces.AEMETEnclosureInterface.DataloggerError as e:
                     logger.error("Datalogger connection lost during interaction")
                     logger.exception(e)
                     enclosure_interface = None
                     logger.info("Waiting 60 seconds before retrying")
-                    time.sleep(60)
+                    if stop_event.wait(60):
+                        return
                     continue
 
         except Exception as e:
@@ -3,7 +3,6 @@ import threading
 import time
 from typing import Optional
 
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
@@ -26,24 +25,24 @@ class TUMEnclosureThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=TUMEnclosureThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="tum-enclosure", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="tum-enclosure", just_print=headless)
         logger.info("Starting TUM Enclosure thread")
 
         plc_interface: Optional[interfaces.TUMEnclosureInterface] = None
@@ -51,11 +50,12 @@ class TUMEnclosureThread(AbstractThread):
         last_camera_down_time: Optional[float] = None
         exception_was_set: Optional[bool] = None
         thread_start_time = time.time()
+        # instead of sleeping for the whole iteration time, wake up when these events happen
+        subscription = utils.EventBus.subscribe("config", "state.measurements_should_be_running")
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         try:
@@ -79,7 +79,8 @@ class TUMEnclosureThread(AbstractThread):
 
                 if config.general.test_mode:
                     logger.info("TUM Enclosure thread is skipped in test mode")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 # CONNECTING TO PLC
@@ -110,7 +111,8 @@ class TUMEnclosureThread(AbstractThread):
                                     )
                                 )
                         logger.info("Waiting 60 seconds before retrying")
-                        time.sleep(60)
+                        if stop_event.wait(60):
+                            return
                         continue
                 else:
                     plc_interface.update_config(
@@ -121,7 +123,8 @@ class TUMEnclosureThread(AbstractThread):
                         logger.error("PLC connection lost")
                         plc_interface = None
                         logger.info("Waiting 60 seconds before retrying")
-                        time.sleep(60)
+                        if stop_event.wait(60):
+                            return
                         continue
 
                 # UPDATING RECONNECTION STATE
@@ -147,7 +150,8 @@ class TUMEnclosureThread(AbstractThread):
 
                     if plc_state.state.rain:
                         if plc_state.actors.current_angle != 0:
-                            time.sleep(15)
+                            if stop_event.wait(15):
+                                return
                             if plc_interface.get_cover_angle() != 0:
                                 logger.warning("Rain detected, but cover is closed yet")
                                 exception_was_set = True
@@ -180,7 +184,11 @@ class TUMEnclosureThread(AbstractThread):
                         t2 = time.time()
                         sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                         logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                        time.sleep(sleep_time)
+                        events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                        if stop_event.is_set():
+                            return
+                        if len(events) > 0:
+                            logger.debug(f"Woken up by event(s): {', '.join(events)}")
                         continue
 
                     # RESETTING PLC
@@ -275,7 +283,8 @@ class TUMEnclosureThread(AbstractThread):
                                     TUMEnclosureThread.clear_plc_reset(
                                         plc_interface, state_lock, logger, timeout=30
                                     )
-                                    time.sleep(5)
+                                    if stop_event.wait(5):
+                                        return
                                     if plc_interface.get_cover_angle() == 0:
                                         plc_state.actors.current_angle = 0
                                         logger.info("Cover is closed now")
@@ -308,14 +317,19 @@ class TUMEnclosureThread(AbstractThread):
                     t2 = time.time()
                     sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                     logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                    time.sleep(sleep_time)
+                    events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                    if stop_event.is_set():
+                        return
+                    if len(events) > 0:
+                        logger.debug(f"Woken up by event(s): {', '.join(events)}")
 
                 except interfaces.TUMEnclosureInterface.PLCError as e:
                     logger.error("PLC connection lost during interaction")
                     logger.exception(e)
                     plc_interface = None
                     logger.info("Waiting 60 seconds before retrying")
-                    time.sleep(60)
+                    if stop_event.wait(60):
+                        return
                     continue
 
         except Exception as e:
@@ -326,7 +340,7 @@ class TUMEnclosureThread(AbstractThread):
     @staticmethod
     def clear_plc_reset(
         plc_interface: interfaces.TUMEnclosureInterface,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
         timeout: int = 180,
     ) -> None:
@@ -376,7 +390,7 @@ class TUMEnclosureThread(AbstractThread):
     @staticmethod
     def force_cover_close(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         """Force the cover to close by disabling syncing to tracker."""
@@ -0,0 +1,168 @@
+import concurrent.futures
+import datetime
+import functools
+import glob
+import os
+import re
+import time
+from typing import Any, Callable, Generator, Optional
+
+import cv2 as cv
+import numpy as np
+import pydantic
+from PIL import Image
+
+from packages.core import types, utils
+
+from .helios_thread import HeliosStateEvaluator, LenseFinder
+
+_dir = os.path.dirname
+_PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
+HELIOS_ARCHIVE_DIR = os.path.join(_PROJECT_DIR, "logs", "helios")
+
+# {station_id}-{%Y%m%d-%H%M%S}-{edge_fraction}-raw.jpg
+_RAW_IMAGE_NAME_PATTERN = re.compile(r"^.+-(\d{8}-\d{6})-[\d\.]+-raw\.jpg$")
+
+
+class HeliosReplayStep(pydantic.BaseModel):
+    """Result of replaying one archived image."""
+
+    time: datetime.datetime
+    lense: Optional[tuple[int, int, int]]
+    edge_fraction: float
+    edge_fraction_time: float  # seconds spent in `get_edge_fraction`
+    outcome: str
+    state: Optional[bool]
+
+
+class HeliosReplay:
+    """Re-run the Helios evaluation (`LenseFinder` -> `get_edge_fraction`
+    -> `HeliosStateEvaluator`) on the raw images that have been saved with
+    `save_images_to_archive`, e.g. to try out other thresholds.
+
+    Days are read from the daily `HeliosArchive` files (`%Y%m%d.helios`)
+    and from the daily JPEG directories (`%Y%m%d/`). The time of each JPEG
+    is taken from its file name. Every day starts
+    with an empty history and no lense position, like the Helios thread
+    after the night. The archived raw images have already been brightness
+    normalized, which does not change the edge fraction since the frames
+    are normalized again."""
+
+    @staticmethod
+    def get_days(day_or_month: str, archive_dir: str = HELIOS_ARCHIVE_DIR) -> list[str]:
+        """Return the archived days (`%Y%m%d`) starting with the given
+        `%Y%m%d` or `%Y%m` string."""
+
+        days: set[str] = set()
+        for path in glob.glob(os.path.join(archive_dir, f"{day_or_month}*")):
+            name = os.path.basename(path)
+            if os.path.isdir(path) and re.match(r"^\d{8}$", name):
+                days.add(name)
+            if os.path.isfile(path) and re.match(r"^\d{8}\.helios$", name):
+                days.add(name[:8])
+        return sorted(days)
+
+    @staticmethod
+    def replay_day(
+        day: str,
+        helios_config: types.config.HeliosConfig,
+        archive_dir: str = HELIOS_ARCHIVE_DIR,
+    ) -> list[HeliosReplayStep]:
+        """Replay the raw images of one day in chronological order."""
+
+        # (time, function loading the RGB frame)
+        images: list[tuple[datetime.datetime, Callable[[], np.ndarray[Any, Any]]]] = []
+        for path in glob.glob(os.path.join(archive_dir, day, "*-raw.jpg")):
+            m = _RAW_IMAGE_NAME_PATTERN.match(os.path.basename(path))
+            if m is not None:
+                images.append(
+                    (
+                        datetime.datetime.strptime(m.group(1), "%Y%m%d-%H%M%S"),
+                        functools.partial(HeliosReplay._load_image, path),
+                    )
+                )
+        archive_path = os.path.join(archive_dir, f"{day}.helios")
+        for record in utils.HeliosArchive.iterate(archive_path):
+            images.append(
+                (
+                    record.metadata.time,
+                    functools.partial(
+                        HeliosReplay._load_archive_record, archive_path, record.offset
+                    ),
+                )
+            )
+        images.sort(key=lambda image: image[0])
+
+        lense_finder = LenseFinder()
+        evaluator = HeliosStateEvaluator(helios_config.evaluation_size)
+        steps: list[HeliosReplayStep] = []
+        for image_time, load_frame in images:
+            rgb_frame = load_frame()
+            lense_finder.update_lense_position(rgb_frame, now=image_time.timestamp())
+            lense = lense_finder.current_lense
+
+            # like `HeliosInterface.run`, frames without a lense count as 0.0
+            edge_fraction = 0.0
+            t = time.perf_counter()
+            if lense is not None:
+                edge_fraction = utils.HeliosImageProcessing.get_edge_fraction(
+                    rgb_frame=rgb_frame,
+                    station_id="replay",
+                    edge_color_threshold=helios_config.edge_color_threshold,
+                    target_pixel_brightness=helios_config.target_pixel_brightness,
+                    lense_circle=lense,
+                    resolution=helios_config.edge_detection_resolution,
+                    engine=helios_config.edge_detection_engine,
+                )
+            edge_fraction_time = time.perf_counter() - t
+            outcome, _ = evaluator.evaluate(
+                edge_fraction=edge_fraction,
+                edge_pixel_threshold=helios_config.edge_pixel_threshold,
+                min_seconds_between_state_changes=helios_config.min_seconds_between_state_changes,
+                now=image_time.timestamp(),
+            )
+            steps.append(
+                HeliosReplayStep(
+                    time=image_time,
+                    lense=lense,
+                    edge_fraction=edge_fraction,
+                    edge_fraction_time=edge_fraction_time,
+                    outcome=outcome,
+                    state=evaluator.current_state,
+                )
+            )
+        return steps
+
+    @staticmethod
+    def _load_image(path: str) -> np.ndarray[Any, Any]:
+        return np.array(Image.open(path).convert("RGB"))
+
+    @staticmethod
+    def _load_archive_record(path: str, offset: int) -> np.ndarray[Any, Any]:
+        frame = utils.HeliosArchive.read(path, offset).get_frame()
+        return cv.cvtColor(frame, cv.COLOR_GRAY2RGB)  # type: ignore
+
+    @staticmethod
+    def replay_days(
+        days: list[str],
+        helios_config: types.config.HeliosConfig,
+        archive_dir: str = HELIOS_ARCHIVE_DIR,
+        processes: Optional[int] = None,
+    ) -> Generator[tuple[str, list[HeliosReplayStep]], None, None]:
+        """Replay several days in parallel (one process per day). Yields
+        the results in the order of the days."""
+
+        if len(days) <= 1 or processes == 1:
+            for day in days:
+                yield day, HeliosReplay.replay_day(day, helios_config, archive_dir)
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(len(days), processes or os.cpu_count() or 1)
+        ) as executor:
+            futures = [
+                executor.submit(HeliosReplay.replay_day, day, helios_config, archive_dir)
+                for day in days
+            ]
+            for day, future in zip(days, futures):
+                yield day, future.result()
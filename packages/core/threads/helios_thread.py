@@ -1,14 +1,13 @@
-import datetime
+import contextlib
+import functools
+import math
 import os
-import sys
 import threading
 import time
-from typing import Any, Optional
+from typing import Any, Callable, Literal, Optional
 
 import cv2 as cv
 import numpy as np
-import pydantic
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 from PIL import Image, ImageDraw
@@ -19,32 +18,55 @@ _PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
 _AUTOEXPOSURE_IMG_DIR = os.path.join(_PROJECT_DIR, "logs", "helios-autoexposure")
 _NUMBER_OF_EXPOSURE_IMAGES = 3
 
+# number of frames kept by the capture thread
+_FRAME_RING_SIZE = 4
+
+# how long to wait for a new frame from the capture thread
+_FRAME_TIMEOUT = 5
+
 
 class LenseFinder:
-    def __init__(self, logger: utils.Logger) -> None:
+    def __init__(self, logger: Optional[utils.Logger] = None) -> None:
         self.logger = logger
         self._previous_lense: Optional[tuple[int, int, int]] = None
         self._lense: Optional[tuple[int, int, int]] = None
         self._last_update: Optional[float] = None
 
-    def update_lense_position(self, rgb_frame: np.ndarray[Any, Any]) -> None:
+    def update_lense_position(
+        self, rgb_frame: np.ndarray[Any, Any], now: Optional[float] = None
+    ) -> None:
+        """Update the lense position at most every 3 minutes. `now` is the
+        time the frame was taken (defaults to the current time)."""
+
+        if now is None:
+            now = time.time()
+
         # only update every 3 minutes
-        if (self._last_update is not None) and ((time.time() - self._last_update) < 180):
+        if (self._last_update is not None) and ((now - self._last_update) < 180):
             return
 
         # use three lense positions to determine the next position
         previous, current = self._previous_lense, self._lense
-        new = utils.HeliosImageProcessing.get_lense_position(rgb_frame, use_downscaling=True)
+
+        # only search close to the current lense once the fit is stable
+        search_around: Optional[tuple[int, int, int]] = None
+        if (previous is not None) and (current is not None):
+            if max(abs(current[i] - previous[i]) for i in range(3)) <= 5:
+                search_around = current
+
+        new = utils.HeliosImageProcessing.get_lense_position(
+            rgb_frame, use_downscaling=True, previous_lense=search_around
+        )
 
         # don't update if no lense was found
         if new is None:
-            self.logger.debug("No lense found in image -> not updating")
+            self._debug("No lense found in image -> not updating")
             return
 
         # simply update if no two previous lenses are available
         if (previous is None) or (current is None):
-            self._previous_lense, self._lense, self._last_update = current, new, time.time()
-            self.logger.debug("No previous lense available -> updating")
+            self._previous_lense, self._lense, self._last_update = current, new, now
+            self._debug("No previous lense available -> updating")
             return
 
         # update if new lense is close to current lense
@@ -56,8 +78,8 @@ class LenseFinder:
             )
             <= 5
         ):
-            self._previous_lense, self._lense, self._last_update = current, new, time.time()
-            self.logger.debug("New lense is close to current lense -> updating")
+            self._previous_lense, self._lense, self._last_update = current, new, now
+            self._debug("New lense is close to current lense -> updating")
             return
 
         # update anyway if fit is not stable yet
@@ -69,43 +91,278 @@ class LenseFinder:
             )
             > 5
         ):
-            self._previous_lense, self._lense, self._last_update = current, new, time.time()
-            self.logger.debug("Current lense is very different from previous lense -> updating")
+            self._previous_lense, self._lense, self._last_update = current, new, now
+            self._debug("Current lense is very different from previous lense -> updating")
+
+    def _debug(self, message: str) -> None:
+        if self.logger is not None:
+            self.logger.debug(message)
 
     @property
     def current_lense(self) -> Optional[tuple[int, int, int]]:
         return self._lense
 
 
+class HeliosStateEvaluator:
+    """Decides whether the sun conditions are good, based on the average
+    of the last `evaluation_size` edge fractions.
+
+    To eliminate quickly alternating decisions, the state only changes to
+    "good" above the `edge_pixel_threshold` and back to "bad" below 70% of
+    it (see https://github.com/tum-esm/pyra/issues/148). State changes are
+    only applied if the last change is at least `min_seconds_between_state_changes`
+    ago (see https://github.com/tum-esm/pyra/issues/195).
+
+    The history keeps the window statistics and an EWMA with the span
+    `evaluation_size` up to date on every append (see `utils.StatisticsRing`).
+
+    Used by the Helios thread and by the replay of archived images."""
+
+    def __init__(self, evaluation_size: int) -> None:
+        self.edge_fraction_history = utils.StatisticsRing(
+            max_size=evaluation_size, ewma_alpha=2 / (evaluation_size + 1)
+        )
+        self.current_state: Optional[bool] = None
+        self.last_state_change: Optional[float] = None
+
+    def set_evaluation_size(self, evaluation_size: int) -> None:
+        """Resize the history, keeping the newest edge fractions."""
+
+        self.edge_fraction_history.set_max_size(evaluation_size)
+        self.edge_fraction_history.ewma_alpha = 2 / (evaluation_size + 1)
+
+    def update_helios_state(self, helios_state: types.HeliosState, now: float) -> None:
+        """Write the last edge fraction and the window statistics into the
+        `helios_state` and add the last edge fraction to its timeseries."""
+
+        history = self.edge_fraction_history
+        if history.count == 0:
+            return
+        last_edge_fraction = history.get()[-1]
+        helios_state.last_edge_fraction = last_edge_fraction
+        helios_state.last_edge_fraction_time = now
+        helios_state.window_size = history.size()
+        helios_state.window_mean = history.mean()
+        helios_state.window_std = history.std()
+        helios_state.window_min = history.min()
+        helios_state.window_max = history.max()
+        helios_state.ewma = history.ewma
+        helios_state.add_to_timeseries(last_edge_fraction, now, self.current_state)
+
+    def evaluate(
+        self,
+        edge_fraction: float,
+        edge_pixel_threshold: float,
+        min_seconds_between_state_changes: float,
+        now: float,
+    ) -> tuple[Literal["filling", "unchanged", "changed", "too-recent"], Optional[bool]]:
+        """Append the edge fraction to the history and evaluate the state.
+        Returns what happened and the state indicated by the history. The
+        `current_state` is only updated if the outcome is "changed"."""
+
+        self.edge_fraction_history.append(edge_fraction)
+
+        # evaluate sun state only if list is filled
+        if not self.edge_fraction_history.is_full():
+            return "filling", self.current_state
+
+        new_state: Optional[bool] = self.current_state
+        average_edge_fraction = self.edge_fraction_history.sum() / self.edge_fraction_history.size()
+        upper_ef_threshold = edge_pixel_threshold / 100.0
+        lower_ef_threshold = upper_ef_threshold * 0.7
+        if new_state is None:
+            new_state = average_edge_fraction >= upper_ef_threshold
+        else:
+            # if already running and below lower threshold -> stop
+            if self.current_state and (average_edge_fraction <= lower_ef_threshold):
+                new_state = False
+
+            # if not running and above upper threshold -> start
+            if (not self.current_state) and (average_edge_fraction >= upper_ef_threshold):
+                new_state = True
+
+        if new_state == self.current_state:
+            return "unchanged", new_state
+
+        if (self.last_state_change is not None) and (
+            (now - self.last_state_change) < min_seconds_between_state_changes
+        ):
+            return "too-recent", new_state
+
+        self.current_state = new_state
+        self.last_state_change = now
+        return "changed", new_state
+
+
 class CameraError(Exception):
     pass
 
 
+class HeliosFrameCapture:
+    """Reads frames from the camera in a background thread, so that the
+    camera buffer never contains stale frames and taking an image does not
+    have to wait for the camera.
+
+    The frames are copied into a small preallocated ring together with their
+    timestamp and the exposure they were taken with. Every slot has a sequence
+    counter that is odd while the slot is being written. Readers copy the slot
+    and retry if the counter has changed in the meantime, so the capture
+    thread never waits for a reader.
+
+    The camera may only be accessed while holding `camera_lock`, because
+    OpenCV's `VideoCapture` must not be used from two threads at once."""
+
+    def __init__(self, camera: interfaces.HeliosCamera, exposure: int) -> None:
+        self.camera = camera
+        self.camera_lock = threading.Lock()
+        self.new_frame_condition = threading.Condition()
+        self.stop_event = threading.Event()
+
+        self.frames: Optional[np.ndarray[Any, Any]] = None
+        self.slot_sequences: list[int] = [0] * _FRAME_RING_SIZE
+        self.slot_frame_numbers: list[int] = [0] * _FRAME_RING_SIZE
+        self.slot_timestamps: list[float] = [0.0] * _FRAME_RING_SIZE
+        self.slot_exposures: list[int] = [exposure] * _FRAME_RING_SIZE
+
+        # number of frames captured so far, the latest frame is in
+        # slot `(frame_count - 1) % _FRAME_RING_SIZE`
+        self.frame_count: int = 0
+
+        # frames with a lower number have been taken with outdated settings
+        self.first_valid_frame_number: int = 0
+        self.exposure: int = exposure
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            with self.camera_lock:
+                ret, frame = self.camera.read()
+                exposure = self.exposure
+            if not ret:
+                # the camera is not delivering frames, don't spin
+                self.stop_event.wait(0.1)
+                continue
+
+            if (self.frames is None) or (self.frames.shape[1:] != frame.shape):
+                self.frames = np.empty((_FRAME_RING_SIZE, *frame.shape), dtype=frame.dtype)
+            slot = self.frame_count % _FRAME_RING_SIZE
+            self.slot_sequences[slot] += 1
+            self.frames[slot] = frame
+            self.slot_frame_numbers[slot] = self.frame_count + 1
+            self.slot_timestamps[slot] = time.time()
+            self.slot_exposures[slot] = exposure
+            self.slot_sequences[slot] += 1
+
+            with self.new_frame_condition:
+                self.frame_count += 1
+                self.new_frame_condition.notify_all()
+
+    def invalidate_frames(self, exposure: int, discard_count: int) -> None:
+        """Ignore all frames taken so far and the next `discard_count` frames.
+        Call this after changing the camera settings (while holding the camera
+        lock); the new frames are tagged with the given exposure."""
+
+        with self.new_frame_condition:
+            self.exposure = exposure
+            self.first_valid_frame_number = self.frame_count + 1 + discard_count
+
+    def get_frame(
+        self,
+        newer_than: int = 0,
+        timeout: float = _FRAME_TIMEOUT,
+    ) -> Optional[tuple[np.ndarray[Any, Any], int, float, int]]:
+        """Return a copy of the latest valid frame with a frame number higher
+        than `newer_than`, waiting for it if necessary. Returns the frame, its
+        number, timestamp and exposure or None if the timeout is reached."""
+
+        deadline = time.time() + timeout
+        while True:
+            with self.new_frame_condition:
+                while self.frame_count < max(newer_than + 1, self.first_valid_frame_number):
+                    remaining_time = deadline - time.time()
+                    if remaining_time <= 0 or self.stop_event.is_set():
+                        return None
+                    self.new_frame_condition.wait(remaining_time)
+                slot = (self.frame_count - 1) % _FRAME_RING_SIZE
+
+            sequence = self.slot_sequences[slot]
+            if (sequence % 2 == 1) or (self.frames is None):
+                continue
+            result = (
+                self.frames[slot].copy(),
+                self.slot_frame_numbers[slot],
+                self.slot_timestamps[slot],
+                self.slot_exposures[slot],
+            )
+            if self.slot_sequences[slot] == sequence:
+                return result
+
+    def stop(self) -> None:
+        """Stop the capture thread. Does not release the camera."""
+
+        self.stop_event.set()
+        with self.new_frame_condition:
+            self.new_frame_condition.notify_all()
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout=_FRAME_TIMEOUT)
+
+
 class HeliosInterface:
     def __init__(
         self,
         logger: utils.Logger,
         helios_config: types.config.HeliosConfig,
         initialization_tries: int = 5,
+        autoexposure_mode: Literal["search", "sweep"] = "search",
+        save_autoexposure_images: bool = True,
+        capabilities_cache_path: Optional[
+            str
+        ] = interfaces.helios_camera.HELIOS_CAMERA_CAPABILITIES_PATH,
     ) -> None:
+        """Open the camera and set it up. The available exposures are
+        probed on the first start only: they are cached together with the
+        last good exposure in `capabilities_cache_path` (None disables the
+        cache) and cheaply revalidated on later starts."""
+
         self.logger = logger
-        self.camera: cv.VideoCapture
+        self.autoexposure_mode = autoexposure_mode
+        self.save_autoexposure_images = save_autoexposure_images
+        self.image_writer = utils.HeliosImageWriter(logger)
+        self.reported_dropped_image_count: int = 0
+
+        # slope of log2(brightness) over exposure, updated after every autoexposure
+        self.exposure_brightness_slope: float = 1.0
         self.helios_config = helios_config
-        if sys.platform.startswith("win"):
-            self.camera = cv.VideoCapture(helios_config.camera_id, cv.CAP_DSHOW)
-        else:
-            self.camera = cv.VideoCapture(helios_config.camera_id)
+        self.frame_capture: Optional[HeliosFrameCapture] = None
+        self.last_frame_number: int = 0
+        self.capabilities_cache_path = capabilities_cache_path
+        self.camera_signature = interfaces.HeliosCameraCapabilities.get_signature(helios_config)
+        capabilities: Optional[interfaces.HeliosCameraCapabilities] = None
+        if capabilities_cache_path is not None:
+            capabilities = interfaces.HeliosCameraCapabilities.load(
+                self.camera_signature, capabilities_cache_path
+            )
 
-        self.camera.release()
+        # on a cold start, open and release the camera once before using it
+        self.camera: interfaces.HeliosCamera = interfaces.open_helios_camera(helios_config)
+        if capabilities is None:
+            self.camera.release()
 
         for _ in range(initialization_tries):
-            if sys.platform.startswith("win"):
-                self.camera = cv.VideoCapture(helios_config.camera_id, cv.CAP_DSHOW)
-            else:
-                self.camera = cv.VideoCapture(helios_config.camera_id)
+            if not self.camera.isOpened():
+                self.camera = interfaces.open_helios_camera(helios_config)
             if self.camera.isOpened():
-                available_exposures = self.get_available_exposures()
-                logger.debug(f"determined available exposures: {available_exposures}")
+                if (capabilities is not None) and (not self._validate_capabilities(capabilities)):
+                    logger.info("cached camera capabilities are outdated, probing the camera")
+                    capabilities = None
+                if capabilities is not None:
+                    available_exposures = capabilities.available_exposures
+                    logger.debug(f"using cached available exposures: {available_exposures}")
+                else:
+                    available_exposures = self.get_available_exposures()
+                    logger.debug(f"determined available exposures: {available_exposures}")
                 if len(available_exposures) == 0:
                     raise CameraError("did not find any available exposures")
 
@@ -114,11 +371,31 @@ class HeliosInterface:
                 self.target_pixel_brightness: int = 0
                 self.available_exposures: list[int] = available_exposures
 
+                # start at the last good exposure; if the last autoexposure is
+                # recent (e.g. after a camera error) and has been done with the
+                # same brightness and contrast, do not repeat it
+                if capabilities is not None:
+                    self.current_exposure = capabilities.last_good_exposure
+                    self.exposure_brightness_slope = capabilities.exposure_brightness_slope
+                    if (
+                        (time.time() - capabilities.last_autoexposure_time) < 300
+                        and (capabilities.camera_brightness == helios_config.camera_brightness)
+                        and (capabilities.camera_contrast == helios_config.camera_contrast)
+                    ):
+                        self.last_autoexposure_time = capabilities.last_autoexposure_time
+                        self.target_pixel_brightness = capabilities.target_pixel_brightness
+
                 self.update_camera_settings(
                     exposure=self.current_exposure,
                     brightness=helios_config.camera_brightness,
                     contrast=helios_config.camera_contrast,
                 )
+                self.resolution: tuple[int, int] = (
+                    round(self.camera.get(cv.CAP_PROP_FRAME_WIDTH)),
+                    round(self.camera.get(cv.CAP_PROP_FRAME_HEIGHT)),
+                )
+                self.save_capabilities()
+                self.frame_capture = HeliosFrameCapture(self.camera, self.current_exposure)
                 return
             else:
                 logger.debug("could not open camera, retrying in 2 seconds")
@@ -127,9 +404,69 @@ class HeliosInterface:
         raise CameraError(f"could not initialize camera in {initialization_tries} tries")
 
     def __del__(self) -> None:
-        """Release the camera"""
+        """Stop the capture thread and release the camera"""
 
+        if self.frame_capture is not None:
+            self.frame_capture.stop()
         self.camera.release()
+        self.image_writer.stop(wait=False)
+
+    def _lock_camera(self) -> contextlib.AbstractContextManager[Any]:
+        """Lock the camera while the capture thread is running."""
+
+        if self.frame_capture is None:
+            return contextlib.nullcontext()
+        return self.frame_capture.camera_lock
+
+    def _validate_capabilities(self, capabilities: interfaces.HeliosCameraCapabilities) -> bool:
+        """Cheap check whether the cached capabilities still apply: the
+        camera delivers the same resolution for the requested 1280x720 (like
+        in `update_camera_settings`), the lowest, the highest and the last
+        good exposure are accepted by the camera and the exposures next to
+        this range are not. This also detects another camera model with the
+        same camera id where the signature has no device name (Windows)."""
+
+        exposures = capabilities.available_exposures
+        if (len(exposures) == 0) or (capabilities.last_good_exposure not in exposures):
+            return False
+        self.camera.set(cv.CAP_PROP_FRAME_WIDTH, 1280)
+        self.camera.set(cv.CAP_PROP_FRAME_HEIGHT, 720)
+        resolution = (
+            round(self.camera.get(cv.CAP_PROP_FRAME_WIDTH)),
+            round(self.camera.get(cv.CAP_PROP_FRAME_HEIGHT)),
+        )
+        if resolution != capabilities.resolution:
+            return False
+        for exposure in sorted({min(exposures), max(exposures), capabilities.last_good_exposure}):
+            self.camera.set(cv.CAP_PROP_EXPOSURE, exposure)
+            if self.camera.get(cv.CAP_PROP_EXPOSURE) != exposure:
+                return False
+        for exposure in [min(exposures) - 1, max(exposures) + 1]:
+            if exposure in range(-20, 20):
+                self.camera.set(cv.CAP_PROP_EXPOSURE, exposure)
+                if self.camera.get(cv.CAP_PROP_EXPOSURE) == exposure:
+                    return False
+        return True
+
+    def save_capabilities(self) -> None:
+        """Write the available exposures, the resolution and the result of
+        the last autoexposure to the capabilities cache."""
+
+        if self.capabilities_cache_path is None:
+            return
+        try:
+            interfaces.HeliosCameraCapabilities(
+                available_exposures=self.available_exposures,
+                resolution=self.resolution,
+                last_good_exposure=self.current_exposure,
+                exposure_brightness_slope=self.exposure_brightness_slope,
+                target_pixel_brightness=self.target_pixel_brightness,
+                last_autoexposure_time=self.last_autoexposure_time,
+                camera_brightness=self.helios_config.camera_brightness,
+                camera_contrast=self.helios_config.camera_contrast,
+            ).save(self.camera_signature, self.capabilities_cache_path)
+        except OSError as e:
+            self.logger.warning(f"could not save camera capabilities: {repr(e)}")
 
     def get_available_exposures(self) -> list[int]:
         """Loop over every integer in [-20, ..., +20] and try to set
@@ -167,121 +504,215 @@ class HeliosInterface:
             "saturation": (cv.CAP_PROP_SATURATION, saturation),
             "gain": (cv.CAP_PROP_GAIN, gain),
         }
-        for property_name, (key, value) in properties.items():
-            self.camera.set(key, value)
-            if property_name not in ["width", "height"]:
-                new_value = self.camera.get(key)
-                if new_value != value:
-                    self.logger.warning(
-                        f"could not set {property_name} to {value}, value is still at {new_value}"
-                    )
+        with self._lock_camera():
+            for property_name, (key, value) in properties.items():
+                self.camera.set(key, value)
+                if property_name not in ["width", "height"]:
+                    new_value = self.camera.get(key)
+                    if new_value != value:
+                        self.logger.warning(
+                            f"could not set {property_name} to {value}, value is still at {new_value}"
+                        )
 
-        # throw away some images after changing settings. I don't know
-        # why this is necessary, but it resolves a lot of issues
-        for _ in range(2):
-            self.camera.read()
+            # throw away some images after changing settings. I don't know
+            # why this is necessary, but it resolves a lot of issues
+            if self.frame_capture is not None:
+                self.frame_capture.invalidate_frames(exposure, discard_count=2)
+            else:
+                for _ in range(2):
+                    self.camera.read()
 
     def take_image(
         self,
         retries: int = 10,
         trow_away_white_images: bool = True,
     ) -> np.ndarray[Any, Any]:
-        """Take an image using the initialized camera. Raises an
-        AssertionError if camera has not been set up.
+        """Return the latest frame from the capture thread that has been
+        taken after the last settings change. Raises a CameraError if the
+        camera has not been set up or did not deliver a frame in time.
 
-        Retries up to n times (camera can say "not possible")
-        and throws away all mostly white images (overexposed)
-        except when specified not to (used in autoexposure)."""
+        Every frame is only returned once. Waits for up to n new frames and
+        throws away all mostly white images (overexposed) except when
+        specified not to (used in autoexposure)."""
 
-        if not self.camera.isOpened():
+        if (not self.camera.isOpened()) or (self.frame_capture is None):
             raise CameraError("camera is not open")
         for _ in range(retries + 1):
-            ret, frame = self.camera.read()
-            if ret:
-                if (
-                    trow_away_white_images
-                    and np.mean(
-                        frame  # type: ignore
-                    )
-                    > 240
-                ):
-                    # image is mostly white
-                    continue
-                return np.array(frame)
+            result = self.frame_capture.get_frame(newer_than=self.last_frame_number)
+            if result is None:
+                break
+            frame, self.last_frame_number, _, _ = result
+            if trow_away_white_images and np.mean(frame) > 240:
+                # image is mostly white
+                continue
+            return frame
         raise CameraError("could not take image")
 
+    def _measure_exposure(self, exposure: int) -> float:
+        """Set the exposure and return the mean pixel value of the next
+        3 frames (after waiting 0.2s and throwing away 3 frames)."""
+
+        with self._lock_camera():
+            self.camera.set(cv.CAP_PROP_EXPOSURE, exposure)
+        time.sleep(0.2)
+        with self._lock_camera():
+            assert self.camera.get(cv.CAP_PROP_EXPOSURE) == exposure, (
+                f"Could not set exposure to {exposure}"
+            )
+
+            # throw away some images after changing settings. I don't know
+            # why this is necessary, but it resolves a lot of issues
+            if self.frame_capture is not None:
+                self.frame_capture.invalidate_frames(exposure, discard_count=3)
+
+        mean_colors: list[float] = []
+        for i in range(_NUMBER_OF_EXPOSURE_IMAGES):
+            rgb_frame = self.take_image(trow_away_white_images=False)
+            mean_colors.append(round(float(np.mean(rgb_frame)), 3))
+            if self.save_autoexposure_images:
+                self.image_writer.submit(
+                    functools.partial(
+                        HeliosInterface._save_autoexposure_image,
+                        rgb_frame,
+                        mean_colors[-1],
+                        os.path.join(_AUTOEXPOSURE_IMG_DIR, f"exposure-{exposure}-{i + 1}.jpg"),
+                    )
+                )
+        return sum(mean_colors) / _NUMBER_OF_EXPOSURE_IMAGES
+
+    @staticmethod
+    def _save_autoexposure_image(
+        rgb_frame: np.ndarray[Any, Any], mean_color: float, path: str
+    ) -> None:
+        pil_image = Image.fromarray((rgb_frame * 255).astype(np.uint8))
+        draw = ImageDraw.Draw(pil_image)
+        draw.text((10, 10), f"mean={mean_color}", (255, 255, 255), font_size=25)
+        pil_image.save(path)
+
+    @staticmethod
+    def _search_exposure(
+        exposures: list[int],
+        current_exposure: int,
+        current_brightness: float,
+        target_brightness: float,
+        slope: float,
+        measure: Callable[[int], float],
+    ) -> None:
+        """Find the exposure closest to the target brightness with few
+        measurements. The mean pixel value is modelled as proportional to
+        `2 ** (slope * exposure)` (exposures are usually log2 of the exposure
+        time). Starting from the brightness of the current exposure, the next
+        exposure to measure is predicted by the model and the search interval
+        is narrowed down like in a binary search until the target brightness
+        lies between two neighboring exposures."""
+
+        exposures = sorted(exposures)
+        reference_exposure, reference_brightness = current_exposure, current_brightness
+
+        # the target lies between the exposures at these indices, -1 and
+        # len(exposures) stand for exposures that are too dark/bright
+        lower_index, upper_index = -1, len(exposures)
+        while upper_index - lower_index > 1:
+            predicted_exposure = reference_exposure + (
+                math.log2(target_brightness / max(reference_brightness, 1)) / slope
+            )
+            index = min(
+                range(lower_index + 1, upper_index),
+                key=lambda i: abs(exposures[i] - predicted_exposure),
+            )
+            reference_exposure, reference_brightness = exposures[index], measure(exposures[index])
+            if reference_brightness < target_brightness:
+                lower_index = index
+            else:
+                upper_index = index
+
+    @staticmethod
+    def _fit_exposure_brightness_slope(exposure_results: dict[int, float]) -> Optional[float]:
+        """Fit the slope of log2(brightness) over exposure to the measurements
+        that are neither under- nor overexposed. Returns None if there are
+        not enough of them."""
+
+        points = [(e, math.log2(b)) for e, b in exposure_results.items() if 10 < b < 245]
+        if len(points) < 2:
+            return None
+        mean_e = sum(e for e, _ in points) / len(points)
+        mean_b = sum(b for _, b in points) / len(points)
+        variance = sum((e - mean_e) ** 2 for e, _ in points)
+        if variance == 0:
+            return None
+        slope = sum((e - mean_e) * (b - mean_b) for e, b in points) / variance
+        return min(max(slope, 0.1), 2.0)
+
     def adjust_exposure(self) -> None:
-        """This function will loop over all available exposures and
-        take one image for each exposure. Then it sets exposure to
-        the value where the overall mean pixel value color is closest
-        to `self.target_pixel_brightness`.
+        """This function sets the exposure to the value where the overall
+        mean pixel value color is closest to `self.target_pixel_brightness`.
 
-        **For every exposure:**
+        In the "sweep" mode, every available exposure is measured. In the
+        "search" mode, only a few exposures are measured (see
+        `_search_exposure`).
+
+        **For every measured exposure:**
 
         1. set new exposure
-        2. 0.3s sleep
-        3. image 1 -> 0.1s sleep -> image 2 -> 0.1s sleep -> image 3
-        8. calculate mean color of all 3 images
-        9. save images to disk"""
+        2. 0.2s sleep
+        3. throw away the next 3 frames of the capture thread
+        4. take 3 consecutive frames
+        5. calculate mean color of all 3 images
+        6. optionally save the images to disk (in the background)"""
 
         if len(self.available_exposures) <= 1:
             self.logger.debug("not enough exposure options -> skipping autoexposure")
             return
 
-        class ExposureResult(pydantic.BaseModel):
-            exposure: int
-            means: list[float]
+        t = time.time()
+        frame_count_before = 0 if self.frame_capture is None else self.frame_capture.frame_count
+        exposure_results: dict[int, float] = {}
 
-        exposure_results: list[ExposureResult] = []
+        def _measure(exposure: int) -> float:
+            if exposure not in exposure_results:
+                exposure_results[exposure] = self._measure_exposure(exposure)
+            return exposure_results[exposure]
 
-        for exposure in self.available_exposures:
-            # set new exposure and wait 0.3s after setting it
-            self.camera.set(cv.CAP_PROP_EXPOSURE, exposure)
-            time.sleep(0.2)
-            assert self.camera.get(cv.CAP_PROP_EXPOSURE) == exposure, (
-                f"Could not set exposure to {exposure}"
+        if self.autoexposure_mode == "sweep":
+            for exposure in self.available_exposures:
+                _measure(exposure)
+        else:
+            HeliosInterface._search_exposure(
+                exposures=self.available_exposures,
+                current_exposure=self.current_exposure,
+                current_brightness=float(np.mean(self.take_image(trow_away_white_images=False))),
+                target_brightness=self.target_pixel_brightness,
+                slope=self.exposure_brightness_slope,
+                measure=_measure,
             )
 
-            # throw away some images after changing settings. I don't know
-            # why this is necessary, but it resolves a lot of issues
-            for _ in range(3):
-                self.camera.read()
-
-            # take 3 images and wait 0.1s before each image
-            mean_colors: list[float] = []
-            for i in range(_NUMBER_OF_EXPOSURE_IMAGES):
-                time.sleep(0.1)
-                rgb_frame: Any = self.take_image(trow_away_white_images=False)
-                mean_colors.append(round(float(np.mean(rgb_frame)), 3))  # type: ignore
-                pil_image = Image.fromarray((rgb_frame * 255).astype(np.uint8))
-                draw = ImageDraw.Draw(pil_image)
-                draw.text((10, 10), f"mean={mean_colors[-1]}", (255, 255, 255), font_size=25)
-                pil_image.save(
-                    os.path.join(_AUTOEXPOSURE_IMG_DIR, f"exposure-{exposure}-{i + 1}.jpg")
-                )
-
-            # calculate mean color of all 3 images
-            exposure_results.append(ExposureResult(exposure=exposure, means=mean_colors))
-
         self.logger.debug(f"Exposure results: {exposure_results}")
 
         assert len(exposure_results) > 0, "no possible exposures found"
-        new_exposure = int(
-            min(
-                exposure_results,
-                key=lambda r: abs(
-                    (sum(r.means) / _NUMBER_OF_EXPOSURE_IMAGES) - self.target_pixel_brightness
-                ),
-            ).exposure
+        slope = HeliosInterface._fit_exposure_brightness_slope(exposure_results)
+        if slope is not None:
+            self.exposure_brightness_slope = slope
+        new_exposure = min(
+            exposure_results,
+            key=lambda e: abs(exposure_results[e] - self.target_pixel_brightness),
         )
         self.update_camera_settings(
             exposure=new_exposure,
             brightness=self.helios_config.camera_brightness,
             contrast=self.helios_config.camera_contrast,
         )
+        frame_count = (
+            0 if self.frame_capture is None else self.frame_capture.frame_count
+        ) - frame_count_before
+        self.logger.debug(
+            f"Autoexposure ({self.autoexposure_mode}) took {time.time() - t:.2f}s, "
+            + f"measured {len(exposure_results)}/{len(self.available_exposures)} exposures, "
+            + f"used {frame_count} frames"
+        )
         if new_exposure != self.current_exposure:
             self.logger.info(f"Changing exposure: {self.current_exposure} -> {new_exposure}")
             self.current_exposure = new_exposure
+        self.save_capabilities()
 
     def run(
         self,
@@ -291,6 +722,9 @@ class HeliosInterface:
         save_images_to_archive: bool,
         save_current_image: bool,
         lense_finder: LenseFinder,
+        edge_detection_resolution: Literal["full", "half", "quarter"] = "full",
+        edge_detection_engine: Literal["skimage", "opencv"] = "skimage",
+        image_archive_format: Literal["jpeg", "container"] = "jpeg",
     ) -> float:
         """Take an image and evaluate the sun conditions. Run autoexposure
         function every 5 minutes. Returns the edge fraction."""
@@ -325,7 +759,18 @@ class HeliosInterface:
             lense_circle=lense,
             save_images_to_archive=save_images_to_archive,
             save_current_image=save_current_image,
+            image_writer=self.image_writer,
+            resolution=edge_detection_resolution,
+            engine=edge_detection_engine,
+            archive_format=image_archive_format,
+            exposure=self.current_exposure,
         )
+        if self.image_writer.dropped_count > self.reported_dropped_image_count:
+            self.logger.warning(
+                "Helios image writer is falling behind, dropped "
+                + f"{self.image_writer.dropped_count - self.reported_dropped_image_count} images"
+            )
+            self.reported_dropped_image_count = self.image_writer.dropped_count
         self.logger.debug(f"exposure = {self.current_exposure}, edge_fraction = {edge_fraction}")
         return edge_fraction
 
@@ -356,39 +801,40 @@ class HeliosThread(AbstractThread):
         config: types.Config,
         logger: utils.Logger,
     ) -> bool:
-        """Based on the config, should the thread be running or not?"""
+        """Based on the config, should the thread be running or not? In
+        test mode, it only runs with a simulated camera (see
+        `interfaces.open_helios_camera`)."""
 
         return (
             (config.helios is not None)
-            and (not config.general.test_mode)
+            and ((not config.general.test_mode) or (config.helios.camera_backend != "opencv"))
             and (config.measurement_triggers.consider_helios)
         )
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=HeliosThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="helios", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="helios", just_print=headless)
         logger.info("Starting Helios thread")
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
         thread_start_time = time.time()
         config = types.Config.load()
@@ -396,12 +842,8 @@ class HeliosThread(AbstractThread):
         helios_instance: Optional[HeliosInterface] = None
         lense_finder = LenseFinder(logger)
 
-        # a list storing the last n calculated edge fractions
-        edge_fraction_history = tum_esm_utils.datastructures.RingList(
-            max_size=config.helios.evaluation_size
-        )
-        current_state: Optional[bool] = None
-        last_state_change: Optional[datetime.datetime] = None
+        # the last n calculated edge fractions and the current sun state
+        helios_evaluator = HeliosStateEvaluator(config.helios.evaluation_size)
 
         # how many cycles (initialization + mainloop) have been run
         # without successfully fetching an image from the camera
@@ -432,10 +874,13 @@ class HeliosThread(AbstractThread):
                     (new_config.helios.camera_id != config.helios.camera_id)
                     or (new_config.helios.camera_brightness != config.helios.camera_brightness)
                     or (new_config.helios.camera_contrast != config.helios.camera_contrast)
+                    or (new_config.helios.camera_backend != config.helios.camera_backend)
+                    or (new_config.helios.camera_source != config.helios.camera_source)
                 ):
                     if helios_instance is not None:
                         logger.info(
-                            "Camera id/brightness/contrast changed, reinitializing HeliosInterface"
+                            "Camera id/brightness/contrast/backend changed, "
+                            + "reinitializing HeliosInterface"
                         )
                         del helios_instance
                         helios_instance = None
@@ -443,23 +888,27 @@ class HeliosThread(AbstractThread):
                 config = new_config
                 assert config.helios is not None, "This is a bug in Pyra"
 
-                # sleep while sun angle is too low
+                # sleep while sun angle is too low (simulated cameras don't need the sun)
                 current_sun_elevation = utils.Astronomy.get_current_sun_elevation(config)
                 min_sun_elevation = config.general.min_sun_elevation
-                if current_sun_elevation < min_sun_elevation:
+                if (current_sun_elevation < min_sun_elevation) and (
+                    config.helios.camera_backend == "opencv"
+                ):
                     logger.debug("Current sun elevation below minimum, sleeping 5 minutes")
                     with interfaces.StateInterface.update_state(state_lock, logger) as s:
                         s.helios_indicates_good_conditions = "no"
                     if helios_instance is not None:
                         del helios_instance
                         helios_instance = None
-                    time.sleep(300)
+                    if stop_event.wait(300):
+                        return
                     continue
 
-                if config.general.test_mode:
+                if config.general.test_mode and (config.helios.camera_backend == "opencv"):
                     logger.info("Helios thread is skipped in test mode")
                     logger.debug("Sleeping 15 seconds")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 # initialize HeliosInterface if necessary
@@ -470,18 +919,19 @@ class HeliosThread(AbstractThread):
                         logger.error(f"could not initialize HeliosInterface: {repr(e)}")
                         logger.exception(e)
                         logger.info("sleeping 30 seconds, reinitializing HeliosInterface")
-                        time.sleep(30)
+                        if stop_event.wait(30):
+                            return
                         continue
 
                 # reinit evaluation history if size changes
-                current_max_history_size = edge_fraction_history.get_max_size()
+                current_max_history_size = helios_evaluator.edge_fraction_history.get_max_size()
                 new_max_history_size = config.helios.evaluation_size
                 if current_max_history_size != new_max_history_size:
                     logger.info(
                         "Size of Helios history has changed: "
                         + f"{current_max_history_size} -> {new_max_history_size}"
                     )
-                    edge_fraction_history.set_max_size(new_max_history_size)
+                    helios_evaluator.set_evaluation_size(new_max_history_size)
 
                 # take a picture and process it: status is in [0, 1]
                 # a CameraError is allowed to happen 3 times in a row
@@ -495,6 +945,9 @@ class HeliosThread(AbstractThread):
                         save_images_to_archive=(config.helios.save_images_to_archive),
                         save_current_image=(config.helios.save_current_image),
                         lense_finder=lense_finder,
+                        edge_detection_resolution=config.helios.edge_detection_resolution,
+                        edge_detection_engine=config.helios.edge_detection_engine,
+                        image_archive_format=config.helios.image_archive_format,
                     )
                     repeated_camera_error_count = 0
                 except CameraError as e:
@@ -508,94 +961,57 @@ class HeliosThread(AbstractThread):
                         )
                         del helios_instance
                         helios_instance = None
-                        time.sleep(30)
+                        if stop_event.wait(30):
+                            return
                         continue
 
-                # append sun status to status history
-                edge_fraction_history.append(new_edge_fraction)
+                # append sun status to status history and evaluate sun state
+                previous_state = helios_evaluator.current_state
+                now = time.time()
+                outcome, new_state = helios_evaluator.evaluate(
+                    edge_fraction=new_edge_fraction,
+                    edge_pixel_threshold=config.helios.edge_pixel_threshold,
+                    min_seconds_between_state_changes=(
+                        config.helios.min_seconds_between_state_changes
+                    ),
+                    now=now,
+                )
+                history = helios_evaluator.edge_fraction_history
                 logger.debug(
-                    f"New Helios edge_fraction: {new_edge_fraction}. "
-                    + f"Current history: {edge_fraction_history.get()}"
+                    f"New Helios edge_fraction: {new_edge_fraction}. Current history: "
+                    + f"{history.size()}/{history.get_max_size()} values, "
+                    + f"mean = {history.mean():.6f}, std = {history.std():.6f}"
                 )
-
-                # evaluate sun state only if list is filled
-                if edge_fraction_history.is_full():
-                    new_state: Optional[bool] = current_state
-
-                    average_edge_fraction = float(
-                        edge_fraction_history.sum() / edge_fraction_history.get_max_size()
+                if outcome == "filling":
+                    logger.debug(
+                        "Not evaluating sun state because Helios buffer is still filling up"
                     )
-
-                    # eliminating quickly alternating decisions
-                    # see https://github.com/tum-esm/pyra/issues/148
-
-                    upper_ef_threshold = config.helios.edge_pixel_threshold / 100.0
-                    lower_ef_threshold = upper_ef_threshold * 0.7
-                    if new_state is None:
-                        new_state = average_edge_fraction >= upper_ef_threshold
-                    else:
-                        # if already running and below lower threshold -> stop
-                        if current_state and (average_edge_fraction <= lower_ef_threshold):
-                            new_state = False
-
-                        # if not running and above upper threshold -> start
-                        if (not current_state) and (average_edge_fraction >= upper_ef_threshold):
-                            new_state = True
-
+                else:
                     logger.debug(f"New state: {'GOOD' if new_state else 'BAD'}")
-                    if current_state == new_state:
+                    if outcome == "unchanged":
                         logger.debug("State did not change")
+                    elif outcome == "too-recent":
+                        logger.debug("State changed")
+                        logger.debug("Not updating state file because last change was too recent")
+                    else:
+                        logger.debug("State changed")
+                        logger.info(
+                            "State change: "
+                            + {True: "GOOD", False: "BAD", None: "None"}[previous_state]
+                            + " -> "
+                            + {True: "GOOD", False: "BAD", None: "None"}[new_state]
+                        )
+                    if outcome != "too-recent":
                         with interfaces.StateInterface.update_state(state_lock, logger) as s:
                             s.helios_indicates_good_conditions = {  # type: ignore
                                 None: "inconclusive",
                                 True: "yes",
                                 False: "no",
-                            }[current_state]
-                    else:
-                        logger.debug("State changed")
-
-                        # only do state change if last_state_change is long ago in
-                        # the past see https://github.com/tum-esm/pyra/issues/195
-
-                        update_state_file = last_state_change is None or (
-                            (datetime.datetime.now() - last_state_change).total_seconds()
-                            >= config.helios.min_seconds_between_state_changes
-                        )
-                        if update_state_file:
-                            logger.info(
-                                "State change: "
-                                + {
-                                    True: "GOOD",
-                                    False: "BAD",
-                                    None: "None",
-                                }[current_state]
-                                + " -> "
-                                + {
-                                    True: "GOOD",
-                                    False: "BAD",
-                                }[new_state]
-                            )
-                            with interfaces.StateInterface.update_state(state_lock, logger) as s:
-                                s.helios_indicates_good_conditions = {  # type: ignore
-                                    None: "inconclusive",
-                                    True: "yes",
-                                    False: "no",
-                                }[new_state]
-
-                            current_state = new_state
-                            last_state_change = datetime.datetime.now()
-                        else:
-                            logger.debug(
-                                "Not updating state file because last change was too recent"
-                            )
-                else:
-                    logger.debug(
-                        "Not evaluating sun state because Helios buffer is still filling up"
-                    )
-
-                # clear exceptions
+                            }[helios_evaluator.current_state]
 
+                # publish the statistics and clear exceptions
                 with interfaces.StateInterface.update_state(state_lock, logger) as s:
+                    helios_evaluator.update_helios_state(s.helios_state, now)
                     s.exceptions_state.clear_exception_origin("helios")
 
                 # wait rest of loop time
@@ -603,10 +1019,11 @@ class HeliosThread(AbstractThread):
                 time_to_wait = config.helios.seconds_per_interval - elapsed_time
                 if time_to_wait > 0:
                     logger.debug(f"Finished iteration, waiting {round(time_to_wait, 2)} second(s).")
-                    time.sleep(time_to_wait)
+                    if stop_event.wait(time_to_wait):
+                        return
 
             except Exception as e:
-                edge_fraction_history.clear()
+                helios_evaluator.edge_fraction_history.clear()
                 del helios_instance
                 helios_instance = None
 
@@ -616,5 +1033,6 @@ class HeliosThread(AbstractThread):
                     s.exceptions_state.add_exception(origin="helios", exception=e)
 
                 logger.info("sleeping 60 seconds, reinitializing HeliosThread")
-                time.sleep(60)
+                if stop_event.wait(60):
+                    return
                 break
@@ -20,7 +20,7 @@ class OpusProgram:
     @staticmethod
     def start(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         """Starts the OPUS.exe with os.startfile()."""
@@ -137,21 +137,21 @@ class OpusThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=OpusThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
-        logger = utils.Logger(origin="opus", lock=logs_lock)
+        logger = utils.Logger(origin="opus")
         logger.info("Starting OPUS thread")
 
         current_experiment: Optional[str] = None  # filepath
@@ -161,14 +161,15 @@ class OpusThread(AbstractThread):
         config = types.Config.load()
 
         logger.debug("Loading state file")
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
         state = interfaces.StateInterface.load_state(state_lock, logger)
 
         thread_start_time = time.time()
+        # instead of sleeping for the whole iteration time, wake up when these events happen
+        subscription = utils.EventBus.subscribe("config", "state.measurements_should_be_running")
         last_successful_ping_time = time.time()
         last_peak_positioning_time: Optional[float] = None
         last_http_connection_issue_time: Optional[float] = None
@@ -230,7 +231,8 @@ class OpusThread(AbstractThread):
                 if config.general.test_mode:
                     logger.info("OPUS thread is skipped in test mode")
                     logger.debug("Sleeping 15 seconds")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 # START AND STOP OPUS
@@ -256,14 +258,16 @@ class OpusThread(AbstractThread):
                                 s.opus_state.macro_filepath = None
 
                     OpusProgram.stop(logger)
-                    time.sleep(3)
+                    if stop_event.wait(3):
+                        return
                     continue
 
                 # IDLE AT NIGHT
 
                 if not opus_should_be_running:
                     logger.debug("Sleeping 30 seconds (idling at night)")
-                    time.sleep(30)
+                    if stop_event.wait(30):
+                        return
                     continue
 
                 # LOAD CORRECT EXPERIMENT
@@ -322,7 +326,8 @@ class OpusThread(AbstractThread):
                     mid = 0  # required for mypy checks to pass
                     for _ in range(5):
                         mid = OpusHTTPInterface.start_macro(config.opus.macro_path.root)
-                        time.sleep(5)
+                        if stop_event.wait(5):
+                            return
                         if OpusHTTPInterface.macro_is_running(mid):
                             macro_successfully_started = True
                             break
@@ -421,7 +426,11 @@ class OpusThread(AbstractThread):
                 t2 = time.time()
                 sleep_time = max(5, config.general.seconds_per_core_iteration - (t2 - t1))
                 logger.debug(f"Sleeping {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
+                events = subscription.wait(timeout=sleep_time, stop_event=stop_event)
+                if stop_event.is_set():
+                    return
+                if len(events) > 0:
+                    logger.debug(f"Woken up by event(s): {', '.join(events)}")
 
         except Exception as e:
             logger.exception(e)
@@ -454,14 +463,15 @@ class OpusThread(AbstractThread):
                 if not silence_exception:
                     s.exceptions_state.add_exception(origin="opus", exception=e)
             logger.info("Sleeping 3 minutes until retrying")
-            time.sleep(180)
+            if stop_event.wait(180):
+                return
             logger.info("Stopping thread")
             return
 
     @staticmethod
     def test_setup(
         config: types.Config,
-        state_lock: tum_esm_utils.sqlitelock.SQLiteLock,
+        state_lock: utils.InterProcessLock,
         logger: utils.Logger,
     ) -> None:
         OpusProgram.start(config, state_lock, logger)
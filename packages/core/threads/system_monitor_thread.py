@@ -25,31 +25,30 @@ class SystemMonitorThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=SystemMonitorThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="system-monitor", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="system-monitor", just_print=headless)
         logger.info("Starting System Monitor thread")
         activity_history_interface = interfaces.ActivityHistoryInterface(logger)
         thread_start_time = time.time()
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         while True:
@@ -163,7 +162,8 @@ class SystemMonitorThread(AbstractThread):
                 # SLEEP FOR 30 SECONDS
 
                 logger.debug("Sleeping 30 seconds")
-                time.sleep(30)
+                if stop_event.wait(30):
+                    return
 
             except Exception as e:
                 logger.exception(e)
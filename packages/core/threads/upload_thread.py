@@ -4,7 +4,6 @@ import time
 from typing import Optional
 
 import circadian_scp_upload
-import tum_esm_utils
 
 from packages.core import interfaces, types, utils
 
@@ -20,6 +19,10 @@ class UploadThread(AbstractThread):
     logger_origin = "upload-thread"
     last_measurement_time: Optional[datetime.datetime] = None
 
+    # the state loaded by `should_be_running` and the versions of the
+    # state sections it depends on
+    state_cache: Optional[tuple[tuple[int, ...], types.StateObject]] = None
+
     @staticmethod
     def should_be_running(
         config: types.Config,
@@ -27,17 +30,25 @@ class UploadThread(AbstractThread):
     ) -> bool:
         """Based on the config, should the thread be running or not?"""
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         # only upload when upload is configured
         if config.upload is None:
             return False
 
-        current_state = interfaces.StateInterface.load_state(state_lock, logger)
+        state_versions = tuple(
+            interfaces.StateInterface.get_version(section)
+            for section in ["measurements_should_be_running", "position", "exceptions_state"]
+        )
+        if (UploadThread.state_cache is None) or (UploadThread.state_cache[0] != state_versions):
+            UploadThread.state_cache = (
+                state_versions,
+                interfaces.StateInterface.load_state(state_lock, logger),
+            )
+        current_state = UploadThread.state_cache[1]
         should_be_running: bool = True
         if current_state.measurements_should_be_running:
             UploadThread.last_measurement_time = datetime.datetime.now()
@@ -75,31 +86,30 @@ class UploadThread(AbstractThread):
 
     @staticmethod
     def get_new_thread_object(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
     ) -> threading.Thread:
         """Return a new thread object that is to be started."""
         return threading.Thread(
             target=UploadThread.main,
             daemon=True,
-            args=(logs_lock,),
+            args=(stop_event,),
         )
 
     @staticmethod
     def main(
-        logs_lock: threading.Lock,
+        stop_event: threading.Event,
         headless: bool = False,
     ) -> None:
         """Main entrypoint of the thread. In headless mode,
         don't write to log files but print to console."""
 
-        logger = utils.Logger(origin="upload", lock=logs_lock, just_print=headless)
+        logger = utils.Logger(origin="upload", just_print=headless)
         logger.info("Starting Upload thread")
         thread_start_time = time.time()
 
-        state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+        state_lock = utils.InterProcessLock(
             filepath=interfaces.state_interface.STATE_LOCK_PATH,
             timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-            poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
         )
 
         config = types.Config.load()
@@ -107,6 +117,10 @@ class UploadThread(AbstractThread):
 
         def upload_should_abort(silent: bool = False) -> bool:
             """Update the config from the main thread."""
+            if stop_event.is_set():
+                if not silent:
+                    logger.info("upload thread has been requested to stop")
+                return True
             new_config = types.Config.load()
             upload_config_has_changed = new_config.upload != config.upload
             thread_should_not_be_running = not UploadThread.should_be_running(new_config, logger)
@@ -132,7 +146,8 @@ class UploadThread(AbstractThread):
 
                 if config.general.test_mode:
                     logger.info("upload is skipped in test mode")
-                    time.sleep(15)
+                    if stop_event.wait(15):
+                        return
                     continue
 
                 with circadian_scp_upload.client.RemoteConnection(
@@ -195,7 +210,8 @@ class UploadThread(AbstractThread):
                             logger.info("stopping upload thread")
                             return
 
-                        time.sleep(10)
+                        if stop_event.wait(10):
+                            return
 
                     # trying again at 1am because then new directories could be uploaded
                     if waiting_start_time.hour == 0 and datetime.datetime.now().hour == 1:
@@ -222,7 +238,8 @@ class UploadThread(AbstractThread):
                             logger.info("stopping upload thread")
                             return
 
-                        time.sleep(10)
+                        if stop_event.wait(10):
+                            return
 
                 logger.info("stopping upload thread")
                 return
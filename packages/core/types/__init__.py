@@ -1,4 +1,5 @@
 from .activity_history import ActivityHistory as ActivityHistory
+from .activity_history import ActivityHistoryPeriod as ActivityHistoryPeriod
 from .plc_specification import PLCSpecification as PLCSpecification
 from .plc_specification import PLCSpecificationActors as PLCSpecificationActors
 from .plc_specification import PLCSpecificationConnections as PLCSpecificationConnections
@@ -11,6 +12,7 @@ from .config import Config as Config
 from .config import PartialConfig as PartialConfig
 
 from .state import ExceptionStateItem as ExceptionStateItem
+from .state import HeliosState as HeliosState
 from .state import OperatingSystemState as OperatingSystemState
 from .state import Position as Position
 from .state import StateObject as StateObject
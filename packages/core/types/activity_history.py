@@ -11,3 +11,23 @@ class ActivityHistory(pydantic.BaseModel):
     opus_startups: list[int] = [0] * 24 * 60
     cli_calls: list[int] = [0] * 24 * 60
     is_uploading: list[int] = [0] * 24 * 60
+
+
+class ActivityHistoryPeriod(pydantic.BaseModel):
+    """Aggregated activity of a minute, hour, day or month. The fractions
+    are relative to the minutes of the period inside the queried range;
+    minutes without a record count as not running."""
+
+    start: datetime.datetime
+    minutes: int
+    running_minutes: int
+    measuring_minutes: int
+    error_minutes: int
+    uploading_minutes: int
+    camtracker_startups: int
+    opus_startups: int
+    cli_calls: int
+    uptime_fraction: float
+    measuring_fraction: float
+    error_fraction: float
+    uploading_fraction: float
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import contextlib
 import datetime
+import hashlib
 import os
+import threading
+import time
 from typing import Any, Generator, Literal, Optional
 
 import filelock
@@ -24,6 +27,14 @@ _PROJECT_DIR = tum_esm_utils.files.get_parent_dir_path(__file__, current_depth=4
 _CONFIG_FILE_PATH = os.path.join(_PROJECT_DIR, "config", "config.json")
 _CONFIG_LOCK_PATH = os.path.join(_PROJECT_DIR, "config", ".config.lock")
 
+# how often `Config.wait_for_change` checks the config file for changes
+CONFIG_WATCH_INTERVAL = 1
+
+# file modification times closer than this to the current time are not
+# trusted for detecting changes, because some file systems only have a
+# resolution of a few seconds - the content hash is compared instead
+_CONFIG_MTIME_RESOLUTION = 2
+
 
 class TimeDict(StricterBaseModel):
     hour: int = pydantic.Field(..., ge=0, le=23)
@@ -198,6 +209,11 @@ class HeliosConfig(StricterBaseModel):
     camera_contrast: int = pydantic.Field(..., ge=-1000, le=1000)
     save_images_to_archive: bool
     save_current_image: bool
+    camera_backend: Literal["opencv", "file", "synthetic"] = "opencv"
+    camera_source: Optional[str] = None
+    edge_detection_resolution: Literal["full", "half", "quarter"] = "full"
+    edge_detection_engine: Literal["skimage", "opencv"] = "skimage"
+    image_archive_format: Literal["jpeg", "container"] = "jpeg"
 
 
 class PartialHeliosConfig(StricterBaseModel):
@@ -214,6 +230,11 @@ class PartialHeliosConfig(StricterBaseModel):
     camera_contrast: Optional[int] = pydantic.Field(None, ge=-1000, le=1000)
     save_images_to_archive: Optional[bool] = None
     save_current_image: Optional[bool] = None
+    camera_backend: Optional[Literal["opencv", "file", "synthetic"]] = None
+    camera_source: Optional[str] = None
+    edge_detection_resolution: Optional[Literal["full", "half", "quarter"]] = None
+    edge_detection_engine: Optional[Literal["skimage", "opencv"]] = None
+    image_archive_format: Optional[Literal["jpeg", "container"]] = None
 
 
 class UploadStreamConfig(StricterBaseModel):
@@ -248,6 +269,140 @@ class PartialUploadConfig(StricterBaseModel):
     streams: Optional[list[UploadStreamConfig]] = None
 
 
+def _validate_config(
+    config_object: str | bytes | dict[Any, Any],
+    ignore_path_existence: bool,
+) -> Config:
+    """Validate a config object and raise a `ValueError` with readable
+    error messages if it is invalid."""
+
+    try:
+        if isinstance(config_object, dict):
+            return Config.model_validate(
+                config_object,
+                context={"ignore-path-existence": ignore_path_existence},
+            )
+        else:
+            return Config.model_validate_json(
+                config_object,
+                context={"ignore-path-existence": ignore_path_existence},
+            )
+    except pydantic.ValidationError as e:
+        pretty_errors: list[str] = []
+        for er in e.errors():
+            location = ".".join([str(err) for err in er["loc"]])
+            message = er["msg"]
+            value = er["input"]
+            pretty_errors.append(f"Error in {location}: {message} (value: {value})")
+
+        # the "from None" suppresses the pydantic exception
+        raise ValueError("Config is invalid:\n" + ",\n".join(pretty_errors)) from None
+
+
+class _ConfigCache:
+    """The content of the config file last seen by this process and
+    the config objects validated from it (one per value of
+    `ignore_path_existence`)."""
+
+    def __init__(self) -> None:
+        self.file_signature: Optional[tuple[int, int]] = None
+        self.content: Optional[bytes] = None
+        self.content_hash: Optional[str] = None
+        self.version: int = 0
+        self.configs: dict[bool, Config] = {}
+
+
+_config_cache = _ConfigCache()
+_config_cache_condition = threading.Condition()
+
+
+def _check_config_file(with_filelock: bool = True) -> None:
+    """Read the config file if its modification time or size has changed
+    (or if it has just been modified) and increment the version if its
+    content hash has changed. Must be called with `_config_cache_condition`
+    held. Raises `FileNotFoundError` if the config file does not exist."""
+
+    s = os.stat(_CONFIG_FILE_PATH)
+    file_signature = (s.st_mtime_ns, s.st_size)
+    if (file_signature == _config_cache.file_signature) and (
+        (time.time() - (s.st_mtime_ns / 1e9)) > _CONFIG_MTIME_RESOLUTION
+    ):
+        return
+
+    if with_filelock:
+        with filelock.FileLock(_CONFIG_LOCK_PATH, timeout=10):
+            with open(_CONFIG_FILE_PATH, "rb") as f:
+                content = f.read()
+    else:
+        with open(_CONFIG_FILE_PATH, "rb") as f:
+            content = f.read()
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    _config_cache.file_signature = file_signature
+    if content_hash != _config_cache.content_hash:
+        _config_cache.content = content
+        _config_cache.content_hash = content_hash
+        _config_cache.version += 1
+        _config_cache.configs = {}
+        _config_cache_condition.notify_all()
+
+
+# frozen variant of every model class used in the config
+_frozen_model_classes: dict[type[pydantic.BaseModel], type[pydantic.BaseModel]] = {}
+
+
+def _freeze_model(model: pydantic.BaseModel) -> None:
+    """Make the model and all nested models immutable by switching them
+    to a frozen subclass of their class. Assigning to a field then raises
+    a `pydantic.ValidationError`. The frozen variants declare their class
+    as their origin, so they still compare equal to mutable instances."""
+
+    model_class = type(model)
+    if model_class.model_config.get("frozen", False):
+        return
+    frozen_model_class = _frozen_model_classes.get(model_class)
+    if frozen_model_class is None:
+        frozen_model_class = type(
+            model_class.__name__,
+            (model_class,),
+            {
+                "__module__": model_class.__module__,
+                "model_config": {**model_class.model_config, "frozen": True},
+            },
+        )
+        frozen_model_class.__pydantic_generic_metadata__ = {
+            **frozen_model_class.__pydantic_generic_metadata__,
+            "origin": model_class,
+        }
+        _frozen_model_classes[model_class] = frozen_model_class
+
+    for field_name in model_class.model_fields.keys():
+        value: Any = getattr(model, field_name)
+        items: list[Any] = [value]
+        if isinstance(value, list):
+            items = value  # pyright: ignore[reportUnknownVariableType]
+        for item in items:
+            if isinstance(item, pydantic.BaseModel):
+                _freeze_model(item)
+    object.__setattr__(model, "__class__", frozen_model_class)
+
+
+def _load_cached_config(with_filelock: bool, ignore_path_existence: bool) -> Config:
+    """Return the validated config object of the current config file
+    content. Only validates the config again if the content has changed.
+    The returned object is shared by all threads and therefore frozen."""
+
+    with _config_cache_condition:
+        _check_config_file(with_filelock)
+        config = _config_cache.configs.get(ignore_path_existence, None)
+        if config is None:
+            assert _config_cache.content is not None
+            config = _validate_config(_config_cache.content, ignore_path_existence)
+            _freeze_model(config)
+            _config_cache.configs[ignore_path_existence] = config
+        return config
+
+
 class Config(StricterBaseModel):
     general: GeneralConfig
     opus: OpusConfig
@@ -268,6 +423,13 @@ class Config(StricterBaseModel):
     ) -> Config:
         """Load the config file.
 
+        The config file is only read and validated again when its content
+        has changed. Otherwise, the config object from the previous call
+        is returned - it is shared within the process and therefore frozen:
+        assigning to any of its fields raises a `pydantic.ValidationError`.
+        Use `update_in_context` to change the config file. Config objects
+        loaded from a given `config_object` are not frozen.
+
         Args:
             config_object:          If provided, the config file will be ignored and
                                     the provided content will be used instead. Defaults
@@ -284,42 +446,38 @@ class Config(StricterBaseModel):
             ValueError:  If the config file is invalid.
         """
 
-        try:
-            if config_object is not None:
-                if isinstance(config_object, dict):
-                    return Config.model_validate(
-                        config_object,
-                        context={"ignore-path-existence": ignore_path_existence},
-                    )
-                else:
-                    return Config.model_validate_json(
-                        config_object,
-                        context={"ignore-path-existence": ignore_path_existence},
-                    )
-            else:
-
-                def _read() -> Config:
-                    with open(_CONFIG_FILE_PATH) as f:
-                        return Config.model_validate_json(
-                            f.read(),
-                            context={"ignore-path-existence": ignore_path_existence},
-                        )
-
-                if with_filelock:
-                    with filelock.FileLock(_CONFIG_LOCK_PATH, timeout=10):
-                        return _read()
-                else:
-                    return _read()
-        except pydantic.ValidationError as e:
-            pretty_errors: list[str] = []
-            for er in e.errors():
-                location = ".".join([str(err) for err in er["loc"]])
-                message = er["msg"]
-                value = er["input"]
-                pretty_errors.append(f"Error in {location}: {message} (value: {value})")
+        if config_object is None:
+            return _load_cached_config(with_filelock, ignore_path_existence)
 
-            # the "from None" suppresses the pydantic exception
-            raise ValueError("Config is invalid:\n" + ",\n".join(pretty_errors)) from None
+        return _validate_config(config_object, ignore_path_existence)
+
+    @staticmethod
+    def get_version() -> int:
+        """Return a number that is incremented whenever the content of
+        the config file changes. Only checks the file's modification time
+        and size unless the file has just been written."""
+
+        with _config_cache_condition:
+            _check_config_file()
+            return _config_cache.version
+
+    @staticmethod
+    def wait_for_change(version: int, timeout: float) -> bool:
+        """Block until the config file content differs from `version` (as
+        returned by `get_version`) or the timeout has passed. Returns True
+        if the config has changed. Waiting threads are woken up as soon as
+        any thread of the process loads the changed config."""
+
+        deadline = time.time() + timeout
+        with _config_cache_condition:
+            while True:
+                _check_config_file()
+                if _config_cache.version != version:
+                    return True
+                remaining_time = deadline - time.time()
+                if remaining_time <= 0:
+                    return False
+                _config_cache_condition.wait(min(remaining_time, CONFIG_WATCH_INTERVAL))
 
     def dump(self, with_filelock: bool = True) -> None:
         if with_filelock:
@@ -81,6 +81,74 @@ class ExceptionsState(StricterBaseModel):
         return any(e.subject == subject for e in self.current)
 
 
+# the Helios timeseries aggregates the edge fractions of 5 minutes into
+# one bucket and keeps the buckets of the last 24 hours
+HELIOS_TIMESERIES_BUCKET_SECONDS = 300
+HELIOS_TIMESERIES_DURATION_SECONDS = 86400
+
+
+class HeliosTimeseriesBucket(StricterBaseModel):
+    start_time: float
+    count: int
+    mean_edge_fraction: float
+    min_edge_fraction: float
+    max_edge_fraction: float
+    good_conditions: Optional[bool] = pydantic.Field(
+        default=None, description="Helios state after the last edge fraction of the bucket."
+    )
+
+
+class HeliosState(StricterBaseModel):
+    last_edge_fraction: Optional[float] = None
+    last_edge_fraction_time: Optional[float] = None
+    window_size: int = pydantic.Field(
+        default=0, description="Number of edge fractions in the evaluation window."
+    )
+    window_mean: Optional[float] = None
+    window_std: Optional[float] = None
+    window_min: Optional[float] = None
+    window_max: Optional[float] = None
+    ewma: Optional[float] = pydantic.Field(
+        default=None, description="Exponentially weighted moving average of the edge fractions."
+    )
+    current_bucket: Optional[HeliosTimeseriesBucket] = None
+    timeseries: list[HeliosTimeseriesBucket] = pydantic.Field(
+        default=[], description="Completed buckets of the last 24 hours, oldest first."
+    )
+
+    def add_to_timeseries(
+        self, edge_fraction: float, now: float, good_conditions: Optional[bool]
+    ) -> None:
+        """Add an edge fraction to the current bucket. When a new bucket
+        starts, the current one is moved to the timeseries - so that the
+        timeseries only changes every 5 minutes."""
+
+        start_time = now - (now % HELIOS_TIMESERIES_BUCKET_SECONDS)
+        bucket = self.current_bucket
+        if (bucket is not None) and (bucket.start_time != start_time):
+            self.timeseries = [
+                b
+                for b in self.timeseries
+                if b.start_time > (start_time - HELIOS_TIMESERIES_DURATION_SECONDS)
+            ] + [bucket]
+            bucket = None
+        if bucket is None:
+            self.current_bucket = HeliosTimeseriesBucket(
+                start_time=start_time,
+                count=1,
+                mean_edge_fraction=edge_fraction,
+                min_edge_fraction=edge_fraction,
+                max_edge_fraction=edge_fraction,
+                good_conditions=good_conditions,
+            )
+        else:
+            bucket.count += 1
+            bucket.mean_edge_fraction += (edge_fraction - bucket.mean_edge_fraction) / bucket.count
+            bucket.min_edge_fraction = min(bucket.min_edge_fraction, edge_fraction)
+            bucket.max_edge_fraction = max(bucket.max_edge_fraction, edge_fraction)
+            bucket.good_conditions = good_conditions
+
+
 class ActivityState(StricterBaseModel):
     cli_calls: int = 0
     camtracker_startups: int = 0
@@ -95,6 +163,7 @@ class ActivityState(StricterBaseModel):
 class StateObject(StricterBaseModel):
     last_updated: datetime.datetime
     helios_indicates_good_conditions: Optional[Literal["yes", "no", "inconclusive"]] = None
+    helios_state: HeliosState = HeliosState()
     position: Position = Position()
     measurements_should_be_running: Optional[bool] = None
     last_bad_weather_detection: Optional[float] = None
@@ -110,6 +179,7 @@ class StateObject(StricterBaseModel):
     def reset(self) -> None:
         """Reset the state object to its initial values but keep the exceptions."""
         self.helios_indicates_good_conditions = None
+        self.helios_state = HeliosState()
         self.position = Position()
         self.measurements_should_be_running = None
         self.last_bad_weather_detection = None
@@ -3,8 +3,17 @@ from .exception_email_client import ExceptionEmailClient as ExceptionEmailClient
 from .functions import read_last_file_line as read_last_file_line
 from .functions import find_most_recent_files as find_most_recent_files
 from .functions import parse_verbal_timedelta_string as parse_verbal_timedelta_string
+from .helios_archive import HeliosArchive as HeliosArchive
+from .helios_archive import HeliosArchiveRecord as HeliosArchiveRecord
 from .helios_image_processing import HeliosImageProcessing as HeliosImageProcessing
+from .helios_image_writer import HeliosImageWriter as HeliosImageWriter
 from .old_helios_image_processing import OldHeliosImageProcessing as OldHeliosImageProcessing
 from .logger import Logger as Logger
+from .lock_metrics import LockMetrics as LockMetrics
+from .interprocess_lock import InterProcessLock as InterProcessLock
+from .statistics_ring import StatisticsRing as StatisticsRing
 from .enclosure_logger import TUMEnclosureLogger as TUMEnclosureLogger
 from .enclosure_logger import AEMETEnclosureLogger as AEMETEnclosureLogger
+from .event_bus import EventBus as EventBus
+from .event_bus import EventSubscription as EventSubscription
+from .log_index import LogIndex as LogIndex
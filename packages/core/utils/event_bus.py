@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+# number of times each topic has been published
+_counters: dict[str, int] = {}
+_condition = threading.Condition()
+
+
+class EventBus:
+    """Process-wide publish/subscribe mechanism to wake up threads
+    as soon as something relevant to them has happened.
+
+    Events are plain topic names like `"config"` or
+    `"state.measurements_should_be_running"`. The bus only counts how
+    often each topic has been published, so publishing is cheap and
+    events are never lost: a subscriber that is busy when an event
+    is published will see it on its next `wait`.
+
+    Example:
+
+    ```python
+    subscription = utils.EventBus.subscribe("config", "state.measurements_should_be_running")
+    while True:
+        ...  # do work
+        subscription.wait(timeout=30)  # wakes up early on one of the events
+    ```"""
+
+    @staticmethod
+    def publish(topic: str) -> None:
+        """Wake up all subscribers of the topic."""
+
+        with _condition:
+            _counters[topic] = _counters.get(topic, 0) + 1
+            _condition.notify_all()
+
+    @staticmethod
+    def notify_stop(stop_event: threading.Event) -> None:
+        """Set the stop event and wake up the subscribers waiting with it."""
+
+        with _condition:
+            stop_event.set()
+            _condition.notify_all()
+
+    @staticmethod
+    def subscribe(*topics: str) -> EventSubscription:
+        """Subscribe to the given topics. Only events published after
+        this call are returned by the subscription's `wait`."""
+
+        return EventSubscription(topics)
+
+
+class EventSubscription:
+    def __init__(self, topics: tuple[str, ...]) -> None:
+        self.topics = topics
+        with _condition:
+            self.seen_counters: dict[str, int] = {t: _counters.get(t, 0) for t in topics}
+
+    def _collect_events(self) -> list[str]:
+        """Return the topics published since the last call and mark them
+        as seen. Must be called with the event bus condition held."""
+
+        events: list[str] = []
+        for topic in self.topics:
+            counter = _counters.get(topic, 0)
+            if counter != self.seen_counters[topic]:
+                events.append(topic)
+                self.seen_counters[topic] = counter
+        return events
+
+    def wait(
+        self,
+        timeout: Optional[float],
+        stop_event: Optional[threading.Event] = None,
+    ) -> list[str]:
+        """Block until one of the subscribed topics has been published
+        or the timeout has passed. Events published since the last `wait`
+        return immediately. Returns the published topics, an empty list
+        means that the timeout has been reached.
+
+        If a `stop_event` is given, this also returns as soon as it is
+        set and `EventBus.notify_stop()` has been called."""
+
+        deadline = None if timeout is None else (time.time() + timeout)
+        with _condition:
+            while True:
+                events = self._collect_events()
+                if len(events) > 0:
+                    return events
+                if (stop_event is not None) and stop_event.is_set():
+                    return []
+                if deadline is None:
+                    _condition.wait()
+                else:
+                    remaining_time = deadline - time.time()
+                    if remaining_time <= 0:
+                        return []
+                    _condition.wait(remaining_time)
@@ -0,0 +1,230 @@
+"""Append-only daily container for the archived Helios images.
+
+One file per day (`logs/helios/%Y%m%d.helios`) replaces the directory of
+JPEG pairs. Each record consists of a fixed-size header, the JSON metadata,
+the downscaled brightness normalized frame as a grayscale JPEG and the
+bit-packed and compressed edge mask within the lense bounding box:
+
+```
+| magic (4 bytes) | metadata length | frame length | mask length | (uint32, little endian)
+| metadata (JSON) | frame (JPEG) | mask (np.packbits, zlib) |
+```
+
+The annotated view is not stored but rendered from the record when needed
+(see `HeliosImageProcessing.render_archive_record`). The daily files can be
+uploaded with a "files" upload stream with the `dated_regex` `^%Y%m%d\\.helios$`."""
+
+import datetime
+import os
+import struct
+import zlib
+from typing import Any, Generator, Optional
+
+import cv2 as cv
+import numpy as np
+import pydantic
+
+_RECORD_MAGIC = b"HLX1"
+_RECORD_HEADER = struct.Struct("<4sIII")
+
+# the frame is stored at this scale of the evaluated frame, the edge mask
+# at full scale because the sparse mask compresses well
+HELIOS_ARCHIVE_FRAME_SCALE = 0.5
+HELIOS_ARCHIVE_JPEG_QUALITY = 90
+
+# end of the last complete record of each file this process has appended to
+_valid_file_sizes: dict[str, int] = {}
+
+
+class HeliosArchiveMetadata(pydantic.BaseModel):
+    time: datetime.datetime
+    station_id: str
+    frame_shape: tuple[int, int]  # (height, width) of the evaluated frame
+    lense_circle: tuple[int, int, int]  # (x, y, r) in the evaluated frame
+    exposure: Optional[int]
+    edge_fraction: float
+    mask_box: tuple[int, int, int, int]  # (y0, y1, x0, x1) of the edge mask
+
+
+class HeliosArchiveRecord(pydantic.BaseModel):
+    offset: int  # byte offset of the record in the daily file
+    metadata: HeliosArchiveMetadata
+    frame_jpeg: bytes
+    packed_edge_mask: bytes
+
+    def get_frame(self) -> np.ndarray[Any, Any]:
+        """The brightness normalized grayscale frame (uint8), scaled back to
+        the shape of the evaluated frame."""
+
+        frame: np.ndarray[Any, Any] = cv.imdecode(
+            np.frombuffer(self.frame_jpeg, dtype=np.uint8), cv.IMREAD_GRAYSCALE
+        )
+        height, width = self.metadata.frame_shape
+        if frame.shape != (height, width):
+            frame = cv.resize(frame, (width, height), interpolation=cv.INTER_LINEAR)
+        return frame
+
+    def get_edge_mask(self) -> np.ndarray[Any, Any]:
+        """The dilated edges (uint8, 0 or 1) in the shape of the evaluated frame."""
+
+        y0, y1, x0, x1 = self.metadata.mask_box
+        edges = np.zeros(self.metadata.frame_shape, dtype=np.uint8)
+        bits = np.unpackbits(np.frombuffer(zlib.decompress(self.packed_edge_mask), dtype=np.uint8))
+        edges[y0:y1, x0:x1] = bits[: (y1 - y0) * (x1 - x0)].reshape(y1 - y0, x1 - x0)
+        return edges
+
+
+class HeliosArchive:
+    """Reads and appends records of the daily Helios archive files.
+
+    Records are only appended by the Helios image writer thread. A record
+    that has been cut off (e.g. by a power loss) is ignored by the readers
+    and overwritten by the next append."""
+
+    @staticmethod
+    def get_path(image_directory: str, timestamp: datetime.datetime) -> str:
+        """The daily file next to where the daily image directory would be,
+        i.e. `logs/helios/%Y%m%d` -> `logs/helios/20240501.helios`."""
+
+        return os.path.join(
+            os.path.dirname(image_directory),
+            timestamp.strftime(os.path.basename(image_directory)) + ".helios",
+        )
+
+    @staticmethod
+    def append(
+        path: str,
+        frame: np.ndarray[Any, Any],
+        crop: tuple[slice, slice],
+        cropped_edges: np.ndarray[Any, Any],
+        edge_fraction: float,
+        lense_circle: tuple[int, int, int],
+        timestamp: datetime.datetime,
+        station_id: str,
+        exposure: Optional[int] = None,
+    ) -> None:
+        """Append the evaluated (brightness normalized, grayscale) frame and
+        its edges within the `crop` of the lense to the daily file."""
+
+        height, width = frame.shape[:2]
+        y0, y1, _ = crop[0].indices(height)
+        x0, x1, _ = crop[1].indices(width)
+        metadata = HeliosArchiveMetadata(
+            time=timestamp,
+            station_id=station_id,
+            frame_shape=(height, width),
+            lense_circle=lense_circle,
+            exposure=exposure,
+            edge_fraction=edge_fraction,
+            mask_box=(y0, y1, x0, x1),
+        )
+        small_frame = cv.resize(
+            np.clip(frame, 0, 255).astype(np.uint8),
+            (
+                max(round(width * HELIOS_ARCHIVE_FRAME_SCALE), 1),
+                max(round(height * HELIOS_ARCHIVE_FRAME_SCALE), 1),
+            ),
+            interpolation=cv.INTER_AREA,
+        )
+        success, frame_jpeg = cv.imencode(
+            ".jpg", small_frame, [cv.IMWRITE_JPEG_QUALITY, HELIOS_ARCHIVE_JPEG_QUALITY]
+        )
+        if not success:
+            raise RuntimeError("could not encode Helios frame")
+
+        metadata_bytes = metadata.model_dump_json().encode()
+        frame_bytes = frame_jpeg.tobytes()
+        mask_bytes = zlib.compress(np.packbits(cropped_edges != 0).tobytes())
+        record = (
+            _RECORD_HEADER.pack(
+                _RECORD_MAGIC, len(metadata_bytes), len(frame_bytes), len(mask_bytes)
+            )
+            + metadata_bytes
+            + frame_bytes
+            + mask_bytes
+        )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            # the file is new to this process, has been changed by someone
+            # else or the last append has been cut off -> drop a cut off
+            # record at the end of the file
+            if f.tell() != _valid_file_sizes.get(path):
+                index = HeliosArchive.get_index(path)
+                _valid_file_sizes[path] = index[-1][1] if len(index) > 0 else 0
+                if f.tell() != _valid_file_sizes[path]:
+                    f.truncate(_valid_file_sizes[path])
+                    f.seek(_valid_file_sizes[path])
+            f.write(record)
+        _valid_file_sizes[path] += len(record)
+
+    @staticmethod
+    def get_index(path: str) -> list[tuple[int, int]]:
+        """Returns the (start, end) byte offsets of all complete records by
+        reading only their headers."""
+
+        index: list[tuple[int, int]] = []
+        if not os.path.isfile(path):
+            return index
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                magic, *lengths = _RECORD_HEADER.unpack(header)
+                end = offset + _RECORD_HEADER.size + sum(lengths)
+                if (magic != _RECORD_MAGIC) or (end > file_size):
+                    break
+                index.append((offset, end))
+                offset = end
+                f.seek(offset)
+        return index
+
+    @staticmethod
+    def read(path: str, offset: int) -> HeliosArchiveRecord:
+        """Read the record starting at the given byte offset."""
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            record = HeliosArchive._read_record(f, offset)
+        if record is None:
+            raise ValueError(f"no complete Helios archive record at {path}:{offset}")
+        return record
+
+    @staticmethod
+    def iterate(path: str, start_offset: int = 0) -> Generator[HeliosArchiveRecord, None, None]:
+        """Stream the complete records of a daily file in the order they
+        have been written, starting at the given byte offset (e.g. the
+        `offset` of the last record already processed)."""
+
+        if not os.path.isfile(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(start_offset)
+            offset = start_offset
+            while True:
+                record = HeliosArchive._read_record(f, offset)
+                if record is None:
+                    return
+                yield record
+                offset = f.tell()
+
+    @staticmethod
+    def _read_record(f: Any, offset: int) -> Optional[HeliosArchiveRecord]:
+        header = f.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return None
+        magic, metadata_length, frame_length, mask_length = _RECORD_HEADER.unpack(header)
+        if magic != _RECORD_MAGIC:
+            return None
+        body: bytes = f.read(metadata_length + frame_length + mask_length)
+        if len(body) < metadata_length + frame_length + mask_length:
+            return None
+        return HeliosArchiveRecord(
+            offset=offset,
+            metadata=HeliosArchiveMetadata.model_validate_json(body[:metadata_length]),
+            frame_jpeg=body[metadata_length : metadata_length + frame_length],
+            packed_edge_mask=body[metadata_length + frame_length :],
+        )
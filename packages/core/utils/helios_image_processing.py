@@ -1,16 +1,49 @@
 # pyright: reportUnknownMemberType=false, reportUnknownVariableType=false, reportUnknownArgumentType=false
 
 import datetime
+import math
 import os
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 from PIL import Image, ImageDraw
+import cv2 as cv
 import skimage
 import numpy as np
 
+from .helios_archive import HeliosArchive, HeliosArchiveRecord
+from .helios_image_writer import HeliosImageWriter
+
 _dir = os.path.dirname
 _PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
 _LOGS_DIR = os.path.join(_PROJECT_DIR, "logs")
 
+_CANNY_SIGMA = 7
+
+# maximum distance (in pixels) of the lense center and radius from the
+# previous lense position when searching with a `previous_lense`
+LENSE_SEARCH_WINDOW = 16
+_DILATION_FOOTPRINT = np.asarray(skimage.morphology.disk(2), dtype=np.uint8)
+
+# scale of the frame for the edge detection: sigma, dilation radius and
+# thresholds are scaled accordingly (see `_get_dilated_edges`)
+EDGE_DETECTION_SCALES: dict[str, float] = {"full": 1.0, "half": 0.5, "quarter": 0.25}
+_DILATION_FOOTPRINTS = {r: np.asarray(skimage.morphology.disk(r), dtype=np.uint8) for r in range(3)}
+
+# pixels around the inner lense circle needed to compute the edges inside
+# of it like on the full frame: gaussian kernel radius (truncated at 4 sigma),
+# sobel operator, non-maximum suppression and dilation
+_CROP_MARGIN = math.ceil(4 * _CANNY_SIGMA) + 4
+
+# the lense circle changes at most every 3 minutes (see `LenseFinder`)
+_MASK_CACHE_SIZE = 8
+_mask_cache: dict[
+    tuple[tuple[int, int], tuple[int, int, int]],
+    tuple[tuple[slice, slice], np.ndarray[Any, Any]],
+] = {}
+_overlay_cache: dict[
+    tuple[tuple[int, int], tuple[int, int, int]],
+    tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]],
+] = {}
+
 
 class HeliosImageProcessing:
     """Class for processing images from the Helios camera.
@@ -20,35 +53,103 @@ class HeliosImageProcessing:
 
     @staticmethod
     def _get_lense_crop_contrast(
-        image: np.ndarray[Any, Any],
+        row_cumsum: np.ndarray[Any, Any],
         cx: float,
         cy: float,
         radius: float,
     ) -> float:
         """If you cut the image into two parts given a circle with center cx, cy and radius,
-        this function returns the difference in mean color between the two parts."""
-
-        rr, cc = skimage.draw.disk((cy, cx), radius, shape=image.shape)
-        inner_mask: np.ndarray[Any, Any] = np.zeros(image.shape, dtype=np.uint8)
-        inner_mask[rr, cc] = 1
-        outer_mask: np.ndarray[Any, Any] = np.ones(image.shape, dtype=np.uint8) - inner_mask
-        return float(
-            abs(
-                (np.sum(image * inner_mask) / np.sum(inner_mask))
-                - (np.sum(image * outer_mask) / np.sum(outer_mask))
-            )
+        this function returns the difference in mean color between the two parts.
+
+        `row_cumsum` is the cumulative sum of the image along its rows with a leading
+        column of zeros. The sum inside of the circle is computed from the column span
+        of each row, so only `2 * radius` values are read per circle. The pixels inside
+        of the circle are the same as in `skimage.draw.disk`."""
+
+        height: int = row_cumsum.shape[0]
+        width: int = row_cumsum.shape[1] - 1
+        rows: np.ndarray[Any, Any] = np.arange(
+            max(0, math.ceil(cy - radius)), min(height - 1, math.floor(cy + radius)) + 1
         )
+        half_widths = radius * np.sqrt(np.clip(1 - ((rows - cy) / radius) ** 2, 0, None))
+        first_columns = np.clip(np.floor(cx - half_widths).astype(int) + 1, 0, width)
+        last_columns = np.clip(np.ceil(cx + half_widths).astype(int) - 1, -1, width - 1)
+        non_empty_rows = last_columns >= first_columns
+
+        rows = rows[non_empty_rows]
+        first_columns = first_columns[non_empty_rows]
+        last_columns = last_columns[non_empty_rows]
+        inner_count = int(np.sum(last_columns - first_columns + 1))
+        outer_count = height * width - inner_count
+        if inner_count == 0 or outer_count == 0:
+            return 0.0
+
+        inner_sum = float(
+            np.sum(row_cumsum[rows, last_columns + 1] - row_cumsum[rows, first_columns])
+        )
+        outer_sum = float(np.sum(row_cumsum[:, -1])) - inner_sum
+        return abs((inner_sum / inner_count) - (outer_sum / outer_count))
+
+    @staticmethod
+    def _get_hough_circle_peaks(
+        hough_res: np.ndarray[Any, Any],
+        radii: np.ndarray[Any, Any],
+        total_num_peaks: int,
+        min_distance: int = 2,
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """Like `skimage.transform.hough_circle_peaks`: local maxima above half of the
+        maximum of each radius, sorted by their accumulator value. Peaks closer than
+        `min_distance` in x and y to a higher peak are dropped. Returns cx, cy, radii.
+
+        The local maxima are found with a maximum filter (`cv.dilate`) on all
+        accumulators instead of iterating over the peaks of every radius."""
+
+        kernel = np.ones((2 * min_distance + 1, 2 * min_distance + 1), dtype=np.uint8)
+        values: list[np.ndarray[Any, Any]] = []
+        xs: list[np.ndarray[Any, Any]] = []
+        ys: list[np.ndarray[Any, Any]] = []
+        rs: list[np.ndarray[Any, Any]] = []
+        for h, r in zip(hough_res, radii):
+            h = h.astype(np.float32)
+            h_max = float(np.max(h))
+            if h_max <= 0:
+                continue
+            y, x = np.nonzero((h == cv.dilate(h, kernel)) & (h >= 0.5 * h_max))
+            values.append(h[y, x])
+            xs.append(x)
+            ys.append(y)
+            rs.append(np.full(len(x), r))
+        if len(values) == 0:
+            return np.array([]), np.array([]), np.array([])
+
+        value, x, y, r = (np.concatenate(a) for a in (values, xs, ys, rs))
+        order = np.argsort(-value, kind="stable")
+        kept: list[int] = []
+        for i in order:
+            if all(
+                (abs(x[i] - x[j]) > min_distance) or (abs(y[i] - y[j]) > min_distance) for j in kept
+            ):
+                kept.append(int(i))
+                if len(kept) == total_num_peaks:
+                    break
+        return x[kept], y[kept], r[kept]
 
     @staticmethod
     def get_lense_position(
         frame: np.ndarray[Any, Any],
         use_downscaling: bool = False,
+        previous_lense: Optional[tuple[int, int, int]] = None,
     ) -> Optional[tuple[int, int, int]]:
-        """Determine the position of the lense in the image."""
+        """Determine the position of the lense in the image.
+
+        If a `previous_lense` is given, only circles with a center and
+        radius within `LENSE_SEARCH_WINDOW` pixels of it are considered.
+        If none is found there, the whole image is searched."""
 
         bw_frame = skimage.color.rgb2gray(frame)
         if use_downscaling:
             bw_frame = skimage.transform.rescale(bw_frame, 0.5)
+        multiplier = 2 if use_downscaling else 1
 
         # adjust frame color
         bw_frame = bw_frame * (60 / np.mean(bw_frame))
@@ -62,23 +163,40 @@ class HeliosImageProcessing:
         max_lense_size = round(image_height * 0.5 * 1.2)
         lense_radii = np.arange(min_lense_size, max_lense_size, 2)
 
+        # only search close to the previous lense
+        window: tuple[slice, slice] = (slice(None), slice(None))
+        if previous_lense is not None:
+            previous_cx, previous_cy, previous_r = (v / multiplier for v in previous_lense)
+            d = LENSE_SEARCH_WINDOW / multiplier
+            lense_radii = lense_radii[np.abs(lense_radii - previous_r) <= d]
+            window = (
+                slice(max(0, math.floor(previous_cy - d)), max(0, math.ceil(previous_cy + d) + 1)),
+                slice(max(0, math.floor(previous_cx - d)), max(0, math.ceil(previous_cx + d) + 1)),
+            )
+            if len(lense_radii) == 0:
+                return HeliosImageProcessing.get_lense_position(frame, use_downscaling)
+
         # pick the 50 best circles
         hough_res = skimage.transform.hough_circle(edges, lense_radii)
-        _, cx, cy, radii = skimage.transform.hough_circle_peaks(
-            hough_res,
-            lense_radii,
-            min_xdistance=2,
-            min_ydistance=2,
-            total_num_peaks=50,
+        cx, cy, radii = HeliosImageProcessing._get_hough_circle_peaks(
+            hough_res[(slice(None), *window)], lense_radii, total_num_peaks=50
         )
         if len(radii) == 0:
+            if previous_lense is not None:
+                return HeliosImageProcessing.get_lense_position(frame, use_downscaling)
             return None
+        cx = cx + (window[1].start or 0)
+        cy = cy + (window[0].start or 0)
 
         # order the circles based on contrast
+        row_cumsum = np.zeros((bw_frame.shape[0], bw_frame.shape[1] + 1), dtype=np.float64)
+        np.cumsum(bw_frame, axis=1, out=row_cumsum[:, 1:])
         contrasts: list[tuple[float, int]] = sorted(
             zip(
                 [
-                    HeliosImageProcessing._get_lense_crop_contrast(bw_frame, cx[i], cy[i], radii[i])
+                    HeliosImageProcessing._get_lense_crop_contrast(
+                        row_cumsum, cx[i], cy[i], radii[i]
+                    )
                     for i in range(len(radii))
                 ],
                 range(len(radii)),
@@ -92,13 +210,37 @@ class HeliosImageProcessing:
         sorted_ranking = sorted(ranking, key=lambda x: x[0] + x[1])
         best_circle_index = sorted_ranking[0][1]
 
-        multiplier = 2 if use_downscaling else 1
         return (
             round(cx[best_circle_index] * multiplier),
             round(cy[best_circle_index] * multiplier),
             round(radii[best_circle_index] * multiplier),
         )
 
+    @staticmethod
+    def _get_circle_overlays(
+        shape: tuple[int, int],
+        lense_circle: tuple[int, int, int],
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """Returns boolean masks of the (bold) outer lense circle and the
+        inner circle at 90% of its radius. Cached by shape and circle."""
+
+        key = (shape, lense_circle)
+        if key in _overlay_cache:
+            return _overlay_cache[key]
+
+        cx, cy, r = lense_circle
+        overlays: list[np.ndarray[Any, Any]] = []
+        for radius in [r, round(r * 0.9)]:
+            rr, cc = skimage.draw.circle_perimeter(cy, cx, radius, shape=shape)
+            circle = np.zeros(shape, dtype=np.uint8)
+            circle[rr, cc] = 1
+            overlays.append(cv.dilate(circle, _DILATION_FOOTPRINT).astype(bool))
+
+        if len(_overlay_cache) >= _MASK_CACHE_SIZE:
+            del _overlay_cache[next(iter(_overlay_cache))]
+        _overlay_cache[key] = (overlays[0], overlays[1])
+        return _overlay_cache[key]
+
     @staticmethod
     def annotate_processed_image(
         bw_frame: np.ndarray[Any, Any],
@@ -106,37 +248,152 @@ class HeliosImageProcessing:
         circle_cx: int,
         circle_cy: int,
         circle_r: int,
+        timestamp: Optional[datetime.datetime] = None,
     ) -> Image.Image:
-        """Put text for edge fraction and mark circles in image."""
+        """Put text for edge fraction and mark circles in image. The
+        `timestamp` defaults to the current time."""
         rgb_frame = skimage.color.gray2rgb(bw_frame)
 
-        # draw outer circle
-        rr, cc = skimage.draw.circle_perimeter(circle_cy, circle_cx, circle_r, shape=bw_frame.shape)
-        outer_circle = np.zeros(bw_frame.shape, dtype=np.uint8)
-        outer_circle[rr, cc] = 1
-        outer_circle = skimage.morphology.dilation(outer_circle, skimage.morphology.disk(2))
-
-        # draw inner circle
-        rr, cc = skimage.draw.circle_perimeter(
-            circle_cy, circle_cx, round(circle_r * 0.9), shape=bw_frame.shape
+        # draw outer (red) and inner (blue) circle
+        outer_circle, inner_circle = HeliosImageProcessing._get_circle_overlays(
+            bw_frame.shape, (circle_cx, circle_cy, circle_r)
         )
-        inner_circle = np.zeros(bw_frame.shape, dtype=np.uint8)
-        inner_circle[rr, cc] = 1
-        inner_circle = skimage.morphology.dilation(inner_circle, skimage.morphology.disk(2))
-
-        # combine images
-        rgb_frame[:, :, 0] = rgb_frame[:, :, 0] + outer_circle
-        rgb_frame[:, :, 2] = rgb_frame[:, :, 2] + inner_circle
+        rgb_frame[:, :, 0][outer_circle] = 1
+        rgb_frame[:, :, 2][inner_circle] = 1
         rgb_frame[rgb_frame > 1] = 1
 
         # add text
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
         pil_image = Image.fromarray((rgb_frame * 255).astype(np.uint8))
         draw = ImageDraw.Draw(pil_image)
-        draw.text((10, 10), f"{datetime.datetime.now()}", (255, 255, 255), font_size=35)
+        draw.text((10, 10), f"{timestamp}", (255, 255, 255), font_size=35)
         draw.text((10, 50), f"{edge_fraction * 100:.2f}%", (255, 255, 255), font_size=35)
 
         return pil_image
 
+    @staticmethod
+    def render_archive_record(record: HeliosArchiveRecord) -> tuple[Image.Image, Image.Image]:
+        """Render the raw and the processed image of a `HeliosArchive`
+        record like they are saved with the archive format "jpeg"."""
+
+        frame = record.get_frame()
+        raw_image = Image.fromarray(skimage.color.gray2rgb(frame))
+        processed_image = HeliosImageProcessing.annotate_processed_image(
+            record.get_edge_mask(),
+            record.metadata.edge_fraction,
+            *record.metadata.lense_circle,
+            timestamp=record.metadata.time,
+        )
+        return raw_image, processed_image
+
+    @staticmethod
+    def _get_lense_mask(
+        shape: tuple[int, int],
+        lense_circle: tuple[int, int, int],
+    ) -> tuple[tuple[slice, slice], np.ndarray[Any, Any]]:
+        """Returns the bounding box of the inner 90% of the lense circle
+        (plus a margin for the edge detection) and a boolean mask of the
+        inner circle within this bounding box. Cached by shape and circle."""
+
+        key = (shape, lense_circle)
+        if key in _mask_cache:
+            return _mask_cache[key]
+
+        cx, cy, r = lense_circle
+        inner_radius = r * 0.9
+        y_min = min(max(0, math.floor(cy - inner_radius) - _CROP_MARGIN), shape[0])
+        y_max = max(min(shape[0], math.ceil(cy + inner_radius) + _CROP_MARGIN + 1), y_min)
+        x_min = min(max(0, math.floor(cx - inner_radius) - _CROP_MARGIN), shape[1])
+        x_max = max(min(shape[1], math.ceil(cx + inner_radius) + _CROP_MARGIN + 1), x_min)
+
+        inner_mask = np.zeros((y_max - y_min, x_max - x_min), dtype=bool)
+        rr, cc = skimage.draw.disk(
+            center=(cy - y_min, cx - x_min),
+            radius=inner_radius,
+            shape=inner_mask.shape,
+        )
+        inner_mask[rr, cc] = True
+
+        if len(_mask_cache) >= _MASK_CACHE_SIZE:
+            del _mask_cache[next(iter(_mask_cache))]
+        _mask_cache[key] = ((slice(y_min, y_max), slice(x_min, x_max)), inner_mask)
+        return _mask_cache[key]
+
+    @staticmethod
+    def _get_dilation_footprint(scale: float) -> np.ndarray[Any, Any]:
+        """Disk of radius 2 * `scale`, rounded up so that the edges are
+        dilated at every resolution (radius 2, 1 and 1 for "full", "half"
+        and "quarter")."""
+
+        return _DILATION_FOOTPRINTS[max(1, math.ceil(2 * scale))]
+
+    @staticmethod
+    def _get_dilated_edges(
+        frame: np.ndarray[Any, Any],
+        low_threshold: float,
+        high_threshold: float,
+        engine: Literal["skimage", "opencv"],
+        scale: float = 1.0,
+    ) -> np.ndarray[Any, Any]:
+        """Run canny edge detection (sigma = 7) and dilate the edges with
+        a disk of radius 2. Returns a uint8 array of 0s and 1s.
+
+        For frames downscaled by `scale`, sigma and the dilation radius are
+        multiplied by `scale` (see `_get_dilation_footprint`). The thresholds
+        (given for the full resolution) are divided by it, since the gradients
+        per pixel get steeper.
+
+        The "opencv" engine reproduces the skimage pipeline with OpenCV's
+        separable gaussian filter, sobel, canny and dilate functions. It is
+        several times faster but the non-maximum suppression differs slightly,
+        so the edge fractions are not exactly the same."""
+
+        sigma = _CANNY_SIGMA * scale
+        footprint = HeliosImageProcessing._get_dilation_footprint(scale)
+        low_threshold, high_threshold = low_threshold / scale, high_threshold / scale
+
+        if engine == "skimage":
+            edges_dilated: np.ndarray[Any, Any] = skimage.morphology.dilation(
+                skimage.feature.canny(
+                    frame,
+                    sigma=sigma,
+                    low_threshold=low_threshold,
+                    high_threshold=high_threshold,
+                ),
+                footprint,
+            ).astype(np.uint8)
+            return edges_dilated
+
+        # gaussian smoothing normalized at the image borders like in skimage
+        float_frame = frame.astype(np.float32)
+        kernel_size = 2 * round(4 * sigma) + 1
+        smoothed: np.ndarray[Any, Any] = cv.GaussianBlur(
+            float_frame,
+            (kernel_size, kernel_size),
+            sigma,
+            borderType=cv.BORDER_CONSTANT,
+        ) / cv.GaussianBlur(
+            np.ones_like(float_frame),
+            (kernel_size, kernel_size),
+            sigma,
+            borderType=cv.BORDER_CONSTANT,
+        )
+
+        # OpenCV's canny only accepts integer gradients, scale them up to
+        # keep the precision needed for the low thresholds
+        scale = 16
+        dx = cv.Sobel(smoothed, cv.CV_32F, 1, 0, ksize=3, borderType=cv.BORDER_REFLECT)
+        dy = cv.Sobel(smoothed, cv.CV_32F, 0, 1, ksize=3, borderType=cv.BORDER_REFLECT)
+        edges = cv.Canny(
+            np.round(dx * scale).astype(np.int16),
+            np.round(dy * scale).astype(np.int16),
+            low_threshold * scale,
+            high_threshold * scale,
+            L2gradient=True,
+        )
+        return cv.dilate((edges > 0).astype(np.uint8), footprint)
+
     @staticmethod
     def _adjust_image_brightness_in_post(
         frame: np.ndarray[Any, Any],
@@ -157,11 +414,43 @@ class HeliosImageProcessing:
         save_current_image: bool = False,
         image_name: Optional[str] = None,
         image_directory: str = os.path.join(_LOGS_DIR, "helios", "%Y%m%d"),
+        engine: Literal["skimage", "opencv"] = "skimage",
+        image_writer: Optional[HeliosImageWriter] = None,
+        resolution: Literal["full", "half", "quarter"] = "full",
+        archive_format: Literal["jpeg", "container"] = "jpeg",
+        exposure: Optional[int] = None,
     ) -> float:
         """For a given frame determine the number of "edge pixels" with
         respect to the inner 90% of the lense diameter and the "status".
         The status is 1 when the edge pixels are above the given threshold
-        and 0 otherwise."""
+        and 0 otherwise.
+
+        The edge detection only runs on the bounding box of the lense
+        circle. See `_get_dilated_edges` for the available engines.
+
+        If an `image_writer` is given, the images are encoded and saved
+        in its background thread instead of before returning.
+
+        With a `resolution` other than "full", the frame is downscaled before
+        the edge detection (see `EDGE_DETECTION_SCALES`). The saved images
+        have the downscaled resolution as well.
+
+        With the `archive_format` "container", the archived images are
+        appended to a daily `HeliosArchive` file instead of being saved as
+        JPEG pairs. The `exposure` is only stored in these files."""
+
+        scale = EDGE_DETECTION_SCALES[resolution]
+        if scale != 1:
+            rgb_frame = cv.resize(
+                rgb_frame,
+                (round(rgb_frame.shape[1] * scale), round(rgb_frame.shape[0] * scale)),
+                interpolation=cv.INTER_AREA,
+            )
+            lense_circle = (
+                round(lense_circle[0] * scale),
+                round(lense_circle[1] * scale),
+                round(lense_circle[2] * scale),
+            )
 
         # convert the image to black and white
         bw_frame: np.ndarray[Any, Any] = skimage.color.rgb2gray(rgb_frame)
@@ -172,36 +461,33 @@ class HeliosImageProcessing:
         )
         evenly_lit_frame[evenly_lit_frame > 255] = 255
 
-        # transform image from 1280x720 to 640x360
-        # downscaled_image: np.ndarray = skimage.transform.rescale(evenly_lit_frame, 0.5)
-
-        # only consider edges and make them bold
-        edges_dilated: np.ndarray[Any, Any] = skimage.morphology.dilation(
-            skimage.feature.canny(
-                evenly_lit_frame,
-                sigma=7,
-                low_threshold=round(edge_color_threshold * (1 / 7) * 0.5),
-                high_threshold=round(edge_color_threshold * (1 / 7)),
-            ),
-            skimage.morphology.disk(2),
-        ).astype(np.uint8)
+        # only consider edges inside the lense and make them bold
+        crop, inner_mask = HeliosImageProcessing._get_lense_mask(
+            evenly_lit_frame.shape, lense_circle
+        )
+        cropped_edges_dilated = HeliosImageProcessing._get_dilated_edges(
+            evenly_lit_frame[crop],
+            low_threshold=round(edge_color_threshold * (1 / 7) * 0.5),
+            high_threshold=round(edge_color_threshold * (1 / 7)),
+            engine=engine,
+            scale=scale,
+        )
 
         # blacken the outer 10% of the circle radius
-        inner_mask = np.zeros(evenly_lit_frame.shape, dtype=np.uint8)
-        cc, rr = skimage.draw.disk(
-            center=(lense_circle[1], lense_circle[0]),
-            radius=lense_circle[2] * 0.9,
-            shape=evenly_lit_frame.shape,
-        )
-        inner_mask[cc, rr] = 1
-        edges_dilated = edges_dilated * inner_mask
+        cropped_edges_dilated[~inner_mask] = 0
 
         # determine how many pixels inside the circle are made up of "edge pixels"
         pixels_inside_circle: int = np.sum(3.141592 * pow(lense_circle[2] * 0.9, 2))
+
+        # the dilated edges are as wide as the footprint, its radius is rounded
+        # up at lower resolutions -> correct the width to 5 full resolution pixels
+        band_width_correction = (
+            5 * scale / HeliosImageProcessing._get_dilation_footprint(scale).shape[0]
+        )
         edge_fraction: float = 0
         if pixels_inside_circle != 0:
             edge_fraction = round(
-                (np.sum(edges_dilated))  # type: ignore
+                (np.sum(cropped_edges_dilated) * band_width_correction)  # type: ignore
                 / pixels_inside_circle,
                 6,
             )
@@ -209,36 +495,97 @@ class HeliosImageProcessing:
         # optionally save images to local disk
         if save_images_to_archive or save_current_image:
             now = datetime.datetime.now()
-            img_timestamp = now.strftime("%Y%m%d-%H%M%S")
 
-            edge_fraction_str = str(edge_fraction) + ("0" * (8 - len(str(edge_fraction))))
-            raw_image = Image.fromarray((skimage.color.gray2rgb(evenly_lit_frame)).astype(np.uint8))
-            processed_image = HeliosImageProcessing.annotate_processed_image(
-                edges_dilated, edge_fraction, *lense_circle
-            )
-
-            # used in post-analysis
-            if save_images_to_archive:
-                img_directory_path = os.path.join(
-                    os.path.dirname(image_directory),
-                    now.strftime(os.path.basename(image_directory)),
-                )
-                os.makedirs(img_directory_path, exist_ok=True)
-                image_slug = os.path.join(
-                    img_directory_path, f"{station_id}-{img_timestamp}-{edge_fraction_str}"
-                )
-                if image_name is not None:
-                    image_slug = os.path.join(img_directory_path, image_name)
-                raw_image.save(image_slug + "-raw.jpg")
-                processed_image.save(image_slug + "-processed.jpg")
-
-            # used by the UI
-            if save_current_image:
-                raw_image.save(
-                    os.path.join(_LOGS_DIR, "current-helios-view-raw.jpg"),
-                )
-                processed_image.save(
-                    os.path.join(_LOGS_DIR, "current-helios-view-processed.jpg"),
+            def _save_images() -> None:
+                HeliosImageProcessing._save_images(
+                    evenly_lit_frame=evenly_lit_frame,
+                    crop=crop,
+                    cropped_edges_dilated=cropped_edges_dilated,
+                    edge_fraction=edge_fraction,
+                    lense_circle=lense_circle,
+                    timestamp=now,
+                    station_id=station_id,
+                    save_images_to_archive=save_images_to_archive,
+                    save_current_image=save_current_image,
+                    image_name=image_name,
+                    image_directory=image_directory,
+                    archive_format=archive_format,
+                    exposure=exposure,
                 )
 
+            if image_writer is None:
+                _save_images()
+            else:
+                image_writer.submit(_save_images)
+
         return float(edge_fraction)
+
+    @staticmethod
+    def _save_images(
+        evenly_lit_frame: np.ndarray[Any, Any],
+        crop: tuple[slice, slice],
+        cropped_edges_dilated: np.ndarray[Any, Any],
+        edge_fraction: float,
+        lense_circle: tuple[int, int, int],
+        timestamp: datetime.datetime,
+        station_id: str,
+        save_images_to_archive: bool,
+        save_current_image: bool,
+        image_name: Optional[str],
+        image_directory: str,
+        archive_format: Literal["jpeg", "container"] = "jpeg",
+        exposure: Optional[int] = None,
+    ) -> None:
+        """Save the raw and the processed image of `get_edge_fraction`
+        to the archive and/or as the current images shown in the UI."""
+
+        # the container only stores the frame and the edges, the
+        # annotated images are rendered on demand
+        if save_images_to_archive and (archive_format == "container"):
+            HeliosArchive.append(
+                HeliosArchive.get_path(image_directory, timestamp),
+                frame=evenly_lit_frame,
+                crop=crop,
+                cropped_edges=cropped_edges_dilated,
+                edge_fraction=edge_fraction,
+                lense_circle=lense_circle,
+                timestamp=timestamp,
+                station_id=station_id,
+                exposure=exposure,
+            )
+            save_images_to_archive = False
+            if not save_current_image:
+                return
+
+        img_timestamp = timestamp.strftime("%Y%m%d-%H%M%S")
+        edge_fraction_str = str(edge_fraction) + ("0" * (8 - len(str(edge_fraction))))
+        raw_image = Image.fromarray((skimage.color.gray2rgb(evenly_lit_frame)).astype(np.uint8))
+        edges_dilated = np.zeros(evenly_lit_frame.shape, dtype=np.uint8)
+        edges_dilated[crop] = cropped_edges_dilated
+        processed_image = HeliosImageProcessing.annotate_processed_image(
+            edges_dilated, edge_fraction, *lense_circle, timestamp=timestamp
+        )
+
+        # used in post-analysis
+        if save_images_to_archive:
+            img_directory_path = os.path.join(
+                os.path.dirname(image_directory),
+                timestamp.strftime(os.path.basename(image_directory)),
+            )
+            os.makedirs(img_directory_path, exist_ok=True)
+            image_slug = os.path.join(
+                img_directory_path, f"{station_id}-{img_timestamp}-{edge_fraction_str}"
+            )
+            if image_name is not None:
+                image_slug = os.path.join(img_directory_path, image_name)
+            raw_image.save(image_slug + "-raw.jpg")
+            processed_image.save(image_slug + "-processed.jpg")
+
+        # used by the UI, replaced atomically because the UI may read them anytime
+        if save_current_image:
+            HeliosImageWriter.save_atomically(
+                raw_image, os.path.join(_LOGS_DIR, "current-helios-view-raw.jpg")
+            )
+            HeliosImageWriter.save_atomically(
+                processed_image, os.path.join(_LOGS_DIR, "current-helios-view-processed.jpg")
+            )
@@ -0,0 +1,87 @@
+import collections
+import os
+import threading
+from typing import Callable, Optional
+from PIL import Image
+
+from .logger import Logger
+
+# jobs are dropped (oldest first) when the writer falls behind by more
+# than this many images, e.g. when the disk is slow
+HELIOS_IMAGE_QUEUE_SIZE = 8
+
+
+class HeliosImageWriter:
+    """Encodes and writes the Helios images in a background thread, so
+    that the Helios loop does not wait for the JPEG encoding and the disk.
+
+    Jobs are functions that build and save the images. The queue is
+    bounded: when it is full, the oldest job is dropped in favor of the
+    new one, since only the most recent images are of interest."""
+
+    def __init__(
+        self,
+        logger: Optional[Logger] = None,
+        max_queue_size: int = HELIOS_IMAGE_QUEUE_SIZE,
+    ) -> None:
+        self.logger = logger
+        self.jobs: collections.deque[Callable[[], None]] = collections.deque(maxlen=max_queue_size)
+        self.condition = threading.Condition()
+        self.busy: bool = False
+        self.dropped_count: int = 0
+        self.written_count: int = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="helios-image-writer")
+        self.thread.start()
+
+    def submit(self, job: Callable[[], None]) -> None:
+        """Queue a job, drop the oldest queued job if the queue is full."""
+
+        with self.condition:
+            if len(self.jobs) == self.jobs.maxlen:
+                self.dropped_count += 1
+            self.jobs.append(job)
+            self.condition.notify_all()
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until all queued jobs are done. Returns False on timeout."""
+
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: (len(self.jobs) == 0) and (not self.busy), timeout=timeout
+            )
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop the writer thread after the queued jobs are done."""
+
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if wait and (self.thread is not threading.current_thread()):
+            self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+                self.condition.wait_for(lambda: (len(self.jobs) > 0) or self.stop_event.is_set())
+                if len(self.jobs) == 0:
+                    return
+                job = self.jobs.popleft()
+                self.busy = True
+            try:
+                job()
+                self.written_count += 1
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.warning(f"could not write Helios image: {repr(e)}")
+
+    @staticmethod
+    def save_atomically(image: Image.Image, path: str) -> None:
+        """Save the image to a temporary file and move it to `path`, so
+        that readers (like the UI) never see a partially written image."""
+
+        tmp_path = path + ".tmp"
+        image.save(tmp_path, format="JPEG")
+        os.replace(tmp_path, path)
@@ -0,0 +1,222 @@
+"""Lock shared by threads and processes, based on an OS file lock.
+
+Replaces `tum_esm_utils.sqlitelock.SQLiteLock` for the state files. The
+SQLite lock polls, so a contended acquisition waits in steps of the poll
+interval. Here, the waiting thread is woken up as soon as the lock is
+released: threads of the same process wait on a `threading.Lock` (one per
+lock file), and only the thread holding it waits for the OS file lock
+(`flock` on Linux/macOS, `LockFileEx` on Windows) held by another process.
+
+The OS releases the file lock when the holding process exits, so a crashed
+CLI process can not block Pyra Core."""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+if sys.platform == "win32":
+    import ctypes
+    import ctypes.wintypes
+    import msvcrt
+
+    class _OVERLAPPED(ctypes.Structure):
+        _fields_ = [
+            ("Internal", ctypes.c_void_p),
+            ("InternalHigh", ctypes.c_void_p),
+            ("Offset", ctypes.wintypes.DWORD),
+            ("OffsetHigh", ctypes.wintypes.DWORD),
+            ("hEvent", ctypes.wintypes.HANDLE),
+        ]
+
+    _LOCKFILE_FAIL_IMMEDIATELY = 0x01
+    _LOCKFILE_EXCLUSIVE_LOCK = 0x02
+    _ERROR_LOCK_VIOLATION = 33
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.LockFileEx.argtypes = [
+        ctypes.wintypes.HANDLE,
+        ctypes.wintypes.DWORD,
+        ctypes.wintypes.DWORD,
+        ctypes.wintypes.DWORD,
+        ctypes.wintypes.DWORD,
+        ctypes.POINTER(_OVERLAPPED),
+    ]
+    _kernel32.LockFileEx.restype = ctypes.wintypes.BOOL
+    _kernel32.UnlockFileEx.argtypes = [
+        ctypes.wintypes.HANDLE,
+        ctypes.wintypes.DWORD,
+        ctypes.wintypes.DWORD,
+        ctypes.wintypes.DWORD,
+        ctypes.POINTER(_OVERLAPPED),
+    ]
+    _kernel32.UnlockFileEx.restype = ctypes.wintypes.BOOL
+
+    def _lock_file(fd: int, blocking: bool) -> bool:
+        """Lock the first byte of the file, return whether it was successful."""
+
+        flags = _LOCKFILE_EXCLUSIVE_LOCK | (0 if blocking else _LOCKFILE_FAIL_IMMEDIATELY)
+        overlapped = _OVERLAPPED()
+        handle = msvcrt.get_osfhandle(fd)
+        if _kernel32.LockFileEx(handle, flags, 0, 1, 0, ctypes.byref(overlapped)):
+            return True
+        error = ctypes.get_last_error()
+        if (not blocking) and (error == _ERROR_LOCK_VIOLATION):
+            return False
+        raise ctypes.WinError(error)
+
+    def _unlock_file(fd: int) -> None:
+        overlapped = _OVERLAPPED()
+        handle = msvcrt.get_osfhandle(fd)
+        if not _kernel32.UnlockFileEx(handle, 0, 1, 0, ctypes.byref(overlapped)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+else:
+    import fcntl
+
+    def _lock_file(fd: int, blocking: bool) -> bool:
+        """Lock the file, return whether it was successful."""
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock_file(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+# one thread lock per lock file, shared by all instances in this process
+_thread_locks: dict[str, threading.Lock] = {}
+_thread_locks_lock = threading.Lock()
+
+
+class _FileLockWaiter:
+    """Waits for the OS file lock in a separate thread, so that the
+    caller can give up after its timeout. If the caller has given up,
+    the waiter releases the file lock and the thread lock as soon as
+    it got the file lock."""
+
+    def __init__(self, fd: int, thread_lock: threading.Lock) -> None:
+        self.fd = fd
+        self.thread_lock = thread_lock
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.abandoned = False
+        self.error: Optional[OSError] = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            _lock_file(self.fd, blocking=True)
+        except OSError as e:
+            self.error = e
+        with self.lock:
+            if not self.abandoned:
+                self.done.set()
+                return
+        try:
+            if self.error is None:
+                _unlock_file(self.fd)
+        finally:
+            os.close(self.fd)
+            self.thread_lock.release()
+
+    def wait(self, timeout: float) -> bool:
+        """Return whether the file lock has been acquired within the timeout.
+        Raises the error of the lock call if it failed."""
+
+        self.done.wait(max(timeout, 0))
+        with self.lock:
+            if not self.done.is_set():
+                self.abandoned = True
+                return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+class InterProcessLock:
+    """A lock shared by all threads and processes using the same lock file.
+
+    Usage example:
+
+    ```python
+    lock = utils.InterProcessLock("logs/state.lock", timeout=5)
+
+    try:
+        with lock:
+            # critical section
+            pass
+    except TimeoutError:
+        # could not be acquired within 5 seconds
+        pass
+    ```
+
+    Like `tum_esm_utils.sqlitelock.SQLiteLock`, the lock is not reentrant.
+    An instance can be shared by threads."""
+
+    def __init__(self, filepath: str, timeout: float = 10) -> None:
+        self.filepath = os.path.abspath(filepath)
+        self.timeout = timeout
+        self.fd: Optional[int] = None
+
+        dirpath = os.path.dirname(self.filepath)
+        if dirpath != "":
+            os.makedirs(dirpath, exist_ok=True)
+        with _thread_locks_lock:
+            self.thread_lock = _thread_locks.setdefault(self.filepath, threading.Lock())
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Acquire the lock.
+
+        Args:
+            timeout: Optional timeout in seconds. If None, uses the default timeout set during initialization.
+
+        Raises:
+            TimeoutError: If the lock could not be acquired within the specified timeout.
+        """
+
+        used_timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + used_timeout
+        if not self.thread_lock.acquire(timeout=max(used_timeout, 0)):
+            raise TimeoutError(f"Could not acquire {self.filepath} within {used_timeout} seconds.")
+
+        try:
+            fd = os.open(self.filepath, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            self.thread_lock.release()
+            raise
+
+        try:
+            acquired = _lock_file(fd, blocking=False) or _FileLockWaiter(fd, self.thread_lock).wait(
+                deadline - time.monotonic()
+            )
+        except OSError:
+            os.close(fd)
+            self.thread_lock.release()
+            raise
+        if not acquired:
+            # the waiter releases the file and the thread lock
+            raise TimeoutError(f"Could not acquire {self.filepath} within {used_timeout} seconds.")
+        self.fd = fd
+
+    def release(self) -> None:
+        """Release the lock. Does nothing if it is not held."""
+
+        fd, self.fd = self.fd, None
+        if fd is None:
+            return
+        try:
+            _unlock_file(fd)
+        finally:
+            os.close(fd)
+            self.thread_lock.release()
+
+    def __enter__(self) -> None:
+        self.acquire()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.release()
@@ -0,0 +1,285 @@
+"""Acquire-wait and hold-time histograms of the locks shared by the threads.
+
+Every instrumented acquisition is recorded per lock and per caller origin
+(the origin of the caller's logger, e.g. "cas" or "helios"). Holding a lock
+for longer than `LOCK_SLOW_HOLD_THRESHOLD` seconds is flagged together with
+the code location of the caller's `with` block, so that slow I/O (SMTP,
+PLC reads, ...) done while holding a lock can be found.
+
+The instrumented locks are the in-memory state lock ("state") and the
+state file lock ("state-file") of the `StateInterface`. Log lines are
+written without a lock by a single background thread (see `Logger`).
+
+The shutdown latencies of the threads (from requesting a thread to stop
+until it has stopped, see `AbstractThread.stop`) are recorded per thread
+in the same histogram format.
+
+Pyra Core writes the metrics of its process to `logs/lock-metrics.json`
+in every mainloop iteration:
+
+```json
+{
+    "since": "2024-05-01T12:00:00.000000",
+    "updated": "2024-05-01T13:00:00.000000",
+    "bucket_upper_bounds": [0.0001, 0.001, 0.01, 0.1, 1, 10, null],
+    "locks": {
+        "state": {
+            "helios": {
+                "count": 1200,
+                "wait": {"histogram": [1190, 8, 2, 0, 0, 0, 0], "sum": 0.012, "max": 0.004},
+                "hold": {"histogram": [1100, 100, 0, 0, 0, 0, 0], "sum": 0.07, "max": 0.0009}
+            }
+        }
+    },
+    "slow_holds": [
+        {"lock": "state", "origin": "main", "caller": "packages/core/main.py:26", ...}
+    ],
+    "thread_shutdowns": {
+        "helios": {
+            "count": 2,
+            "latency": {"histogram": [0, 0, 1, 1, 0, 0, 0], "sum": 0.06, "max": 0.05},
+            "last_latency": 0.05,
+            "last_time": "2024-05-01T12:30:00.000000"
+        }
+    }
+}
+```"""
+
+import contextlib
+import datetime
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Generator, Optional
+
+from .logger import Logger
+
+_dir = os.path.dirname
+_PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
+LOCK_METRICS_PATH = os.path.join(_PROJECT_DIR, "logs", "lock-metrics.json")
+
+# upper bounds (seconds) of the histogram buckets, the last bucket is unbounded
+LOCK_METRICS_BUCKET_UPPER_BOUNDS: list[float] = [0.0001, 0.001, 0.01, 0.1, 1, 10]
+
+# holding a lock for longer than this is reported with the caller's location
+LOCK_SLOW_HOLD_THRESHOLD = 0.25
+
+# frames of these files are skipped when looking for the caller's location
+_WRAPPER_FILENAMES = {"contextlib.py", "lock_metrics.py", "state_interface.py"}
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts: list[int] = [0] * (len(LOCK_METRICS_BUCKET_UPPER_BOUNDS) + 1)
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        bucket = 0
+        while (bucket < len(LOCK_METRICS_BUCKET_UPPER_BOUNDS)) and (
+            seconds > LOCK_METRICS_BUCKET_UPPER_BOUNDS[bucket]
+        ):
+            bucket += 1
+        self.counts[bucket] += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def to_json(self) -> dict[str, Any]:
+        return {"histogram": list(self.counts), "sum": self.sum, "max": self.max}
+
+
+class _LockOriginMetrics:
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.wait = _Histogram()
+        self.hold = _Histogram()
+
+
+class _SlowHold:
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.max_hold: float = 0.0
+        self.last_hold: float = 0.0
+        self.last_time: Optional[datetime.datetime] = None
+
+
+class _ThreadShutdownMetrics:
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.latency = _Histogram()
+        self.last_latency: float = 0.0
+        self.last_time: Optional[datetime.datetime] = None
+
+
+_metrics_lock = threading.Lock()
+_metrics: dict[tuple[str, str], _LockOriginMetrics] = {}
+_slow_holds: dict[tuple[str, str, str], _SlowHold] = {}
+_thread_shutdowns: dict[str, _ThreadShutdownMetrics] = {}
+_metrics_since = datetime.datetime.now()
+
+
+class LockMetrics:
+    @staticmethod
+    @contextlib.contextmanager
+    def measure(
+        lock: Any,
+        lock_name: str,
+        origin: str,
+        logger: Optional[Logger] = None,
+    ) -> Generator[None, None, None]:
+        """Acquire `lock` (anything usable in a `with` statement) for the
+        duration of the block and record how long the acquisition took and
+        how long the lock was held. The first slow hold of each caller
+        location is logged as a warning to the `logger`."""
+
+        wait_start = time.perf_counter()
+        acquired_time: Optional[float] = None
+        released_time: Optional[float] = None
+        try:
+            with lock:
+                acquired_time = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    released_time = time.perf_counter()
+        finally:
+            if (acquired_time is not None) and (released_time is not None):
+                LockMetrics.record(
+                    lock_name,
+                    origin,
+                    wait_seconds=acquired_time - wait_start,
+                    hold_seconds=released_time - acquired_time,
+                    logger=logger,
+                )
+
+    @staticmethod
+    def record(
+        lock_name: str,
+        origin: str,
+        wait_seconds: float,
+        hold_seconds: float,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        """Add one acquisition of a lock to the histograms."""
+
+        caller: Optional[str] = None
+        if hold_seconds > LOCK_SLOW_HOLD_THRESHOLD:
+            caller = LockMetrics._get_caller_location()
+
+        first_slow_hold = False
+        with _metrics_lock:
+            metrics = _metrics.setdefault((lock_name, origin), _LockOriginMetrics())
+            metrics.count += 1
+            metrics.wait.add(wait_seconds)
+            metrics.hold.add(hold_seconds)
+            if caller is not None:
+                slow_hold = _slow_holds.get((lock_name, origin, caller))
+                if slow_hold is None:
+                    slow_hold = _slow_holds[(lock_name, origin, caller)] = _SlowHold()
+                    first_slow_hold = True
+                slow_hold.count += 1
+                slow_hold.max_hold = max(slow_hold.max_hold, hold_seconds)
+                slow_hold.last_hold = hold_seconds
+                slow_hold.last_time = datetime.datetime.now()
+
+        if first_slow_hold and (logger is not None):
+            logger.warning(
+                f"The {lock_name} lock has been held for {hold_seconds:.2f} seconds by "
+                + f"{caller}, further slow holds are counted in the lock metrics"
+            )
+
+    @staticmethod
+    def record_thread_shutdown(thread_name: str, latency_seconds: float) -> None:
+        """Add the shutdown latency of a thread to its histogram."""
+
+        with _metrics_lock:
+            metrics = _thread_shutdowns.setdefault(thread_name, _ThreadShutdownMetrics())
+            metrics.count += 1
+            metrics.latency.add(latency_seconds)
+            metrics.last_latency = latency_seconds
+            metrics.last_time = datetime.datetime.now()
+
+    @staticmethod
+    def _get_caller_location() -> str:
+        """The first frame on the stack outside of the lock wrappers,
+        as a "path:line" string relative to the project directory."""
+
+        frame = inspect.currentframe()
+        if frame is None:
+            return "unknown"
+        while frame.f_back is not None:
+            if os.path.basename(frame.f_code.co_filename) not in _WRAPPER_FILENAMES:
+                break
+            frame = frame.f_back
+        path = frame.f_code.co_filename
+        if path.startswith(_PROJECT_DIR):
+            path = os.path.relpath(path, _PROJECT_DIR)
+        return f"{path}:{frame.f_lineno}"
+
+    @staticmethod
+    def get() -> dict[str, Any]:
+        """Return the metrics recorded in this process since the last `reset`."""
+
+        with _metrics_lock:
+            locks: dict[str, dict[str, Any]] = {}
+            for (lock_name, origin), metrics in sorted(_metrics.items()):
+                locks.setdefault(lock_name, {})[origin] = {
+                    "count": metrics.count,
+                    "wait": metrics.wait.to_json(),
+                    "hold": metrics.hold.to_json(),
+                }
+            slow_holds = [
+                {
+                    "lock": lock_name,
+                    "origin": origin,
+                    "caller": caller,
+                    "count": slow_hold.count,
+                    "max_hold": slow_hold.max_hold,
+                    "last_hold": slow_hold.last_hold,
+                    "last_time": (
+                        None if slow_hold.last_time is None else slow_hold.last_time.isoformat()
+                    ),
+                }
+                for (lock_name, origin, caller), slow_hold in sorted(_slow_holds.items())
+            ]
+            thread_shutdowns = {
+                thread_name: {
+                    "count": metrics.count,
+                    "latency": metrics.latency.to_json(),
+                    "last_latency": metrics.last_latency,
+                    "last_time": (
+                        None if metrics.last_time is None else metrics.last_time.isoformat()
+                    ),
+                }
+                for thread_name, metrics in sorted(_thread_shutdowns.items())
+            }
+        return {
+            "since": _metrics_since.isoformat(),
+            "updated": datetime.datetime.now().isoformat(),
+            "bucket_upper_bounds": [*LOCK_METRICS_BUCKET_UPPER_BOUNDS, None],
+            "locks": locks,
+            "slow_holds": slow_holds,
+            "thread_shutdowns": thread_shutdowns,
+        }
+
+    @staticmethod
+    def write(path: str = LOCK_METRICS_PATH) -> None:
+        """Write the metrics of this process to the metrics file.
+        The file is replaced atomically."""
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(LockMetrics.get(), f, indent=4)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def reset() -> None:
+        global _metrics_since
+
+        with _metrics_lock:
+            _metrics.clear()
+            _slow_holds.clear()
+            _thread_shutdowns.clear()
+            _metrics_since = datetime.datetime.now()
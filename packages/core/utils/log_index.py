@@ -0,0 +1,260 @@
+from typing import BinaryIO, Generator, Optional
+import contextlib
+import datetime
+import glob
+import os
+import re
+import sqlite3
+
+_dir = os.path.dirname
+_PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
+_ARCHIVE_DIR = os.path.join(_PROJECT_DIR, "logs", "archive")
+LOG_INDEX_PATH = os.path.join(_ARCHIVE_DIR, ".log-index.sqlite")
+
+# number of index rows inserted with a single statement
+_INSERT_BATCH_SIZE = 10_000
+
+# 2024-10-09 01:40:16.089891 UTC+0000 - enclosure-control - INFO - ...
+_LOG_LINE_PATTERN = re.compile(
+    rb"^(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2}\.\d+) UTC([+-]\d{2})(\d{2}) - ([\w\-]+) - ([A-Z]+) - "
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    indexed_size INTEGER NOT NULL,
+    last_entry_offset INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    origin TEXT NOT NULL,
+    level TEXT NOT NULL,
+    PRIMARY KEY (file, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_by_timestamp ON entries (timestamp);
+CREATE INDEX IF NOT EXISTS entries_by_origin ON entries (origin, timestamp);
+"""
+
+
+@contextlib.contextmanager
+def _connect() -> Generator[sqlite3.Connection, None, None]:
+    connection = sqlite3.connect(LOG_INDEX_PATH, timeout=10, isolation_level=None)
+    try:
+        connection.executescript(_SCHEMA)
+        yield connection
+    finally:
+        connection.close()
+
+
+def _parse_log_line_header(line: bytes) -> Optional[tuple[float, str, str]]:
+    """Returns the timestamp, origin and level if the line is
+    the first line of a log entry."""
+
+    m = _LOG_LINE_PATTERN.match(line)
+    if m is None:
+        return None
+    date, time, tz_hours, tz_minutes, origin, level = m.groups()
+    try:
+        timestamp = datetime.datetime.fromisoformat(
+            f"{date.decode()}T{time.decode()}{tz_hours.decode()}:{tz_minutes.decode()}"
+        ).timestamp()
+    except ValueError:
+        return None
+    return timestamp, origin.decode(), level.decode()
+
+
+def _file_may_contain(file_name: str, from_time: float) -> bool:
+    """Whether the daily archive file `%Y-%m-%d-debug.log` can contain
+    entries at or after `from_time`. The file date is the local date of
+    the logging process, so one day of tolerance is added."""
+
+    try:
+        file_date = datetime.date.fromisoformat(file_name[:10])
+    except ValueError:
+        return True
+    return file_date >= (
+        datetime.datetime.fromtimestamp(from_time).date() - datetime.timedelta(days=1)
+    )
+
+
+def _index_file(connection: sqlite3.Connection, file_name: str) -> int:
+    """Index the lines appended to the archive file since the last
+    update. Returns the number of new entries."""
+
+    file_path = os.path.join(_ARCHIVE_DIR, file_name)
+    file_size = os.path.getsize(file_path)
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT indexed_size, last_entry_offset FROM files WHERE name = ?", (file_name,)
+        ).fetchone()
+        indexed_size: int = 0 if row is None else row[0]
+        last_entry_offset: Optional[int] = None if row is None else row[1]
+
+        # the file has been rewritten, index it from the beginning
+        if file_size < indexed_size:
+            connection.execute("DELETE FROM entries WHERE file = ?", (file_name,))
+            indexed_size, last_entry_offset = 0, None
+
+        if file_size == indexed_size:
+            connection.execute("COMMIT")
+            return 0
+
+        new_entries: list[tuple[str, int, int, float, str, str]] = []
+        entry_count: int = 0
+        position = indexed_size
+        with open(file_path, "rb") as f:
+            f.seek(indexed_size)
+            for line in f:
+                # only index complete lines, the rest is still being written
+                if not line.endswith(b"\n"):
+                    break
+                header = _parse_log_line_header(line)
+                if header is not None:
+                    new_entries.append((file_name, position, len(line), *header))
+                    last_entry_offset = position
+                elif len(new_entries) > 0:
+                    # traceback or other multi-line message
+                    e = new_entries[-1]
+                    new_entries[-1] = (e[0], e[1], e[2] + len(line), e[3], e[4], e[5])
+                elif last_entry_offset is not None:
+                    # continuation of the last entry indexed in a previous update
+                    connection.execute(
+                        "UPDATE entries SET length = length + ? WHERE file = ? AND offset = ?",
+                        (len(line), file_name, last_entry_offset),
+                    )
+                position += len(line)
+
+                if len(new_entries) > _INSERT_BATCH_SIZE:
+                    # the last entry might still grow, insert it with the next batch
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                        new_entries[:-1],
+                    )
+                    entry_count += len(new_entries) - 1
+                    new_entries = new_entries[-1:]
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", new_entries
+        )
+        entry_count += len(new_entries)
+        connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+            (file_name, position, last_entry_offset),
+        )
+        connection.execute("COMMIT")
+        return entry_count
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+
+class LogIndex:
+    """Index of the log entries in `logs/archive/*-debug.log`.
+
+    The index is a SQLite file next to the archive files that stores the
+    byte offset, timestamp, origin and level of every log entry. It is
+    updated incrementally: only the bytes appended since the last update
+    are read. Queries only read the matching entries from the files."""
+
+    @staticmethod
+    def update(from_time: Optional[float] = None) -> int:
+        """Index the new lines in the archive files. Returns the
+        number of new entries.
+
+        With a `from_time`, only the files of the days that can contain
+        entries at or after this unix timestamp are indexed, so frequent
+        queries of recent entries do not index the whole archive."""
+
+        file_names = sorted(
+            os.path.basename(p) for p in glob.glob(os.path.join(_ARCHIVE_DIR, "*-debug.log"))
+        )
+        new_entry_count: int = 0
+        with _connect() as connection:
+            indexed_sizes: dict[str, int] = dict(
+                connection.execute("SELECT name, indexed_size FROM files").fetchall()
+            )
+            for file_name in indexed_sizes.keys():
+                if file_name not in file_names:
+                    connection.execute("DELETE FROM entries WHERE file = ?", (file_name,))
+                    connection.execute("DELETE FROM files WHERE name = ?", (file_name,))
+            for file_name in file_names:
+                if (from_time is not None) and (not _file_may_contain(file_name, from_time)):
+                    continue
+                # unchanged files are skipped without a write transaction
+                if indexed_sizes.get(file_name) == os.path.getsize(
+                    os.path.join(_ARCHIVE_DIR, file_name)
+                ):
+                    continue
+                new_entry_count += _index_file(connection, file_name)
+        return new_entry_count
+
+    @staticmethod
+    def query(
+        from_time: Optional[float] = None,
+        to_time: Optional[float] = None,
+        origins: Optional[list[str]] = None,
+        levels: Optional[list[str]] = None,
+        substring: Optional[str] = None,
+        newest_first: bool = False,
+        update: bool = True,
+    ) -> Generator[tuple[float, str], None, None]:
+        """Yield the timestamp and text of the matching log entries
+        in chronological order.
+
+        Args:
+            from_time:    Only entries at or after this unix timestamp.
+            to_time:      Only entries before this unix timestamp.
+            origins:      Only entries from these origins.
+            levels:       Only entries with these levels.
+            substring:    Only entries containing this text.
+            newest_first: Yield the entries in reverse order.
+            update:       Index the new lines before querying (only in the
+                          files of the days since `from_time` if given).
+        """
+
+        if update:
+            LogIndex.update(from_time)
+
+        conditions: list[str] = []
+        parameters: list[str | float] = []
+        if from_time is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(from_time)
+        if to_time is not None:
+            conditions.append("timestamp < ?")
+            parameters.append(to_time)
+        if origins is not None:
+            conditions.append(f"origin IN ({', '.join('?' * len(origins))})")
+            parameters.extend(origins)
+        if levels is not None:
+            conditions.append(f"level IN ({', '.join('?' * len(levels))})")
+            parameters.extend(levels)
+
+        sql = "SELECT file, offset, length, timestamp FROM entries"
+        if len(conditions) > 0:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp DESC" if newest_first else " ORDER BY timestamp"
+
+        with _connect() as connection:
+            current_file_name: Optional[str] = None
+            f: Optional[BinaryIO] = None
+            try:
+                for file_name, offset, length, timestamp in connection.execute(sql, parameters):
+                    if file_name != current_file_name:
+                        if f is not None:
+                            f.close()
+                        f = open(os.path.join(_ARCHIVE_DIR, file_name), "rb")
+                        current_file_name = file_name
+                    assert f is not None
+                    f.seek(offset)
+                    text = f.read(length).decode(errors="replace")
+                    if (substring is None) or (substring in text):
+                        yield timestamp, text
+            finally:
+                if f is not None:
+                    f.close()
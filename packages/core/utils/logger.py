@@ -1,15 +1,33 @@
-from typing import Optional
+from typing import Optional, TextIO
+import atexit
+import bisect
 import datetime
 import os
+import queue
+import sys
 import traceback
 import time
 import threading
-from .functions import timeout_lock
 
 _dir = os.path.dirname
 _PROJECT_DIR = _dir(_dir(_dir(_dir(os.path.abspath(__file__)))))
 _DEBUG_LOG_FILE = os.path.join(_PROJECT_DIR, "logs", "debug.log")
 
+# log lines are written to disk in batches by a background thread. A batch
+# is written when it exceeds this size or after this time (in seconds)
+LOG_FLUSH_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL = 1.0
+
+# lines that do not fit into the queue are dropped (and counted) instead of
+# blocking the caller, e.g. when the disk is not writable for a long time
+LOG_QUEUE_MAX_SIZE = 100_000
+
+# open file handles that have not been written to for this long are closed
+_LOG_FILE_IDLE_TIMEOUT = 60
+
+# how long lines are kept in "logs/debug.log"
+DEBUG_LOG_RETENTION = 300
+
 
 def _get_log_line_datetime(log_line: str) -> Optional[datetime.datetime]:
     """Returns the date, if a log line is starting with a valid date."""
@@ -20,6 +38,228 @@ def _get_log_line_datetime(log_line: str) -> Optional[datetime.datetime]:
         return None
 
 
+class _LogSink:
+    """Writes the log lines of all loggers in this process.
+
+    Loggers put their lines into a queue and return immediately. A
+    background thread collects the lines and appends them in batches to
+    the files, keeping the file handles open between batches. Handles are
+    reopened when the file has been moved/removed in the meantime and the
+    daily archive files are rotated by the date of each log line."""
+
+    def __init__(self) -> None:
+        self.queue: queue.Queue[tuple[tuple[str, ...], str] | threading.Event | str] = queue.Queue(
+            maxsize=LOG_QUEUE_MAX_SIZE
+        )
+        self.dropped_line_count: int = 0
+        self.dropped_line_count_lock = threading.Lock()
+
+        # file path -> (file handle, time of the last write)
+        self.files: dict[str, tuple[TextIO, float]] = {}
+
+        # (time, byte offset) of each batch written to debug.log, so that old
+        # lines can be cut off without reading and parsing the whole file.
+        # Bytes before the first entry have not been written by this process
+        self.debug_log_index: list[tuple[float, int]] = []
+        # file status of debug.log after the last write of this process
+        self.debug_log_stat: Optional[os.stat_result] = None
+        self.thread = threading.Thread(target=self._run, daemon=True, name="log-sink")
+        self.thread.start()
+
+    def put(self, file_paths: tuple[str, ...], log_string: str) -> None:
+        """Queue a log line to be appended to the given files."""
+
+        try:
+            self.queue.put_nowait((file_paths, log_string))
+        except queue.Full:
+            with self.dropped_line_count_lock:
+                self.dropped_line_count += 1
+
+    def request(self, command: str | threading.Event) -> None:
+        """Queue a command ("archive") or an event to be set once all lines
+        queued before have been written."""
+
+        try:
+            self.queue.put(command, timeout=5)
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        batch: dict[str, list[str]] = {}
+        batch_size: int = 0
+        batch_start_time: float = time.time()
+        last_write_time: float = time.time()
+
+        while True:
+            try:
+                item = self.queue.get(
+                    timeout=max(0.01, LOG_FLUSH_INTERVAL - (time.time() - last_write_time))
+                )
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                file_paths, log_string = item
+                if len(batch) == 0:
+                    batch_start_time = time.time()
+                for file_path in file_paths:
+                    batch.setdefault(file_path, []).append(log_string)
+                batch_size += len(log_string)
+                if (batch_size < LOG_FLUSH_SIZE) and (
+                    (time.time() - last_write_time) < LOG_FLUSH_INTERVAL
+                ):
+                    continue
+
+            if len(batch) > 0:
+                batch = self._write_batch(batch, batch_start_time)
+                batch_size = sum([len(line) for lines in batch.values() for line in lines])
+            last_write_time = time.time()
+            self._close_idle_files()
+
+            if item == "archive":
+                self._archive_debug_log()
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _get_file(self, file_path: str) -> TextIO:
+        """Return an open handle for the file. Reopen it if the file
+        has been moved, removed or replaced by another process."""
+
+        if file_path in self.files:
+            f = self.files[file_path][0]
+            try:
+                if os.path.samestat(os.fstat(f.fileno()), os.stat(file_path)):
+                    return f
+            except OSError:
+                pass
+            f.close()
+            del self.files[file_path]
+
+        f = open(file_path, "a")
+        self.files[file_path] = (f, time.time())
+        return f
+
+    def _write_batch(
+        self, batch: dict[str, list[str]], batch_start_time: float
+    ) -> dict[str, list[str]]:
+        """Append the lines to the files and return the lines that could
+        not be written (they are retried with the next batch)."""
+
+        with self.dropped_line_count_lock:
+            dropped_line_count = self.dropped_line_count
+            self.dropped_line_count = 0
+        if dropped_line_count > 0:
+            now = datetime.datetime.now().astimezone(datetime.timezone.utc)
+            warning = (
+                f"{now.strftime('%Y-%m-%d %H:%M:%S.%f UTC%z')} - logger - WARNING - "
+                + f"{dropped_line_count} log line(s) have been dropped because the "
+                + "log queue was full\n"
+            )
+            for lines in batch.values():
+                lines.append(warning)
+
+        failed_lines: dict[str, list[str]] = {}
+        for file_path, lines in batch.items():
+            try:
+                f = self._get_file(file_path)
+                if file_path == _DEBUG_LOG_FILE:
+                    self._index_debug_log_batch(f, batch_start_time)
+                f.write("".join(lines))
+                f.flush()
+                self.files[file_path] = (f, time.time())
+                if file_path == _DEBUG_LOG_FILE:
+                    self.debug_log_stat = os.fstat(f.fileno())
+            except OSError as e:
+                print(f"Could not write to log file {file_path}: {e}", file=sys.stderr)
+                if file_path in self.files:
+                    self.files.pop(file_path)[0].close()
+                failed_lines[file_path] = lines[-LOG_QUEUE_MAX_SIZE:]
+        return failed_lines
+
+    def _close_idle_files(self) -> None:
+        now = time.time()
+        for file_path, (f, last_write_time) in list(self.files.items()):
+            if (now - last_write_time) > _LOG_FILE_IDLE_TIMEOUT:
+                f.close()
+                del self.files[file_path]
+
+    def _index_debug_log_batch(self, f: TextIO, batch_start_time: float) -> None:
+        """Record where the next batch starts in debug.log. If the file has
+        been replaced or truncated by someone else, the index starts over."""
+
+        stat = os.fstat(f.fileno())
+        if (
+            (self.debug_log_stat is None)
+            or (not os.path.samestat(stat, self.debug_log_stat))
+            or (stat.st_size < self.debug_log_stat.st_size)
+        ):
+            self.debug_log_index = []
+        self.debug_log_index.append((batch_start_time, stat.st_size))
+
+    def _archive_debug_log(self) -> None:
+        """Only keep the lines from the last 5 minutes in "logs/debug.log".
+
+        The offset to cut at is looked up in the index of written batches
+        and only the kept bytes are copied to the beginning of the file. The
+        lines are only read and parsed when the file contains lines that are
+        not in the index (written before this process has started)."""
+
+        if _DEBUG_LOG_FILE in self.files:
+            self.files.pop(_DEBUG_LOG_FILE)[0].close()
+
+        cutoff_time = time.time() - DEBUG_LOG_RETENTION
+        try:
+            stat = os.stat(_DEBUG_LOG_FILE)
+            index_is_valid = (
+                (len(self.debug_log_index) > 0)
+                and (self.debug_log_index[0][1] == 0)
+                and (self.debug_log_stat is not None)
+                and os.path.samestat(stat, self.debug_log_stat)
+                and (stat.st_size >= self.debug_log_stat.st_size)
+            )
+            if not index_is_valid:
+                if stat.st_size > 0:
+                    Logger.remove_old_debug_log_lines()
+                # all remaining lines are newer than the cutoff time
+                self.debug_log_index = [(cutoff_time, 0)]
+                self.debug_log_stat = os.stat(_DEBUG_LOG_FILE)
+                return
+
+            # the batch started before the cutoff time might contain
+            # lines newer than the cutoff time, so it is kept as well
+            i = bisect.bisect_left(self.debug_log_index, cutoff_time, key=lambda e: e[0])
+            if i <= 1:
+                return
+            cut_offset = self.debug_log_index[i - 1][1]
+
+            with open(_DEBUG_LOG_FILE, "r+b") as f:
+                f.seek(cut_offset)
+                tail = f.read()
+                f.seek(0)
+                f.write(tail)
+                f.truncate()
+            self.debug_log_index = [(t, o - cut_offset) for t, o in self.debug_log_index[i - 1 :]]
+            self.debug_log_stat = os.stat(_DEBUG_LOG_FILE)
+        except FileNotFoundError:
+            self.debug_log_index = []
+            self.debug_log_stat = None
+        except OSError as e:
+            print(f"Could not archive the debug log file: {e}", file=sys.stderr)
+
+
+_sink: Optional[_LogSink] = None
+_sink_initialization_lock = threading.Lock()
+
+
+def _get_sink() -> _LogSink:
+    global _sink
+    with _sink_initialization_lock:
+        if _sink is None:
+            _sink = _LogSink()
+            atexit.register(Logger.flush)
+        return _sink
+
+
 class Logger:
     """A reimplementation of the logging module.
 
@@ -39,21 +279,19 @@ class Logger:
     def __init__(
         self,
         origin: str,
-        lock: Optional[threading.Lock],
         just_print: bool = False,
         main_thread: bool = False,
     ) -> None:
         """Create a new logger instance.
 
         With `just_print = True`, the log lines will be formatted
-        like in the log files but only printed to the console."""
+        like in the log files but only printed to the console.
+        All log lines of the process are written by a single background
+        thread, so no lock is needed."""
 
         self.origin = origin
         self.just_print = just_print
         self.main_thread = main_thread
-        self.lock = lock
-        self.pending_log_lines: list[str] = []
-        self.last_successful_logging_time: float = time.time()
 
     def debug(self, message: str) -> None:
         """Write a debug log (to debug only). Used for verbose output"""
@@ -72,27 +310,26 @@ class Logger:
         self._write_log_line("ERROR", message)
 
     def exception(self, e: BaseException) -> None:
-        """Log the traceback of an exception"""
+        """Log the traceback of an exception. Waits until it has been
+        written, because the process might be about to crash."""
         tb = "\n".join(traceback.format_exception(e))
         self._write_log_line("EXCEPTION", f"{type(e).__name__} occured: {tb}")
+        if not self.just_print:
+            Logger.flush()
 
     def _write_log_line(self, level: str, message: str) -> None:
-        """Format the log line string and write it to "logs/debug.log"
-        and possibly "logs/info.log"""
+        """Format the log line string and queue it to be written to
+        "logs/debug.log" and the daily archive file"""
         now = datetime.datetime.now().astimezone(datetime.timezone.utc)
         log_string = (
             f"{now.strftime('%Y-%m-%d %H:%M:%S.%f UTC%z')} - {self.origin} - {level} - {message}\n"
         )
 
-        def _log_to_file(l: str) -> None:
-            l = "".join(self.pending_log_lines) + l
-            # current logs that only contains from the last 5-10 minutes
-            if self.origin != "cli":
-                with open(_DEBUG_LOG_FILE, "a") as f1:
-                    f1.write(l)
-
+        if self.just_print:
+            print(log_string, end="")
+        else:
             # archive that contains all log lines
-            with open(
+            file_paths: tuple[str, ...] = (
                 os.path.join(
                     _PROJECT_DIR,
                     "logs",
@@ -103,60 +340,56 @@ class Logger:
                         + ".log"
                     ),
                 ),
-                "a",
-            ) as f:
-                f.write(l)
-
-            self.last_successful_logging_time = time.time()
-            self.pending_log_lines = []
-
-        if self.just_print:
-            print(log_string, end="")
-        else:
-            try:
-                if self.lock is None:
-                    _log_to_file(log_string)
-                else:
-                    with timeout_lock(self.lock, timeout=10, label="logs lock"):
-                        _log_to_file(log_string)
-            except TimeoutError:
-                self.pending_log_lines.append(log_string)
-                if (time.time() - self.last_successful_logging_time) > 300:
-                    raise TimeoutError("Could not acquire logs lock for 5 minutes.")
+            )
+            # current logs that only contains from the last 5-10 minutes
+            if self.origin != "cli":
+                file_paths = (_DEBUG_LOG_FILE, *file_paths)
+            _get_sink().put(file_paths, log_string)
 
         # Archive lines older than 5 minutes, every 5 minutes
         if self.main_thread:
             if (now - Logger.last_archive_time).total_seconds() > 300:
-                assert self.lock is not None, "Logger.archive() can only be called with a lock."
-                Logger.archive(self.lock)
+                Logger.archive()
                 Logger.last_archive_time = now
 
     @staticmethod
-    def archive(lock: threading.Lock) -> None:
-        """Only keep the lines from the last 5 minutes in "logs/debug.log"."""
+    def flush(timeout: float = 5) -> bool:
+        """Block until all log lines queued so far have been written to
+        the files. Returns False if this did not happen within the timeout."""
 
-        for i in range(5):
-            try:
-                with timeout_lock(lock, timeout=10, label="logs lock"):
-                    with open(_DEBUG_LOG_FILE, "r") as f:
-                        log_lines_in_file = f.readlines()
-                    if len(log_lines_in_file) == 0:
-                        return
-
-                    lines_to_be_kept: list[str] = []
-                    latest_log_time_to_keep = (
-                        datetime.datetime.now().astimezone() - datetime.timedelta(minutes=5)
-                    )
-                    for index, line in enumerate(log_lines_in_file):
-                        line_time = _get_log_line_datetime(line)
-                        if line_time is not None:
-                            if line_time > latest_log_time_to_keep:
-                                lines_to_be_kept = log_lines_in_file[index:]
-                                break
-
-                    with open(_DEBUG_LOG_FILE, "w") as f:
-                        f.writelines(lines_to_be_kept)
-            except TimeoutError:
-                if i == 4:
-                    raise TimeoutError("Could not acquire logs lock to archive the current logs.")
-                time.sleep(1)
+        if _sink is None:
+            return True
+        event = threading.Event()
+        _sink.request(event)
+        return event.wait(timeout)
+
+    @staticmethod
+    def remove_old_debug_log_lines() -> None:
+        """Parse the timestamps in "logs/debug.log" and remove
+        all lines older than 5 minutes."""
+
+        with open(_DEBUG_LOG_FILE, "r") as f:
+            log_lines_in_file = f.readlines()
+        if len(log_lines_in_file) == 0:
+            return
+
+        lines_to_be_kept: list[str] = []
+        latest_log_time_to_keep = datetime.datetime.now().astimezone() - datetime.timedelta(
+            seconds=DEBUG_LOG_RETENTION
+        )
+        for index, line in enumerate(log_lines_in_file):
+            line_time = _get_log_line_datetime(line)
+            if line_time is not None:
+                if line_time > latest_log_time_to_keep:
+                    lines_to_be_kept = log_lines_in_file[index:]
+                    break
+
+        with open(_DEBUG_LOG_FILE, "w") as f:
+            f.writelines(lines_to_be_kept)
+
+    @staticmethod
+    def archive() -> None:
+        """Only keep the lines from the last 5 minutes in "logs/debug.log".
+        This is done by the background thread writing the log files."""
+
+        _get_sink().request("archive")
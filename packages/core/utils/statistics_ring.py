@@ -0,0 +1,133 @@
+import collections
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class StatisticsRing:
+    """Fixed-capacity ring of floats backed by a numpy array, with the
+    mean, variance, minimum and maximum of its values kept up to date on
+    every `append` (amortized O(1)) and an optional exponentially weighted
+    moving average (EWMA) over all appended values.
+
+    Offers the methods of `tum_esm_utils.datastructures.RingList` used by
+    Pyra (`append`, `get`, `sum`, `is_full`, `get_max_size`, `set_max_size`,
+    `clear`)."""
+
+    def __init__(self, max_size: int, ewma_alpha: Optional[float] = None) -> None:
+        assert max_size >= 1, "max_size must be at least 1"
+        assert (ewma_alpha is None) or (0 < ewma_alpha <= 1), "ewma_alpha must be in (0, 1]"
+        self.ewma_alpha = ewma_alpha
+        self._set_capacity(max_size)
+
+    def _set_capacity(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.values = np.zeros(max_size, dtype=np.float64)
+        self.count: int = 0  # number of values appended since the last clear
+        self.ewma: Optional[float] = None
+        self._sum: float = 0.0
+        self._sum_of_squares: float = 0.0
+
+        # monotonic queues of (append number, value): the first
+        # element is the minimum/maximum of the current window
+        self._min_queue: collections.deque[tuple[int, float]] = collections.deque()
+        self._max_queue: collections.deque[tuple[int, float]] = collections.deque()
+
+    def append(self, value: float) -> None:
+        """Append a value, replacing the oldest one if the ring is full."""
+
+        value = float(value)
+        slot = self.count % self.max_size
+        if self.count >= self.max_size:
+            old_value = float(self.values[slot])
+            self._sum -= old_value
+            self._sum_of_squares -= old_value * old_value
+        self.values[slot] = value
+        self._sum += value
+        self._sum_of_squares += value * value
+        self.count += 1
+
+        # recompute the sums once per round to stop rounding errors from accumulating
+        if slot == self.max_size - 1:
+            self._sum = float(np.sum(self.values))
+            self._sum_of_squares = float(np.dot(self.values, self.values))
+
+        # every append pushes at most one value out of the window
+        oldest_append_number = self.count - self.max_size
+        while (len(self._min_queue) > 0) and (self._min_queue[-1][1] >= value):
+            self._min_queue.pop()
+        self._min_queue.append((self.count - 1, value))
+        if self._min_queue[0][0] < oldest_append_number:
+            self._min_queue.popleft()
+        while (len(self._max_queue) > 0) and (self._max_queue[-1][1] <= value):
+            self._max_queue.pop()
+        self._max_queue.append((self.count - 1, value))
+        if self._max_queue[0][0] < oldest_append_number:
+            self._max_queue.popleft()
+
+        if self.ewma_alpha is not None:
+            if self.ewma is None:
+                self.ewma = value
+            else:
+                self.ewma += self.ewma_alpha * (value - self.ewma)
+
+    def get(self) -> list[float]:
+        """Return the values from oldest to newest."""
+
+        slot = self.count % self.max_size
+        values: list[float] = (
+            self.values[: self.count].tolist()
+            if self.count <= self.max_size
+            else np.concatenate((self.values[slot:], self.values[:slot])).tolist()
+        )
+        return values
+
+    def size(self) -> int:
+        return min(self.count, self.max_size)
+
+    def sum(self) -> float:
+        return self._sum
+
+    def is_full(self) -> bool:
+        return self.count >= self.max_size
+
+    def get_max_size(self) -> int:
+        return self.max_size
+
+    def set_max_size(self, max_size: int) -> None:
+        """Change the capacity, keeping the newest values that fit.
+        The EWMA is kept as well."""
+
+        values, ewma = self.get()[-max_size:], self.ewma
+        self._set_capacity(max_size)
+        for value in values:
+            self.append(value)
+        if self.ewma_alpha is not None:
+            self.ewma = ewma
+
+    def clear(self) -> None:
+        self._set_capacity(self.max_size)
+
+    def mean(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return self._sum / self.size()
+
+    def variance(self) -> Optional[float]:
+        """Population variance of the values in the ring."""
+
+        mean = self.mean()
+        if mean is None:
+            return None
+        return max(self._sum_of_squares / self.size() - mean * mean, 0.0)
+
+    def std(self) -> Optional[float]:
+        variance = self.variance()
+        return None if variance is None else math.sqrt(variance)
+
+    def min(self) -> Optional[float]:
+        return self._min_queue[0][1] if len(self._min_queue) > 0 else None
+
+    def max(self) -> Optional[float]:
+        return self._max_queue[0][1] if len(self._max_queue) > 0 else None
@@ -26,6 +26,11 @@ export default function ConfigSectionHelios() {
             camera_contrast: 64,
             save_images_to_archive: false,
             save_current_image: false,
+            camera_backend: 'opencv',
+            camera_source: null,
+            edge_detection_resolution: 'full',
+            edge_detection_engine: 'skimage',
+            image_archive_format: 'jpeg',
         });
     }
 
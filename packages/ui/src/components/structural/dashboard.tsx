@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { fetchUtils } from '../../utils';
 import {
     OverviewTab,
@@ -30,6 +30,7 @@ export default function Dashboard() {
 
     const [logFetchingIsRunning, setLogFetchingIsRunning] = useState<boolean>(false);
     const [stateFetchingIsRunning, setStateFetchingIsRunning] = useState<boolean>(false);
+    const stateVersion = useRef<number>(-1);
 
     const TUMEnclosureControlsIsVisible =
         centralConfig?.tum_enclosure !== null && centralConfig?.tum_enclosure !== undefined;
@@ -64,16 +65,22 @@ export default function Dashboard() {
             },
         });
     }
-    async function fetchStateFile() {
+    // the state is read from the snapshot published by Pyra Core, the
+    // state.json file is only rewritten every few seconds
+    async function fetchState() {
         try {
             if (!stateFetchingIsRunning) {
                 setStateFetchingIsRunning(true);
-                const fileContent = await fetchUtils.getFileContent('logs/state.json');
-                setCoreState(JSON.parse(fileContent));
+                const p = await fetchUtils.backend.getState(stateVersion.current);
+                const result = JSON.parse(p.stdout);
+                if (result.state !== null) {
+                    setCoreState(result.state);
+                }
+                stateVersion.current = result.version;
                 setStateFetchingIsRunning(false);
             }
         } catch (e) {
-            addUiLogLine('Could not load logs/state.json', `${e}`);
+            addUiLogLine('Could not load the state', `${e}`);
         }
     }
 
@@ -106,12 +113,12 @@ export default function Dashboard() {
     useEffect(() => {
         checkPyraCoreState();
         fetchConfig();
-        fetchStateFile();
+        fetchState();
         fetchLogFile();
         fetchActivityFile();
 
         const interval1 = setInterval(checkPyraCoreState, 180000);
-        const interval2 = setInterval(fetchStateFile, 5000);
+        const interval2 = setInterval(fetchState, 5000);
         const interval3 = setInterval(fetchLogFile, 10000);
         const interval4 = setInterval(fetchActivityFile, 60000);
 
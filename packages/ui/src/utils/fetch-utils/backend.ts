@@ -45,6 +45,9 @@ const backend = {
     stopPyraCore: async (): Promise<ChildProcess<string>> => {
         return await callCLI(['core', 'stop']);
     },
+    getState: async (ifNewerThan: number): Promise<ChildProcess<string>> => {
+        return await callCLI(['state', 'get', '--if-newer-than', ifNewerThan.toString()]);
+    },
     getConfig: async (): Promise<ChildProcess<string>> => {
         return await callCLI(['config', 'get', '--no-indent', '--no-color']);
     },
@@ -100,6 +100,19 @@ export const configSchema = z.object({
             camera_contrast: intSchema,
             save_images_to_archive: z.boolean(),
             save_current_image: z.boolean(),
+            camera_backend: z.union([
+                z.literal('opencv'),
+                z.literal('file'),
+                z.literal('synthetic'),
+            ]),
+            camera_source: z.string().nullable(),
+            edge_detection_resolution: z.union([
+                z.literal('full'),
+                z.literal('half'),
+                z.literal('quarter'),
+            ]),
+            edge_detection_engine: z.union([z.literal('skimage'), z.literal('opencv')]),
+            image_archive_format: z.union([z.literal('jpeg'), z.literal('container')]),
         })
         .nullable(),
     upload: z
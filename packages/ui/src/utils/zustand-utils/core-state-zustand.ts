@@ -2,7 +2,28 @@ import { create } from 'zustand';
 import { z } from 'zod';
 import { set as lodashSet } from 'lodash';
 
+const heliosTimeseriesBucketSchema = z.object({
+    start_time: z.number(),
+    count: z.number(),
+    mean_edge_fraction: z.number(),
+    min_edge_fraction: z.number(),
+    max_edge_fraction: z.number(),
+    good_conditions: z.boolean().nullable(),
+});
+
 const coreStateSchema = z.object({
+    helios_state: z.object({
+        last_edge_fraction: z.number().nullable(),
+        last_edge_fraction_time: z.number().nullable(),
+        window_size: z.number(),
+        window_mean: z.number().nullable(),
+        window_std: z.number().nullable(),
+        window_min: z.number().nullable(),
+        window_max: z.number().nullable(),
+        ewma: z.number().nullable(),
+        current_bucket: heliosTimeseriesBucketSchema.nullable(),
+        timeseries: z.array(heliosTimeseriesBucketSchema),
+    }),
     position: z.object({
         latitude: z.number().nullable(),
         longitude: z.number().nullable(),
@@ -0,0 +1,197 @@
+"""Benchmarks `HeliosImageProcessing.get_lense_position` and
+`HeliosImageProcessing.get_edge_fraction` against their previous
+implementations (skimage's hough circle peaks and full frame masks
+for every lense candidate; full frame canny edge detection and a new
+lense mask for every frame).
+
+Uses the raw images in `logs/helios/*/` (saved with `save_images_to_archive`).
+If there are none, synthetic frames with a lense and shadows are generated.
+The latency per frame and the difference of the results to the previous
+implementations is printed."""
+
+# pyright: reportUnknownMemberType=false, reportUnknownVariableType=false, reportUnknownArgumentType=false
+
+import glob
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+import skimage
+import tum_esm_utils
+from PIL import Image
+
+sys.path.append(tum_esm_utils.files.rel_to_abs_path("../.."))
+
+from packages.core import utils
+
+_HELIOS_IMAGE_DIR = tum_esm_utils.files.rel_to_abs_path("../../logs/helios")
+EDGE_COLOR_THRESHOLD = 40
+TARGET_PIXEL_BRIGHTNESS = 60
+SYNTHETIC_FRAME_COUNT = 10
+
+
+def _previous_get_lense_position(frame: np.ndarray[Any, Any]) -> Optional[tuple[int, int, int]]:
+    bw_frame = skimage.transform.rescale(skimage.color.rgb2gray(frame), 0.5)
+    bw_frame = bw_frame * (60 / np.mean(bw_frame))
+    edges = skimage.feature.canny(bw_frame, sigma=7, low_threshold=3, high_threshold=10)
+    image_height = min(bw_frame.shape)
+    lense_radii = np.arange(round(image_height * 0.5 * 0.45), round(image_height * 0.5 * 1.2), 2)
+    hough_res = skimage.transform.hough_circle(edges, lense_radii)
+    _, cx, cy, radii = skimage.transform.hough_circle_peaks(
+        hough_res, lense_radii, min_xdistance=2, min_ydistance=2, total_num_peaks=50
+    )
+    if len(radii) == 0:
+        return None
+
+    def _contrast(i: int) -> float:
+        rr, cc = skimage.draw.disk((cy[i], cx[i]), radii[i], shape=bw_frame.shape)
+        inner_mask = np.zeros(bw_frame.shape, dtype=np.uint8)
+        inner_mask[rr, cc] = 1
+        outer_mask = 1 - inner_mask
+        return float(
+            abs(
+                (np.sum(bw_frame * inner_mask) / np.sum(inner_mask))
+                - (np.sum(bw_frame * outer_mask) / np.sum(outer_mask))
+            )
+        )
+
+    contrasts = sorted(
+        [(_contrast(i), i) for i in range(len(radii))], key=lambda x: x[0], reverse=True
+    )
+    ranking = sorted(enumerate([x[1] for x in contrasts]), key=lambda x: x[0] + x[1])
+    best = ranking[0][1]
+    return round(cx[best] * 2), round(cy[best] * 2), round(radii[best] * 2)
+
+
+def _previous_get_edge_fraction(
+    rgb_frame: np.ndarray[Any, Any],
+    lense_circle: tuple[int, int, int],
+) -> float:
+    bw_frame = skimage.color.rgb2gray(rgb_frame)
+    evenly_lit_frame = bw_frame * (TARGET_PIXEL_BRIGHTNESS / np.mean(bw_frame))
+    evenly_lit_frame[evenly_lit_frame > 255] = 255
+    edges_dilated = skimage.morphology.dilation(
+        skimage.feature.canny(
+            evenly_lit_frame,
+            sigma=7,
+            low_threshold=round(EDGE_COLOR_THRESHOLD * (1 / 7) * 0.5),
+            high_threshold=round(EDGE_COLOR_THRESHOLD * (1 / 7)),
+        ),
+        skimage.morphology.disk(2),
+    ).astype(np.uint8)
+    inner_mask = np.zeros(evenly_lit_frame.shape, dtype=np.uint8)
+    cc, rr = skimage.draw.disk(
+        center=(lense_circle[1], lense_circle[0]),
+        radius=lense_circle[2] * 0.9,
+        shape=evenly_lit_frame.shape,
+    )
+    inner_mask[cc, rr] = 1
+    pixels_inside_circle = 3.141592 * pow(lense_circle[2] * 0.9, 2)
+    return round(float(np.sum(edges_dilated * inner_mask)) / pixels_inside_circle, 6)
+
+
+def _generate_synthetic_frames() -> list[np.ndarray[Any, Any]]:
+    """Bright lense on a dark background with random shadow bars."""
+
+    rng = np.random.default_rng(42)
+    frames: list[np.ndarray[Any, Any]] = []
+    for _ in range(SYNTHETIC_FRAME_COUNT):
+        frame = np.full((720, 1280), 20, dtype=np.float64)
+        rr, cc = skimage.draw.disk((360, 640), 300, shape=frame.shape)
+        frame[rr, cc] = 180
+        for _ in range(rng.integers(0, 6)):
+            x, y = rng.integers(400, 800), rng.integers(150, 500)
+            frame[y : y + rng.integers(20, 150), x : x + rng.integers(10, 60)] *= 0.4
+        frame += rng.normal(0, 4, frame.shape)
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8)[:, :, None].repeat(3, axis=2))
+    return frames
+
+
+def _time_engine(
+    function: Callable[[np.ndarray[Any, Any], tuple[int, int, int]], float],
+    frames: list[tuple[np.ndarray[Any, Any], tuple[int, int, int]]],
+) -> tuple[list[float], list[float]]:
+    latencies: list[float] = []
+    edge_fractions: list[float] = []
+    for frame, lense in frames:
+        t = time.perf_counter()
+        edge_fractions.append(function(frame, lense))
+        latencies.append(time.perf_counter() - t)
+    return latencies, edge_fractions
+
+
+if __name__ == "__main__":
+    image_paths = sorted(glob.glob(os.path.join(_HELIOS_IMAGE_DIR, "*", "*-raw.jpg")))
+    if len(image_paths) > 0:
+        print(f"Using {len(image_paths)} images from {_HELIOS_IMAGE_DIR}")
+        rgb_frames = [np.array(Image.open(p).convert("RGB")) for p in image_paths]
+    else:
+        print(f"No images found in {_HELIOS_IMAGE_DIR}, using synthetic frames")
+        rgb_frames = _generate_synthetic_frames()
+
+    # lense position: previous implementation, full search and search
+    # around the lense of the previous frame (steady state in the thread)
+    frames: list[tuple[np.ndarray[Any, Any], tuple[int, int, int]]] = []
+    lense_latencies: dict[str, list[float]] = {"previous": [], "full": [], "seeded": []}
+    lense_differences: dict[str, list[int]] = {"full": [], "seeded": []}
+    for rgb_frame in rgb_frames:
+        t1 = time.perf_counter()
+        previous_lense = _previous_get_lense_position(rgb_frame)
+        t2 = time.perf_counter()
+        lense = utils.HeliosImageProcessing.get_lense_position(rgb_frame, use_downscaling=True)
+        t3 = time.perf_counter()
+        seeded_lense = utils.HeliosImageProcessing.get_lense_position(
+            rgb_frame,
+            use_downscaling=True,
+            previous_lense=frames[-1][1] if len(frames) > 0 else lense,
+        )
+        t4 = time.perf_counter()
+        lense_latencies["previous"].append(t2 - t1)
+        lense_latencies["full"].append(t3 - t2)
+        lense_latencies["seeded"].append(t4 - t3)
+        if previous_lense is not None:
+            for name, l in [("full", lense), ("seeded", seeded_lense)]:
+                if l is not None:
+                    lense_differences[name].append(
+                        max(abs(a - b) for a, b in zip(l, previous_lense))
+                    )
+        if lense is not None:
+            frames.append((rgb_frame, lense))
+    print(f"Found a lense in {len(frames)}/{len(rgb_frames)} frames\n")
+    if len(frames) == 0:
+        sys.exit(1)
+
+    print("lense position:")
+    for name, latencies in lense_latencies.items():
+        print(f"    {name:8s} latency (mean):  {statistics.mean(latencies) * 1000:8.1f} ms")
+    for name, differences in lense_differences.items():
+        print(f"    {name:8s} max. difference to previous: {max(differences)} px")
+    print()
+
+    previous_latencies, previous_edge_fractions = _time_engine(_previous_get_edge_fraction, frames)
+    print("edge fraction, previous implementation:")
+    print(f"    latency (mean):  {statistics.mean(previous_latencies) * 1000:8.1f} ms")
+    print(f"    latency (max):   {max(previous_latencies) * 1000:8.1f} ms")
+
+    for engine in ["skimage", "opencv"]:
+        latencies, edge_fractions = _time_engine(
+            lambda f, l: utils.HeliosImageProcessing.get_edge_fraction(
+                rgb_frame=f,
+                station_id="benchmark",
+                edge_color_threshold=EDGE_COLOR_THRESHOLD,
+                target_pixel_brightness=TARGET_PIXEL_BRIGHTNESS,
+                lense_circle=l,
+                engine=engine,  # type: ignore
+            ),
+            frames,
+        )
+        differences = [abs(a - b) for a, b in zip(edge_fractions, previous_edge_fractions)]
+        print(f"edge fraction, {engine} engine (cached masks, cropped to the lense):")
+        print(f"    latency (mean):  {statistics.mean(latencies) * 1000:8.1f} ms")
+        print(f"    latency (max):   {max(latencies) * 1000:8.1f} ms")
+        print(f"    speedup:         {sum(previous_latencies) / sum(latencies):8.1f}x")
+        print(f"    edge fraction difference (mean): {statistics.mean(differences):.6f}")
+        print(f"    edge fraction difference (max):  {max(differences):.6f}")
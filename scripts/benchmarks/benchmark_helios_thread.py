@@ -0,0 +1,108 @@
+"""Benchmarks the Helios pipeline of the `HeliosThread` without a webcam:
+`HeliosInterface.run` (taking the image, autoexposure, lense finding, edge
+fraction) followed by the `HeliosStateEvaluator`, as fast as possible
+instead of every `seconds_per_interval`.
+
+Uses the synthetic camera backend by default. Pass a directory of images
+or a video file to use the file backend instead:
+
+```bash
+python scripts/benchmarks/benchmark_helios_thread.py [path]
+```
+
+The time to the first edge fraction without and with the camera
+capabilities cache (cold and warm start), the throughput and the latency
+per iteration are printed."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import tum_esm_utils
+
+sys.path.append(tum_esm_utils.files.rel_to_abs_path("../.."))
+
+from packages.core import threads, types, utils
+
+ITERATIONS = 100
+
+if __name__ == "__main__":
+    helios_config = types.config.HeliosConfig(
+        camera_id=0,
+        evaluation_size=15,
+        seconds_per_interval=6,
+        min_seconds_between_state_changes=180,
+        edge_pixel_threshold=1,
+        edge_color_threshold=40,
+        target_pixel_brightness=50,
+        camera_brightness=64,
+        camera_contrast=64,
+        save_images_to_archive=False,
+        save_current_image=False,
+        camera_backend="file" if len(sys.argv) > 1 else "synthetic",
+        camera_source=sys.argv[1] if len(sys.argv) > 1 else None,
+    )
+    print(f"Using the {helios_config.camera_backend} camera backend")
+    logger = utils.Logger(origin="helios-benchmark", just_print=True)
+    logger.debug = lambda message: None  # type: ignore  # only print info and above
+
+    capabilities_cache_dir = tempfile.TemporaryDirectory()
+    capabilities_cache_path = os.path.join(capabilities_cache_dir.name, "capabilities.json")
+    # like in the thread, the lense position is kept when reinitializing the camera
+    lense_finder = threads.helios_thread.LenseFinder()
+    for label in ["cold", "warm"]:
+        t = time.perf_counter()
+        helios_interface = threads.helios_thread.HeliosInterface(
+            logger,
+            helios_config,
+            save_autoexposure_images=False,
+            capabilities_cache_path=capabilities_cache_path,
+        )
+        initialization_time = time.perf_counter() - t
+        helios_interface.run(
+            station_id="benchmark",
+            edge_color_threshold=helios_config.edge_color_threshold,
+            target_pixel_brightness=helios_config.target_pixel_brightness,
+            save_images_to_archive=False,
+            save_current_image=False,
+            lense_finder=lense_finder,
+        )
+        print(
+            f"First edge fraction ({label} start): {time.perf_counter() - t:.2f}s "
+            + f"(initialization: {initialization_time:.2f}s)"
+        )
+        if label == "cold":
+            assert helios_interface.frame_capture is not None
+            helios_interface.frame_capture.stop()
+            helios_interface.camera.release()
+
+    evaluator = threads.helios_thread.HeliosStateEvaluator(helios_config.evaluation_size)
+    latencies: list[float] = []
+    t_start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        t = time.perf_counter()
+        edge_fraction = helios_interface.run(
+            station_id="benchmark",
+            edge_color_threshold=helios_config.edge_color_threshold,
+            target_pixel_brightness=helios_config.target_pixel_brightness,
+            save_images_to_archive=False,
+            save_current_image=False,
+            lense_finder=lense_finder,
+        )
+        evaluator.evaluate(
+            edge_fraction=edge_fraction,
+            edge_pixel_threshold=helios_config.edge_pixel_threshold,
+            min_seconds_between_state_changes=helios_config.min_seconds_between_state_changes,
+            now=time.time(),
+        )
+        latencies.append(time.perf_counter() - t)
+    total_time = time.perf_counter() - t_start
+
+    print(f"Iterations:        {ITERATIONS:8d}")
+    print(f"Throughput:        {ITERATIONS / total_time:8.1f} iterations/s")
+    print(f"Latency (first):   {latencies[0] * 1000:8.1f} ms")
+    print(f"Latency (median):  {statistics.median(latencies) * 1000:8.1f} ms")
+    print(f"Latency (max):     {max(latencies[1:]) * 1000:8.1f} ms")
+    print(f"Final state:       {evaluator.current_state}")
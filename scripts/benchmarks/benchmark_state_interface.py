@@ -0,0 +1,169 @@
+"""Benchmarks `StateInterface.update_state` with and without the in-memory
+state store. Uses a temporary state file, does not touch `logs/state.json`.
+
+Eight threads update the state concurrently (like the threads in Pyra Core).
+For every update, the time waiting for the lock and the time holding it is
+recorded.
+
+The state lock is benchmarked by eight threads and two CLI processes
+updating the state file directly, once with the polling SQLite lock
+used before and once with the `utils.InterProcessLock`."""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+import tum_esm_utils
+
+sys.path.append(tum_esm_utils.files.rel_to_abs_path("../.."))
+
+from packages.core import interfaces, utils
+
+THREAD_COUNT = 8
+UPDATES_PER_THREAD = 25
+CLI_PROCESS_COUNT = 2
+
+# the SQLite lock polled in steps of 0.2 seconds
+SQLITE_LOCK_POLL_INTERVAL = 0.2
+
+
+def _get_state_lock(lock_type: str) -> Any:
+    if lock_type == "sqlite":
+        return tum_esm_utils.sqlitelock.SQLiteLock(
+            filepath=interfaces.state_interface.STATE_LOCK_PATH + ".sqlite",
+            timeout=120,
+            poll_interval=SQLITE_LOCK_POLL_INTERVAL,
+        )
+    return utils.InterProcessLock(filepath=interfaces.state_interface.STATE_LOCK_PATH, timeout=120)
+
+
+def _update_state(
+    logger: utils.Logger, state_lock: Any, index: int
+) -> tuple[list[float], list[float]]:
+    wait_times: list[float] = []
+    hold_times: list[float] = []
+    for i in range(UPDATES_PER_THREAD):
+        t1 = time.perf_counter()
+        with interfaces.StateInterface.update_state(state_lock, logger) as s:
+            t2 = time.perf_counter()
+            s.position.sun_elevation = index * 1000 + i
+            s.exceptions_state.clear_exception_origin(f"thread-{index}")
+        t3 = time.perf_counter()
+        wait_times.append(t2 - t1)
+        hold_times.append(t3 - t2)
+    return wait_times, hold_times
+
+
+def _run_threads(
+    logger: utils.Logger, lock_type: str = "os", cli_process_count: int = 0
+) -> tuple[list[float], list[float], float]:
+    wait_times: list[float] = []
+    hold_times: list[float] = []
+    results_lock = threading.Lock()
+
+    def _worker(thread_index: int) -> None:
+        w, h = _update_state(logger, _get_state_lock(lock_type), thread_index)
+        with results_lock:
+            wait_times.extend(w)
+            hold_times.extend(h)
+
+    # the CLI processes update the state file directly, like `pyra-cli` does
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                __file__,
+                "--cli-worker",
+                lock_type,
+                os.path.dirname(interfaces.state_interface.STATE_FILE_PATH),
+                str(THREAD_COUNT + i),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        for i in range(cli_process_count)
+    ]
+    for p in processes:
+        assert (p.stdin is not None) and (p.stdout is not None)
+        assert p.stdout.readline() == b"ready\n"
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(THREAD_COUNT)]
+    t_start = time.perf_counter()
+    for p in processes:
+        p.stdin.write(b"start\n")  # type: ignore
+        p.stdin.flush()  # type: ignore
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for p in processes:
+        w, h = json.loads(p.communicate()[0])
+        wait_times.extend(w)
+        hold_times.extend(h)
+    return wait_times, hold_times, time.perf_counter() - t_start
+
+
+def _use_state_files(directory: str) -> None:
+    interfaces.state_interface.STATE_FILE_PATH = os.path.join(directory, "state.json")
+    interfaces.state_interface.STATE_JOURNAL_PATH = os.path.join(directory, "state.journal")
+    interfaces.state_interface.STATE_LOCK_PATH = os.path.join(directory, "state.lock")
+
+
+def _print_results(
+    label: str, wait_times: list[float], hold_times: list[float], duration: float
+) -> None:
+    def _ms(value: float) -> str:
+        return f"{value * 1000:8.2f} ms"
+
+    print(f"{label}:")
+    print(f"    updates/sec:        {len(hold_times) / duration:10.1f}")
+    for name, values in [("lock wait", wait_times), ("lock hold", hold_times)]:
+        print(f"    {name} (mean):   {_ms(statistics.mean(values))}")
+        print(f"    {name} (p95):    {_ms(statistics.quantiles(values, n=20)[-1])}")
+        print(f"    {name} (max):    {_ms(max(values))}")
+
+
+if __name__ == "__main__":
+    logger = utils.Logger(origin="benchmark", just_print=True)
+
+    if sys.argv[1:2] == ["--cli-worker"]:
+        _use_state_files(sys.argv[3])
+        state_lock = _get_state_lock(sys.argv[2])
+        print("ready", flush=True)
+        sys.stdin.readline()  # start at the same time as the threads
+        print(json.dumps(_update_state(logger, state_lock, int(sys.argv[4]))))
+        exit(0)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _use_state_files(tmpdir)
+
+        print(f"{THREAD_COUNT} threads with {UPDATES_PER_THREAD} updates each\n")
+        for lock_type, label in [("sqlite", "SQLite lock"), ("os", "OS file lock")]:
+            _print_results(
+                f"{label}, {THREAD_COUNT} threads and {CLI_PROCESS_COUNT} CLI processes",
+                *_run_threads(logger, lock_type, CLI_PROCESS_COUNT),
+            )
+        _print_results("Reading/writing the state file on every update", *_run_threads(logger))
+
+        interfaces.StateInterface.enable_in_memory_store(logger)
+        _print_results("In-memory state store", *_run_threads(logger))
+        interfaces.StateInterface.flush()
+
+        # bytes written per update: the whole state vs. the changed paths
+        state_before = interfaces.StateInterface.load_state(None, logger)  # type: ignore
+        state_after = state_before.model_copy(deep=True)
+        state_after.position.sun_elevation = -1
+        patches = interfaces.state_interface._diff_json(  # pyright: ignore[reportPrivateUsage]
+            state_before.model_dump(mode="json"), state_after.model_dump(mode="json"), ()
+        )
+        journal_line = json.dumps({"timestamp": time.time(), "patches": patches})
+        print(
+            f"\nbytes per update: whole state = {len(state_after.model_dump_json(indent=4))}, ",
+            end="",
+        )
+        print(f"journal line = {len(journal_line)}")
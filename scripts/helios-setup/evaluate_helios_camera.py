@@ -10,7 +10,7 @@ from packages.core import threads, utils, types
 CAMERA_ID = 0
 
 if __name__ == "__main__":
-    logger = utils.Logger("helios-evaluation", lock=None, just_print=True)
+    logger = utils.Logger("helios-evaluation", just_print=True)
 
     logger.info(f"Testing camera with ID: {CAMERA_ID}")
     helios_interface = threads.helios_thread.HeliosInterface(
@@ -29,6 +29,7 @@ if __name__ == "__main__":
             save_images_to_archive=False,
         ),
         initialization_tries=3,
+        capabilities_cache_path=None,  # always probe the camera
     )
     lense_finder = threads.helios_thread.LenseFinder(logger)
 
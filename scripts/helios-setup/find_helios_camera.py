@@ -34,7 +34,7 @@ def find_available_camera_ids() -> list[int]:
 
 
 if __name__ == "__main__":
-    logger = utils.Logger("helios-finding", lock=None, just_print=True)
+    logger = utils.Logger("helios-finding", just_print=True)
 
     available_camera_ids = find_available_camera_ids()
     print(f"Available camera IDs: {available_camera_ids}")
@@ -58,6 +58,7 @@ if __name__ == "__main__":
                     save_images_to_archive=False,
                 ),
                 initialization_tries=3,
+                capabilities_cache_path=None,  # always probe the camera
             )
         except Exception as e:
             logger.error(f"Failed to initialize HeliosInterface for camera ID {camera_id}: {e}")
@@ -9,4 +9,4 @@ sys.path.append(tum_esm_utils.files.rel_to_abs_path(".."))
 from packages.core import threads
 
 if __name__ == "__main__":
-    threads.UploadThread.main(logs_lock=threading.Lock(), headless=True)
+    threads.UploadThread.main(stop_event=threading.Event(), headless=True)
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import tempfile
+import pytest
+
+dir = os.path.dirname
+PROJECT_DIR = dir(dir(dir(os.path.abspath(__file__))))
+PYRA_CLI_PATH = os.path.join(PROJECT_DIR, "packages", "cli", "main.py")
+
+
+def _line(time: str, origin: str, level: str, message: str) -> str:
+    return f"2024-10-09 {time}.000000 UTC+0000 - {origin} - {level} - {message}\n"
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_split_log_files_by_origin() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ["a", "b"]:
+            with open(os.path.join(tmpdir, f"{name}.log"), "w") as f:
+                f.write(_line("10:00:00", "main", "INFO", "line 1"))
+                f.write(_line("10:00:01", "opus", "DEBUG", "line 2"))
+                f.write(_line("11:00:00", "opus", "EXCEPTION", "line 3"))
+                f.write("  traceback\n")
+                f.write(_line("11:00:01", "main", "DEBUG", "line 4"))
+
+        process = subprocess.run(
+            ["python", PYRA_CLI_PATH, "logs", "split-log-files-by-origin", f"{tmpdir}/*.log"],
+            capture_output=True,
+        )
+        assert process.returncode == 0, process.stderr.decode()
+        assert "MB/s" in process.stdout.decode()
+        for name in ["a", "b"]:
+            with open(os.path.join(tmpdir, f"{name}-opus.log")) as f:
+                assert f.read() == (
+                    _line("10:00:01", "opus", "DEBUG", "line 2")
+                    + _line("11:00:00", "opus", "EXCEPTION", "line 3")
+                    + "  traceback\n"
+                )
+            with open(os.path.join(tmpdir, f"{name}-main.log")) as f:
+                assert len(f.readlines()) == 2
+
+        # lines are filtered by level and time
+        os.remove(os.path.join(tmpdir, "b.log"))
+        process = subprocess.run(
+            [
+                "python",
+                PYRA_CLI_PATH,
+                "logs",
+                "split-log-files-by-origin",
+                os.path.join(tmpdir, "a.log"),
+                "--level",
+                "DEBUG",
+                "--level",
+                "EXCEPTION",
+                "--from",
+                "2024-10-09 10:00:01",
+                "--to",
+                "2024-10-09 11:00:01",
+            ],
+            capture_output=True,
+        )
+        assert process.returncode == 0, process.stderr.decode()
+        assert "Only one origin found" in process.stdout.decode()
+        assert not any(f.endswith(".tmp") for f in os.listdir(tmpdir))
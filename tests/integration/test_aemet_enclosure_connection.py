@@ -1,6 +1,5 @@
 import time
 import pytest
-import tum_esm_utils
 from packages.core import interfaces, types, utils
 
 
@@ -8,11 +7,10 @@ from packages.core import interfaces, types, utils
 @pytest.mark.integration
 def test_aemet_enclosure_connection() -> None:
     config = types.Config.load()
-    logger = utils.Logger(origin="aemet-enclosure", lock=None, just_print=True)
-    state_lock = tum_esm_utils.sqlitelock.SQLiteLock(
+    logger = utils.Logger(origin="aemet-enclosure", just_print=True)
+    state_lock = utils.InterProcessLock(
         filepath=interfaces.state_interface.STATE_LOCK_PATH,
         timeout=interfaces.state_interface.STATE_LOCK_TIMEOUT,
-        poll_interval=interfaces.state_interface.STATE_LOCK_POLL_INTERVAL,
     )
 
     if config.aemet_enclosure is None:
@@ -0,0 +1,79 @@
+import datetime
+import os
+import tempfile
+import pytest
+
+from packages.core import interfaces, types
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_activity_archive() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # running from 23:00 on Dec 31st to 01:00 on Jan 1st, measuring for 30 minutes
+        day_1 = types.ActivityHistory(date=datetime.date(2023, 12, 31))
+        day_2 = types.ActivityHistory(date=datetime.date(2024, 1, 1))
+        for i in range(23 * 60, 24 * 60):
+            day_1.is_running[i] = 1
+        for i in range(0, 60):
+            day_2.is_running[i] = 1
+        for i in range(0, 30):
+            day_2.is_measuring[i] = 1
+        day_2.has_errors[59] = 1
+        day_2.cli_calls[10] = 300  # stored as 255
+        day_2.opus_startups[0] = 2
+        with open(os.path.join(tmpdir, "activity-2023-12-31.json"), "w") as f:
+            f.write(day_1.model_dump_json())
+        interfaces.ActivityArchive.write_day(day_2, tmpdir)
+
+        assert interfaces.ActivityArchive.import_json_files(tmpdir) == [day_1.date]
+        assert interfaces.ActivityArchive.read_day(day_1.date, tmpdir) == day_1
+        read_day_2 = interfaces.ActivityArchive.read_day(day_2.date, tmpdir)
+        assert read_day_2 is not None
+        assert read_day_2.cli_calls[10] == 255
+        assert read_day_2.is_measuring == day_2.is_measuring
+        assert interfaces.ActivityArchive.read_day(datetime.date(2024, 1, 2), tmpdir) is None
+        assert interfaces.ActivityArchive.read_day(datetime.date(2022, 1, 1), tmpdir) is None
+
+        # the file only grows up to the last written day
+        assert os.path.getsize(interfaces.ActivityArchive.get_path(2024, tmpdir)) == (
+            512 + interfaces.activity_archive.DAY_BLOCK_SIZE
+        )
+
+        hours = interfaces.ActivityArchive.query(
+            datetime.datetime(2023, 12, 31, 22, 30),
+            datetime.datetime(2024, 1, 1, 2),
+            "hour",
+            tmpdir,
+        )
+        assert [(h.start.hour, h.minutes, h.running_minutes) for h in hours] == [
+            (22, 30, 0),
+            (23, 60, 60),
+            (0, 60, 60),
+            (1, 60, 0),
+        ]
+        assert hours[2].measuring_fraction == 0.5
+        assert hours[2].error_minutes == 1
+        assert hours[2].cli_calls == 255
+        assert hours[2].opus_startups == 2
+
+        months = interfaces.ActivityArchive.query(
+            datetime.datetime(2023, 12, 1), datetime.datetime(2024, 3, 1), "month", tmpdir
+        )
+        assert [m.start.month for m in months] == [12, 1, 2]
+        assert [m.running_minutes for m in months] == [60, 60, 0]
+        assert months[0].uptime_fraction == pytest.approx(60 / (31 * 1440))
+
+        minutes = interfaces.ActivityArchive.query(
+            datetime.datetime(2024, 1, 1, 0, 29),
+            datetime.datetime(2024, 1, 1, 0, 31),
+            "minute",
+            tmpdir,
+        )
+        assert [m.measuring_minutes for m in minutes] == [1, 0]
+        assert (
+            interfaces.ActivityArchive.query(
+                datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1), "day", tmpdir
+            )
+            == []
+        )
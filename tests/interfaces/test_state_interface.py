@@ -0,0 +1,208 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Generator
+import pytest
+
+from packages.core import interfaces, utils
+
+logger = utils.Logger(origin="testing", just_print=True)
+
+
+@pytest.fixture()
+def temporary_state_files(monkeypatch: pytest.MonkeyPatch) -> Generator[str, None, None]:
+    """Point the state interface to a temporary directory."""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setattr(
+            interfaces.state_interface, "STATE_FILE_PATH", os.path.join(tmpdir, "state.json")
+        )
+        monkeypatch.setattr(
+            interfaces.state_interface, "STATE_JOURNAL_PATH", os.path.join(tmpdir, "state.journal")
+        )
+        monkeypatch.setattr(
+            interfaces.state_interface, "STATE_LOCK_PATH", os.path.join(tmpdir, "state.lock")
+        )
+        monkeypatch.setattr(
+            interfaces.state_interface,
+            "STATE_SNAPSHOT_PATH",
+            os.path.join(tmpdir, "state.snapshot"),
+        )
+        monkeypatch.setattr(interfaces.state_interface, "_store", None)
+        yield tmpdir
+        interfaces.StateInterface.disable_in_memory_store()
+
+
+def _state_lock() -> utils.InterProcessLock:
+    return utils.InterProcessLock(filepath=interfaces.state_interface.STATE_LOCK_PATH, timeout=5)
+
+
+def _read_state_file() -> Any:
+    with open(interfaces.state_interface.STATE_FILE_PATH) as f:
+        return json.load(f)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_in_memory_state_store(temporary_state_files: str) -> None:
+    state_lock = _state_lock()
+    interfaces.StateInterface.enable_in_memory_store(logger)
+    subscription = utils.EventBus.subscribe(
+        "state.measurements_should_be_running", "state.helios_indicates_good_conditions"
+    )
+
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.measurements_should_be_running = True
+        s.position.sun_elevation = 42
+    assert subscription.wait(timeout=0) == ["state.measurements_should_be_running"]
+
+    # readers see the update before it has been written to disk
+    s = interfaces.StateInterface.load_state(state_lock, logger)
+    assert s.measurements_should_be_running is True
+    assert s.position.sun_elevation == 42
+
+    interfaces.StateInterface.flush()
+    content = _read_state_file()
+    assert content["measurements_should_be_running"] is True
+    assert content["position"]["sun_elevation"] == 42
+
+    # another process writes to the state file while the core has pending updates
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 43
+    content["helios_indicates_good_conditions"] = "yes"
+    content["position"]["sun_elevation"] = 0
+    with open(interfaces.state_interface.STATE_FILE_PATH, "w") as f:
+        f.write(json.dumps(content, indent=4))
+
+    interfaces.StateInterface.flush()
+    content = _read_state_file()
+    assert content["helios_indicates_good_conditions"] == "yes"
+    assert content["position"]["sun_elevation"] == 43
+    s = interfaces.StateInterface.load_state(state_lock, logger)
+    assert s.helios_indicates_good_conditions == "yes"
+    assert subscription.wait(timeout=0) == ["state.helios_indicates_good_conditions"]
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_state_journal(temporary_state_files: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    state_lock = _state_lock()
+    monkeypatch.setattr(interfaces.state_interface, "STATE_WRITE_BEHIND_DELAY", 0.05)
+    monkeypatch.setattr(interfaces.state_interface, "STATE_COMPACTION_INTERVAL", 3600)
+    interfaces.StateInterface.enable_in_memory_store(logger)
+    interfaces.StateInterface.flush()
+
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 42
+        s.exceptions_state.add_exception(origin="helios", exception=Exception("test"))
+
+    # only the changed paths are appended to the journal
+    journal_path = interfaces.state_interface.STATE_JOURNAL_PATH
+    t = time.time()
+    while not os.path.exists(journal_path):
+        assert time.time() - t < 5, "journal has not been written"
+        time.sleep(0.05)
+    time.sleep(0.1)
+    with open(journal_path) as f:
+        patches = [p for line in f for p, _ in json.loads(line)["patches"]]
+    assert ["position", "sun_elevation"] in patches
+    assert ["exceptions_state", "current"] in patches
+    assert ["position", "latitude"] not in patches
+    assert _read_state_file()["position"]["sun_elevation"] is None
+
+    # other processes apply the journal when reading the state file
+    store = interfaces.state_interface._store  # pyright: ignore[reportPrivateUsage]
+    monkeypatch.setattr(interfaces.state_interface, "_store", None)
+    s = interfaces.StateInterface.load_state(state_lock, logger)
+    assert s.position.sun_elevation == 42
+    assert s.exceptions_state.current[0].origin == "helios"
+
+    # writing the state file directly compacts the journal
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.helios_indicates_good_conditions = "yes"
+    assert not os.path.exists(journal_path)
+    content = _read_state_file()
+    assert content["position"]["sun_elevation"] == 42
+    assert content["helios_indicates_good_conditions"] == "yes"
+    monkeypatch.setattr(interfaces.state_interface, "_store", store)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_state_snapshot(temporary_state_files: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    state_lock = _state_lock()
+    monkeypatch.setattr(interfaces.state_interface, "STATE_WRITE_BEHIND_DELAY", 0.05)
+    assert interfaces.StateInterface.read_state_snapshot() is None
+
+    # the core publishes its in-memory state shortly after every update
+    interfaces.StateInterface.enable_in_memory_store(logger)
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 42
+    version = interfaces.StateInterface.get_version()
+    t = time.time()
+    while True:
+        snapshot = interfaces.StateInterface.read_state_snapshot()
+        assert snapshot is not None
+        if snapshot[0] == version:
+            assert snapshot[1] is not None
+            assert json.loads(snapshot[1])["position"]["sun_elevation"] == 42
+            break
+        assert time.time() - t < 5, "snapshot has not been published"
+        time.sleep(0.05)
+
+    # reads while the snapshot is being written are retried and given up eventually
+    store = interfaces.state_interface._store  # pyright: ignore[reportPrivateUsage]
+    assert store is not None and store.snapshot_writer is not None
+    snapshot_mmap = store.snapshot_writer.mmap
+    header = snapshot_mmap[:64]
+    snapshot_mmap[16:24] = (store.snapshot_writer.sequence + 1).to_bytes(8, "little")
+    assert interfaces.StateInterface.read_state_snapshot() is None
+    snapshot_mmap[:64] = header
+    assert interfaces.StateInterface.read_state_snapshot() == snapshot
+
+    # the payload is only read if the state is newer than the given version
+    assert interfaces.StateInterface.read_state_snapshot(if_newer_than=version) == (version, None)
+    assert interfaces.StateInterface.read_state_snapshot(if_newer_than=version - 1) == snapshot
+
+    # the payload does not match the checksum -> torn read
+    snapshot_mmap[64] = ord("[")
+    assert interfaces.StateInterface.read_state_snapshot() is None
+    snapshot_mmap[64] = ord("{")
+
+    # when the core stops, readers use the state file again
+    interfaces.StateInterface.disable_in_memory_store()
+    assert interfaces.StateInterface.read_state_snapshot() is None
+    assert _read_state_file()["position"]["sun_elevation"] == 42
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_state_version(temporary_state_files: str) -> None:
+    state_lock = _state_lock()
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 42
+    file_version = interfaces.StateInterface.get_version()
+    assert file_version > 0
+
+    # versions continue to increase when the core takes over
+    interfaces.StateInterface.enable_in_memory_store(logger)
+    version = interfaces.StateInterface.get_version()
+    position_version = interfaces.StateInterface.get_version("position")
+    exceptions_version = interfaces.StateInterface.get_version("exceptions_state")
+    assert version > file_version
+
+    # only the versions of the changed sections are incremented
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 43
+    assert interfaces.StateInterface.get_version() == version + 1
+    assert interfaces.StateInterface.get_version("position") == version + 1
+    assert interfaces.StateInterface.get_version("exceptions_state") == exceptions_version
+    assert position_version < version + 1
+    with interfaces.StateInterface.update_state(state_lock, logger) as s:
+        s.position.sun_elevation = 43
+    assert interfaces.StateInterface.get_version() == version + 1
+
+    # versions keep increasing when the core stops
+    interfaces.StateInterface.disable_in_memory_store()
+    assert interfaces.StateInterface.get_version() > version + 1
@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+
+from packages.core import threads, types, utils
+from ..fixtures import SAMPLE_CONFIG
+
+
+class _SleepingThread(threads.abstract_thread.AbstractThread):
+    logger_origin = "testing"
+    is_enabled = True
+
+    @staticmethod
+    def should_be_running(config: types.Config, logger: utils.Logger) -> bool:
+        return _SleepingThread.is_enabled
+
+    @staticmethod
+    def get_new_thread_object(
+        stop_event: threading.Event,
+    ) -> threading.Thread:
+        return threading.Thread(
+            target=_SleepingThread.main,
+            daemon=True,
+            args=(stop_event,),
+        )
+
+    @staticmethod
+    def main(
+        stop_event: threading.Event,
+        headless: bool = False,
+    ) -> None:
+        subscription = utils.EventBus.subscribe("testing")
+        while not stop_event.is_set():
+            subscription.wait(timeout=300, stop_event=stop_event)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_thread_stopping() -> None:
+    thread_instance = _SleepingThread()
+    utils.LockMetrics.reset()
+
+    _SleepingThread.is_enabled = True
+    thread_instance.update_thread_state(SAMPLE_CONFIG)
+    assert thread_instance.thread.is_alive()
+    old_thread_object = thread_instance.thread
+
+    # stopping the thread does not wait for its 300 second sleep
+    _SleepingThread.is_enabled = False
+    t1 = time.time()
+    assert thread_instance.update_thread_state(SAMPLE_CONFIG) is False
+    assert time.time() - t1 < 1
+    assert not old_thread_object.is_alive()
+    assert thread_instance.last_shutdown_latency is not None
+    assert thread_instance.last_shutdown_latency < 1
+
+    # the shutdown latency is recorded in the metrics file
+    shutdown_metrics = utils.LockMetrics.get()["thread_shutdowns"]["testing"]
+    assert shutdown_metrics["count"] == 1
+    assert shutdown_metrics["last_latency"] == thread_instance.last_shutdown_latency
+
+    # the thread can be started again
+    _SleepingThread.is_enabled = True
+    thread_instance.update_thread_state(SAMPLE_CONFIG)
+    assert thread_instance.thread.is_alive()
+    assert thread_instance.thread is not old_thread_object
+    thread_instance.stop()
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import time
+import cv2 as cv
+import numpy as np
+import pytest
+
+from packages.core import interfaces, threads, types, utils
+
+
+def _get_helios_config(camera_backend: str, camera_source: str | None) -> types.config.HeliosConfig:
+    return types.config.HeliosConfig(
+        camera_id=0,
+        evaluation_size=2,
+        seconds_per_interval=5,
+        min_seconds_between_state_changes=0,
+        edge_pixel_threshold=1,
+        edge_color_threshold=40,
+        target_pixel_brightness=50,
+        camera_brightness=64,
+        camera_contrast=64,
+        save_images_to_archive=False,
+        save_current_image=False,
+        camera_backend=camera_backend,  # type: ignore
+        camera_source=camera_source,
+    )
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_synthetic_helios_camera() -> None:
+    logger = utils.Logger(origin="pytest", just_print=True)
+    helios_interface = threads.helios_thread.HeliosInterface(
+        logger,
+        _get_helios_config("synthetic", None),
+        save_autoexposure_images=False,
+        capabilities_cache_path=None,
+    )
+    try:
+        assert helios_interface.available_exposures == list(
+            interfaces.helios_camera.SIMULATED_EXPOSURES
+        )
+        helios_interface.target_pixel_brightness = 50
+        helios_interface.adjust_exposure()
+        assert helios_interface.current_exposure == -7
+        assert 25 < np.mean(helios_interface.take_image()) < 75
+
+        edge_fraction = helios_interface.run(
+            station_id="test",
+            edge_color_threshold=40,
+            target_pixel_brightness=50,
+            save_images_to_archive=False,
+            save_current_image=False,
+            lense_finder=threads.helios_thread.LenseFinder(),
+        )
+        assert edge_fraction > 0.01
+    finally:
+        del helios_interface
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_file_helios_camera() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i, color in enumerate([40, 80]):
+            cv.imwrite(os.path.join(tmpdir, f"{i}.png"), np.full((72, 128, 3), color, np.uint8))
+        camera = interfaces.open_helios_camera(_get_helios_config("file", tmpdir))
+        assert isinstance(camera, interfaces.helios_camera.FileHeliosCamera)
+        camera.frames_per_second = None
+
+        # images are replayed in a loop, resized and exposed like by a camera
+        assert camera.isOpened()
+        assert camera.set(cv.CAP_PROP_FRAME_WIDTH, 64)
+        assert camera.set(cv.CAP_PROP_FRAME_HEIGHT, 36)
+        frames = [camera.read()[1] for _ in range(3)]
+        assert [f.shape for f in frames] == [(36, 64, 3)] * 3
+        assert [int(f[0, 0, 0]) for f in frames] == [40, 80, 40]
+        assert not camera.set(cv.CAP_PROP_EXPOSURE, 0)
+        assert camera.set(cv.CAP_PROP_EXPOSURE, -8)
+        assert int(camera.read()[1][0, 0, 0]) == 40
+        camera.release()
+        assert not camera.isOpened()
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_camera_capabilities_cache() -> None:
+    logger = utils.Logger(origin="pytest", just_print=True)
+    helios_config = _get_helios_config("synthetic", None)
+    signature = interfaces.HeliosCameraCapabilities.get_signature(helios_config)
+    exposures = list(interfaces.helios_camera.SIMULATED_EXPOSURES)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_path = os.path.join(tmpdir, "capabilities.json")
+
+        def _init() -> threads.helios_thread.HeliosInterface:
+            return threads.helios_thread.HeliosInterface(
+                logger,
+                helios_config,
+                save_autoexposure_images=False,
+                capabilities_cache_path=cache_path,
+            )
+
+        # the first start probes the exposures and caches them
+        helios_interface = _init()
+        del helios_interface
+        capabilities = interfaces.HeliosCameraCapabilities.load(signature, cache_path)
+        assert capabilities is not None
+        assert capabilities.available_exposures == exposures
+        assert capabilities.resolution == (1280, 720)
+        assert interfaces.HeliosCameraCapabilities.load("opencv:0:", cache_path) is None
+
+        # a warm start continues at the last good exposure and
+        # skips the autoexposure if it has been done recently
+        capabilities.last_good_exposure = -9
+        capabilities.target_pixel_brightness = 50
+        capabilities.last_autoexposure_time = time.time()
+        capabilities.save(signature, cache_path)
+        helios_interface = _init()
+        assert helios_interface.available_exposures == exposures
+        assert helios_interface.current_exposure == -9
+        assert helios_interface.target_pixel_brightness == 50
+        assert helios_interface.last_autoexposure_time == capabilities.last_autoexposure_time
+        del helios_interface
+
+        # with another brightness or contrast, the autoexposure is repeated
+        capabilities.save(signature, cache_path)
+        helios_config.camera_brightness += 10
+        helios_interface = _init()
+        assert helios_interface.current_exposure == -9
+        assert helios_interface.target_pixel_brightness == 0
+        assert helios_interface.last_autoexposure_time == 0
+        del helios_interface
+        helios_config.camera_brightness -= 10
+
+        # outdated capabilities are detected and probed again
+        capabilities.available_exposures = exposures[2:]
+        capabilities.save(signature, cache_path)
+        helios_interface = _init()
+        assert helios_interface.available_exposures == exposures
+        assert helios_interface.current_exposure == -13
+        del helios_interface
+
+        # so is another camera model with the same signature (resolution differs)
+        capabilities.available_exposures = exposures
+        capabilities.resolution = (640, 480)
+        capabilities.save(signature, cache_path)
+        helios_interface = _init()
+        assert helios_interface.current_exposure == -13
+        assert helios_interface.resolution == (1280, 720)
+        del helios_interface
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Any
+import numpy as np
+import pytest
+
+from packages.core import threads
+
+
+class _FakeCamera:
+    """Delivers a frame every 5 ms, filled with the number of the frame."""
+
+    def __init__(self) -> None:
+        self.frame_number = 0
+        self.lock = threading.Lock()
+
+    def read(self) -> tuple[bool, np.ndarray[Any, Any]]:
+        time.sleep(0.005)
+        with self.lock:
+            self.frame_number += 1
+            return True, np.full((4, 6, 3), self.frame_number % 256, dtype=np.uint8)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_frame_capture() -> None:
+    camera = _FakeCamera()
+    capture = threads.helios_thread.HeliosFrameCapture(camera, exposure=-5)  # type: ignore
+    try:
+        result = capture.get_frame()
+        assert result is not None
+        frame, frame_number, timestamp, exposure = result
+        assert frame.shape == (4, 6, 3)
+        assert exposure == -5
+        assert time.time() - timestamp < 1
+
+        # frames are not returned twice and the latest frame is returned
+        time.sleep(0.1)
+        result = capture.get_frame(newer_than=frame_number)
+        assert result is not None
+        assert result[1] > frame_number + 5
+        assert int(result[0][0, 0, 0]) == result[1] % 256
+
+        # frames taken before a settings change are discarded
+        with capture.camera_lock:
+            frame_count = capture.frame_count
+            capture.invalidate_frames(exposure=-3, discard_count=2)
+        result = capture.get_frame()
+        assert result is not None
+        assert result[1] >= frame_count + 3
+        assert result[3] == -3
+    finally:
+        capture.stop()
+    assert not capture.thread.is_alive()
+    assert capture.get_frame(newer_than=capture.frame_count, timeout=0.1) is None
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_exposure_search() -> None:
+    """The search finds the same exposure as the full sweep with fewer measurements."""
+
+    def _brightness(exposure: int) -> float:
+        return min(255.0, 40 * 2 ** (0.8 * (exposure + 8)))
+
+    helios_interface = threads.helios_thread.HeliosInterface
+    slope = 1.0
+    for current_exposure in [-13, -8, -1]:
+        measured: dict[int, float] = {}
+
+        def _measure(exposure: int) -> float:
+            measured[exposure] = _brightness(exposure)
+            return measured[exposure]
+
+        helios_interface._search_exposure(  # pyright: ignore[reportPrivateUsage]
+            exposures=list(range(-13, 0)),
+            current_exposure=current_exposure,
+            current_brightness=_brightness(current_exposure),
+            target_brightness=100,
+            slope=slope,
+            measure=_measure,
+        )
+        best = min(measured, key=lambda e: abs(measured[e] - 100))
+        assert best == min(range(-13, 0), key=lambda e: abs(_brightness(e) - 100))
+        assert len(measured) <= 4
+
+        # the slope is learned from the measurements
+        fitted_slope = helios_interface._fit_exposure_brightness_slope(  # pyright: ignore[reportPrivateUsage]
+            measured
+        )
+        slope = fitted_slope or slope
+    assert slope == pytest.approx(0.8, abs=0.05)
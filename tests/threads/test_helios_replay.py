@@ -0,0 +1,132 @@
+import os
+import subprocess
+import tempfile
+import numpy as np
+import pytest
+from PIL import Image
+
+from packages.core import threads, types
+
+dir = os.path.dirname
+PROJECT_DIR = dir(dir(dir(os.path.abspath(__file__))))
+PYRA_CLI_PATH = os.path.join(PROJECT_DIR, "packages", "cli", "main.py")
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_state_evaluator() -> None:
+    evaluator = threads.helios_thread.HeliosStateEvaluator(evaluation_size=2)
+
+    def _evaluate(edge_fraction: float, now: float) -> str:
+        return evaluator.evaluate(
+            edge_fraction=edge_fraction,
+            edge_pixel_threshold=1,
+            min_seconds_between_state_changes=100,
+            now=now,
+        )[0]
+
+    assert _evaluate(0.02, 0) == "filling"
+    assert _evaluate(0.02, 10) == "changed"
+    assert evaluator.current_state is True
+
+    # between 70% and 100% of the threshold, the state is kept
+    assert _evaluate(0.008, 20) == "unchanged"
+    assert _evaluate(0.008, 30) == "unchanged"
+
+    # state changes are delayed until the last change is long enough ago
+    assert _evaluate(0.0, 40) == "too-recent"
+    assert _evaluate(0.0, 50) == "too-recent"
+    assert evaluator.current_state is True
+    assert _evaluate(0.0, 110) == "changed"
+    assert evaluator.current_state is False
+
+    # the window statistics and the 5 minute buckets are published into the state
+    helios_state = types.HeliosState()
+    for now in [290, 299, 300]:
+        evaluator.update_helios_state(helios_state, now)
+        _evaluate(0.01, now)
+    evaluator.update_helios_state(helios_state, 301)
+    assert helios_state.last_edge_fraction == 0.01
+    assert helios_state.window_size == 2
+    assert helios_state.window_mean == pytest.approx(0.01)
+    assert helios_state.window_std == pytest.approx(0)
+    assert [b.start_time for b in helios_state.timeseries] == [0]
+    assert helios_state.timeseries[0].count == 2
+    assert helios_state.timeseries[0].mean_edge_fraction == pytest.approx(0.005)
+    assert helios_state.timeseries[0].good_conditions is False
+    assert helios_state.current_bucket is not None
+    assert helios_state.current_bucket.start_time == 300
+    assert helios_state.current_bucket.count == 2
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_replay() -> None:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, "20240501"))
+        for i, shadow in enumerate([True, True, True, False, False, False]):
+            frame = np.full((360, 640), 20, dtype=np.float64)
+            yy, xx = np.ogrid[:360, :640]
+            frame[(yy - 180) ** 2 + (xx - 320) ** 2 <= 150**2] = 180
+            if shadow:
+                frame[120:220, 280:300] *= 0.4
+                frame[200:240, 340:400] *= 0.4
+            frame += rng.normal(0, 2, frame.shape)
+            Image.fromarray(np.clip(frame, 0, 255).astype(np.uint8)).convert("RGB").save(
+                os.path.join(tmpdir, "20240501", f"mu-20240501-1200{i * 6:02d}-0.000000-raw.jpg")
+            )
+
+        process = subprocess.run(
+            [
+                "python",
+                PYRA_CLI_PATH,
+                "helios",
+                "replay",
+                "202405",
+                "--archive-dir",
+                tmpdir,
+                "--evaluation-size",
+                "2",
+                "--edge-pixel-threshold",
+                "1",
+                "--min-seconds-between-state-changes",
+                "0",
+            ],
+            capture_output=True,
+        )
+        assert process.returncode == 0, process.stderr.decode()
+        lines = process.stdout.decode().splitlines()
+        assert lines[0] == "time,edge_fraction,lense_x,lense_y,lense_r,outcome,state"
+        assert [l.split(",")[-2:] for l in lines[1:]] == [
+            ["filling", ""],
+            ["changed", "good"],
+            ["unchanged", "good"],
+            ["unchanged", "good"],
+            ["changed", "bad"],
+            ["unchanged", "bad"],
+        ]
+        assert "20240501: 6 images, state good for 3 (50.0%), 2 state changes" in (
+            process.stderr.decode()
+        )
+
+        # edge fractions and decisions at lower resolutions are compared to the full resolution
+        process = subprocess.run(
+            [
+                "python",
+                PYRA_CLI_PATH,
+                "helios",
+                "compare-resolutions",
+                "20240501",
+                "--archive-dir",
+                tmpdir,
+                "--evaluation-size",
+                "2",
+            ],
+            capture_output=True,
+        )
+        assert process.returncode == 0, process.stderr.decode()
+        lines = process.stdout.decode().splitlines()
+        assert lines[0] == "Compared 6 images of 1 day(s)"
+        assert [l.split(" ")[0] for l in lines[1:]] == ["full", "half", "quarter"]
+        assert "same decision: 100.0%" in lines[1]
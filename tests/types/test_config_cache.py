@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Generator
+import pydantic
+import pytest
+
+from packages.core import types
+from ..fixtures import SAMPLE_CONFIG
+
+
+@pytest.fixture()
+def temporary_config_file(monkeypatch: pytest.MonkeyPatch) -> Generator[str, None, None]:
+    """Point the config cache to a temporary config file."""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config_file_path = os.path.join(tmpdir, "config.json")
+        with open(config_file_path, "w") as f:
+            f.write(SAMPLE_CONFIG.model_dump_json(indent=4))
+        monkeypatch.setattr(types.config, "_CONFIG_FILE_PATH", config_file_path)
+        monkeypatch.setattr(types.config, "_CONFIG_LOCK_PATH", os.path.join(tmpdir, ".config.lock"))
+        monkeypatch.setattr(types.config, "_CONFIG_MTIME_RESOLUTION", 0)
+        monkeypatch.setattr(types.config, "CONFIG_WATCH_INTERVAL", 0.05)
+        monkeypatch.setattr(
+            types.config,
+            "_config_cache",
+            types.config._ConfigCache(),  # pyright: ignore[reportPrivateUsage]
+        )
+        yield config_file_path
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_config_cache(temporary_config_file: str) -> None:
+    config = types.Config.load(ignore_path_existence=True)
+    version = types.Config.get_version()
+    assert config == SAMPLE_CONFIG
+
+    # an unchanged config file is not validated again
+    assert types.Config.load(ignore_path_existence=True) is config
+    assert types.Config.get_version() == version
+
+    # the shared config object is frozen
+    with pytest.raises(pydantic.ValidationError):
+        config.general.station_id = "changed"
+    with pytest.raises(pydantic.ValidationError):
+        config.helios = None
+    assert isinstance(config.general, types.config.GeneralConfig)
+    assert config.model_copy(deep=True) == config
+
+    # rewriting the same content does not count as a change
+    with open(temporary_config_file, "w") as f:
+        f.write(SAMPLE_CONFIG.model_dump_json(indent=4))
+    assert types.Config.load(ignore_path_existence=True) is config
+    assert types.Config.get_version() == version
+
+    # waiting threads are notified when the content changes
+    changes: list[bool] = []
+    waiting_thread = threading.Thread(
+        target=lambda: changes.append(types.Config.wait_for_change(version, timeout=10))
+    )
+    waiting_thread.start()
+    time.sleep(0.1)
+    with types.Config.update_in_context() as c:
+        c.general.station_id = "changed"
+    waiting_thread.join()
+    assert changes == [True]
+
+    new_config = types.Config.load(ignore_path_existence=True)
+    assert new_config is not config
+    assert new_config.general.station_id == "changed"
+    assert types.Config.get_version() == version + 1
+    assert types.Config.wait_for_change(version + 1, timeout=0.1) is False
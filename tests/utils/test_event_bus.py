@@ -0,0 +1,28 @@
+import threading
+import time
+import pytest
+
+from packages.core import utils
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_event_bus() -> None:
+    subscription = utils.EventBus.subscribe("test.a", "test.b")
+
+    # times out when nothing is published
+    t1 = time.time()
+    assert subscription.wait(timeout=0.1) == []
+    assert time.time() - t1 >= 0.1
+
+    # events published while not waiting are not lost
+    utils.EventBus.publish("test.b")
+    utils.EventBus.publish("test.c")
+    assert subscription.wait(timeout=0) == ["test.b"]
+    assert subscription.wait(timeout=0) == []
+
+    # waiting threads are woken up immediately
+    threading.Timer(0.05, lambda: utils.EventBus.publish("test.a")).start()
+    t1 = time.time()
+    assert subscription.wait(timeout=10) == ["test.a"]
+    assert time.time() - t1 < 1
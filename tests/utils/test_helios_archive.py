@@ -0,0 +1,89 @@
+import datetime
+import os
+import tempfile
+import numpy as np
+import pytest
+
+from packages.core import threads, types, utils
+
+dir = os.path.dirname
+PROJECT_DIR = dir(dir(dir(os.path.abspath(__file__))))
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_archive() -> None:
+    rng = np.random.default_rng(0)
+    frame = np.full((360, 640), 20, dtype=np.float64)
+    yy, xx = np.ogrid[:360, :640]
+    frame[(yy - 180) ** 2 + (xx - 320) ** 2 <= 150**2] = 180
+    frame[120:220, 280:300] *= 0.4
+    frame += rng.normal(0, 2, frame.shape)
+    rgb_frame = np.stack([np.clip(frame, 0, 255).astype(np.uint8)] * 3, axis=-1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive_path = os.path.join(tmpdir, f"{datetime.date.today().strftime('%Y%m%d')}.helios")
+        edge_fractions = [
+            utils.HeliosImageProcessing.get_edge_fraction(
+                rgb_frame=rgb_frame,
+                station_id="test",
+                edge_color_threshold=40,
+                target_pixel_brightness=50,
+                lense_circle=(320, 180, 150),
+                save_images_to_archive=True,
+                image_directory=os.path.join(tmpdir, "%Y%m%d"),
+                archive_format="container",
+                exposure=-7 + i,
+            )
+            for i in range(3)
+        ]
+        assert os.listdir(tmpdir) == [os.path.basename(archive_path)]
+
+        index = utils.HeliosArchive.get_index(archive_path)
+        records = list(utils.HeliosArchive.iterate(archive_path))
+        assert [r.offset for r in records] == [start for start, _ in index]
+        assert [r.metadata.exposure for r in records] == [-7, -6, -5]
+        assert [r.metadata.edge_fraction for r in records] == edge_fractions
+        assert list(utils.HeliosArchive.iterate(archive_path, records[1].offset))[0] == records[1]
+
+        # the frame is stored at half resolution and scaled back
+        record = utils.HeliosArchive.read(archive_path, index[2][0])
+        assert record.get_frame().shape == (360, 640)
+        assert np.abs(record.get_frame().astype(float) - frame * 50 / np.mean(frame)).mean() < 5
+
+        # the edge fraction can be recomputed from the bit-packed edge mask
+        edge_mask = record.get_edge_mask()
+        assert edge_mask.shape == (360, 640)
+        assert np.sum(edge_mask) / (np.pi * (150 * 0.9) ** 2) == pytest.approx(
+            edge_fractions[2], rel=1e-3
+        )
+        raw_image, processed_image = utils.HeliosImageProcessing.render_archive_record(record)
+        assert raw_image.size == processed_image.size == (640, 360)
+
+        # a cut off record is ignored by the readers and replaced by the next one
+        with open(archive_path, "ab") as f:
+            f.write(b"HLX1" + (100).to_bytes(4, "little") * 3 + bytes(20))
+        assert len(utils.HeliosArchive.get_index(archive_path)) == 3
+        assert len(list(utils.HeliosArchive.iterate(archive_path))) == 3
+        utils.HeliosArchive.append(
+            archive_path,
+            frame=frame,
+            crop=(slice(0, 360), slice(0, 640)),
+            cropped_edges=np.zeros((360, 640), dtype=np.uint8),
+            edge_fraction=0.0,
+            lense_circle=(320, 180, 150),
+            timestamp=datetime.datetime.now(),
+            station_id="test",
+        )
+        assert len(utils.HeliosArchive.get_index(archive_path)) == 4
+        assert os.path.getsize(archive_path) == utils.HeliosArchive.get_index(archive_path)[-1][1]
+
+        # the replay reads the daily files
+        helios_config = types.config.HeliosConfig.model_validate_json(
+            open(os.path.join(PROJECT_DIR, "config", "helios.config.default.json")).read()
+        )
+        day = datetime.date.today().strftime("%Y%m%d")
+        assert threads.helios_replay.HeliosReplay.get_days(day[:6], tmpdir) == [day]
+        steps = threads.helios_replay.HeliosReplay.replay_day(day, helios_config, tmpdir)
+        assert len(steps) == 4
+        assert steps[0].lense is not None
@@ -0,0 +1,118 @@
+# pyright: reportUnknownMemberType=false, reportUnknownVariableType=false, reportUnknownArgumentType=false
+
+from typing import Any
+import numpy as np
+import pytest
+import skimage
+
+from packages.core import interfaces, utils
+from packages.core.utils import helios_image_processing
+
+
+def _previous_get_edge_fraction(
+    rgb_frame: np.ndarray[Any, Any], lense_circle: tuple[int, int, int]
+) -> float:
+    """Full frame edge detection and masking like before the lense crop."""
+
+    bw_frame = skimage.color.rgb2gray(rgb_frame)
+    evenly_lit_frame = bw_frame * (60 / np.mean(bw_frame))
+    evenly_lit_frame[evenly_lit_frame > 255] = 255
+    edges = skimage.morphology.dilation(
+        skimage.feature.canny(evenly_lit_frame, sigma=7, low_threshold=3, high_threshold=6),
+        skimage.morphology.disk(2),
+    ).astype(np.uint8)
+    inner_mask = np.zeros(evenly_lit_frame.shape, dtype=np.uint8)
+    cc, rr = skimage.draw.disk(
+        center=(lense_circle[1], lense_circle[0]),
+        radius=lense_circle[2] * 0.9,
+        shape=evenly_lit_frame.shape,
+    )
+    inner_mask[cc, rr] = 1
+    return round(float(np.sum(edges * inner_mask)) / (3.141592 * (lense_circle[2] * 0.9) ** 2), 6)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_edge_fraction_engines() -> None:
+    frame = np.full((360, 640), 20, dtype=np.float64)
+    rr, cc = skimage.draw.disk((180, 320), 150, shape=frame.shape)
+    frame[rr, cc] = 180
+    frame[120:220, 280:300] *= 0.4
+    frame[200:240, 340:400] *= 0.4
+    rgb_frame = np.clip(frame, 0, 255).astype(np.uint8)[:, :, None].repeat(3, axis=2)
+    lense = (320, 180, 150)
+
+    expected = _previous_get_edge_fraction(rgb_frame, lense)
+    assert expected > 0.01
+
+    def _get_edge_fraction(engine: str, resolution: str = "full") -> float:
+        return utils.HeliosImageProcessing.get_edge_fraction(
+            rgb_frame=rgb_frame,
+            station_id="test",
+            edge_color_threshold=40,
+            target_pixel_brightness=60,
+            lense_circle=lense,
+            engine=engine,  # type: ignore
+            resolution=resolution,  # type: ignore
+        )
+
+    # cropping to the lense does not change the result
+    assert _get_edge_fraction("skimage") == expected
+    assert ((360, 640), lense) in helios_image_processing._mask_cache  # pyright: ignore[reportPrivateUsage]
+    assert _get_edge_fraction("opencv") == pytest.approx(expected, abs=0.002)
+
+    # lower resolutions find roughly the same edge fraction
+    for resolution in ["half", "quarter"]:
+        assert _get_edge_fraction("skimage", resolution) == pytest.approx(expected, rel=0.15)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_quarter_resolution_edge_fraction() -> None:
+    # the edges are dilated at every resolution
+    for scale in helios_image_processing.EDGE_DETECTION_SCALES.values():
+        footprint = utils.HeliosImageProcessing._get_dilation_footprint(scale)  # pyright: ignore[reportPrivateUsage]
+        assert footprint.shape[0] >= 3
+
+    ok, rgb_frame = interfaces.helios_camera.SyntheticHeliosCamera(frames_per_second=None).read()
+    assert ok
+    lense = (640, 360, round(0.42 * 720))
+
+    for engine in ["skimage", "opencv"]:
+        edge_fractions = {
+            resolution: utils.HeliosImageProcessing.get_edge_fraction(
+                rgb_frame=rgb_frame,
+                station_id="test",
+                edge_color_threshold=40,
+                target_pixel_brightness=60,
+                lense_circle=lense,
+                engine=engine,  # type: ignore
+                resolution=resolution,  # type: ignore
+            )
+            for resolution in ["full", "quarter"]
+        }
+        assert edge_fractions["full"] > 0.01
+        assert edge_fractions["quarter"] == pytest.approx(edge_fractions["full"], rel=0.01)
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_lense_position() -> None:
+    frame = np.full((720, 1280), 20, dtype=np.float64)
+    rr, cc = skimage.draw.disk((350, 660), 290, shape=frame.shape)
+    frame[rr, cc] = 180
+    frame[300:400, 600:650] *= 0.4
+    frame += np.random.default_rng(0).normal(0, 4, frame.shape)
+    rgb_frame = np.clip(frame, 0, 255).astype(np.uint8)[:, :, None].repeat(3, axis=2)
+
+    lense = utils.HeliosImageProcessing.get_lense_position(rgb_frame, use_downscaling=True)
+    assert lense is not None
+    assert max(abs(a - b) for a, b in zip(lense, (660, 350, 290))) <= 4
+
+    # searching around the previous lense finds the same circle
+    assert (
+        utils.HeliosImageProcessing.get_lense_position(
+            rgb_frame, use_downscaling=True, previous_lense=(670, 345, 285)
+        )
+        == lense
+    )
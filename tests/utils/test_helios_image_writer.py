@@ -0,0 +1,81 @@
+import os
+import tempfile
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+
+from packages.core import utils
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_helios_image_writer() -> None:
+    writer = utils.HeliosImageWriter(max_queue_size=2)
+    try:
+        # the oldest jobs are dropped while the writer is busy
+        started, release = threading.Event(), threading.Event()
+        done: list[int] = []
+
+        def _block() -> None:
+            started.set()
+            release.wait(5)
+
+        def _fail() -> None:
+            raise OSError("disk full")
+
+        writer.submit(_block)
+        assert started.wait(5)
+        for i in range(4):
+            writer.submit(lambda i=i: done.append(i))  # type: ignore
+        release.set()
+        assert writer.wait_until_idle(timeout=5)
+        assert done == [2, 3]
+        assert writer.dropped_count == 2
+
+        # failing jobs do not stop the writer
+        writer.submit(_fail)
+        writer.submit(lambda: done.append(4))
+        assert writer.wait_until_idle(timeout=5)
+        assert done == [2, 3, 4]
+
+        # images are saved in the background, in the same way as without writer
+        frame = np.full((120, 160, 3), 40, dtype=np.uint8)
+        frame[30:90, 50:110] = 200
+        with tempfile.TemporaryDirectory() as tmpdir:
+            edge_fractions: list[float] = []
+            for name, image_writer in [("sync", None), ("async", writer)]:
+                edge_fractions.append(
+                    utils.HeliosImageProcessing.get_edge_fraction(
+                        rgb_frame=frame,
+                        station_id="test",
+                        edge_color_threshold=40,
+                        target_pixel_brightness=60,
+                        lense_circle=(80, 60, 50),
+                        save_images_to_archive=True,
+                        image_name=name,
+                        image_directory=os.path.join(tmpdir, "%Y%m%d"),
+                        image_writer=image_writer,
+                    )
+                )
+            assert edge_fractions[0] == edge_fractions[1]
+            assert writer.wait_until_idle(timeout=5)
+            (image_dir,) = os.listdir(tmpdir)
+            assert sorted(os.listdir(os.path.join(tmpdir, image_dir))) == [
+                "async-processed.jpg",
+                "async-raw.jpg",
+                "sync-processed.jpg",
+                "sync-raw.jpg",
+            ]
+
+            # current images are replaced without leaving temporary files
+            path = os.path.join(tmpdir, "current.jpg")
+            for color in [0, 255]:
+                utils.HeliosImageWriter.save_atomically(
+                    Image.fromarray(np.full((8, 8, 3), color, dtype=np.uint8)), path
+                )
+            assert sorted(os.listdir(tmpdir)) == sorted([image_dir, "current.jpg"])
+            assert np.mean(np.array(Image.open(path))) > 250
+    finally:
+        writer.stop()
+    assert not writer.thread.is_alive()
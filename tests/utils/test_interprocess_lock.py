@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import pytest
+
+from packages.core import utils
+
+dir = os.path.dirname
+PROJECT_DIR = dir(dir(dir(os.path.abspath(__file__))))
+
+# increments the counter in a file while holding the lock
+WORKER_SCRIPT = """
+import sys
+from packages.core.utils.interprocess_lock import InterProcessLock
+
+lock_path, counter_path, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+lock = InterProcessLock(lock_path, timeout=30)
+for _ in range(count):
+    with lock:
+        with open(counter_path) as f:
+            value = int(f.read())
+        with open(counter_path, "w") as f:
+            f.write(str(value + 1))
+"""
+
+# holds the lock for some time
+HOLDER_SCRIPT = """
+import sys, time
+from packages.core.utils.interprocess_lock import InterProcessLock
+
+with InterProcessLock(sys.argv[1]):
+    print("locked", flush=True)
+    time.sleep(float(sys.argv[2]))
+"""
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_interprocess_lock() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        lock_path = os.path.join(tmpdir, "test.lock")
+        counter_path = os.path.join(tmpdir, "counter.txt")
+        with open(counter_path, "w") as f:
+            f.write("0")
+
+        # 4 threads and 2 processes increment the same counter
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", WORKER_SCRIPT, lock_path, counter_path, "100"],
+                cwd=PROJECT_DIR,
+            )
+            for _ in range(2)
+        ]
+
+        def _increment() -> None:
+            lock = utils.InterProcessLock(lock_path, timeout=30)
+            for _ in range(100):
+                with lock:
+                    with open(counter_path) as f:
+                        value = int(f.read())
+                    with open(counter_path, "w") as f:
+                        f.write(str(value + 1))
+
+        threads = [threading.Thread(target=_increment) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for p in processes:
+            assert p.wait(timeout=60) == 0
+        with open(counter_path) as f:
+            assert int(f.read()) == 600
+
+        # another process holds the lock: time out, then acquire it right after its release
+        holder = subprocess.Popen(
+            [sys.executable, "-c", HOLDER_SCRIPT, lock_path, "1.5"],
+            cwd=PROJECT_DIR,
+            stdout=subprocess.PIPE,
+        )
+        assert holder.stdout is not None
+        assert holder.stdout.readline().decode().strip() == "locked"
+        lock = utils.InterProcessLock(lock_path, timeout=0.2)
+        start_time = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            lock.acquire()
+        assert time.perf_counter() - start_time < 1
+        with pytest.raises(TimeoutError):
+            with utils.InterProcessLock(lock_path, timeout=0.1):
+                pass
+
+        lock.acquire(timeout=10)
+        assert holder.wait(timeout=5) == 0
+        lock.release()
+        lock.release()  # releasing twice does nothing
+
+        # the lock of a killed process is released by the OS
+        holder = subprocess.Popen(
+            [sys.executable, "-c", HOLDER_SCRIPT, lock_path, "60"],
+            cwd=PROJECT_DIR,
+            stdout=subprocess.PIPE,
+        )
+        assert holder.stdout is not None
+        assert holder.stdout.readline().decode().strip() == "locked"
+        holder.kill()
+        holder.wait()
+        start_time = time.perf_counter()
+        with utils.InterProcessLock(lock_path, timeout=5):
+            assert time.perf_counter() - start_time < 1
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import pytest
+
+from packages.core import utils
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_lock_metrics() -> None:
+    utils.LockMetrics.reset()
+    lock = threading.Lock()
+    logger = utils.Logger(origin="pytest", just_print=True)
+
+    for _ in range(3):
+        with utils.LockMetrics.measure(lock, "test", "cas"):
+            pass
+
+    # a thread holding the lock makes the other one wait
+    def _hold_lock() -> None:
+        with utils.LockMetrics.measure(lock, "test", "helios", logger):
+            time.sleep(0.3)
+
+    thread = threading.Thread(target=_hold_lock)
+    thread.start()
+    time.sleep(0.05)
+    with utils.LockMetrics.measure(lock, "test", "opus"):
+        pass
+    thread.join()
+
+    metrics = utils.LockMetrics.get()
+    assert metrics["bucket_upper_bounds"][-1] is None
+    assert set(metrics["locks"]["test"].keys()) == {"cas", "helios", "opus"}
+    assert metrics["locks"]["test"]["cas"]["count"] == 3
+    assert sum(metrics["locks"]["test"]["cas"]["hold"]["histogram"]) == 3
+    assert metrics["locks"]["test"]["helios"]["hold"]["max"] >= 0.3
+    assert metrics["locks"]["test"]["helios"]["hold"]["histogram"][4] == 1
+    assert metrics["locks"]["test"]["opus"]["wait"]["max"] >= 0.2
+
+    # slow holds are reported with the location of the caller
+    assert len(metrics["slow_holds"]) == 1
+    assert metrics["slow_holds"][0]["origin"] == "helios"
+    assert metrics["slow_holds"][0]["caller"].startswith("tests/utils/test_lock_metrics.py:")
+
+    # the histograms are recorded even if the block raises
+    with pytest.raises(ValueError):
+        with utils.LockMetrics.measure(lock, "test", "cas"):
+            raise ValueError()
+    assert utils.LockMetrics.get()["locks"]["test"]["cas"]["count"] == 4
+    assert not lock.locked()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        utils.LockMetrics.write(os.path.join(tmpdir, "lock-metrics.json"))
+        with open(os.path.join(tmpdir, "lock-metrics.json")) as f:
+            assert json.load(f)["locks"]["test"]["cas"]["count"] == 4
+
+    utils.LockMetrics.reset()
+    assert utils.LockMetrics.get()["locks"] == {}
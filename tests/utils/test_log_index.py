@@ -0,0 +1,73 @@
+import os
+import tempfile
+from typing import Generator
+import pytest
+
+from packages.core import utils
+from packages.core.utils import log_index as log_index_module
+
+
+@pytest.fixture()
+def temporary_archive(monkeypatch: pytest.MonkeyPatch) -> Generator[str, None, None]:
+    """Point the log index to a temporary archive directory."""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setattr(log_index_module, "_ARCHIVE_DIR", tmpdir)
+        monkeypatch.setattr(
+            log_index_module, "LOG_INDEX_PATH", os.path.join(tmpdir, ".log-index.sqlite")
+        )
+        yield tmpdir
+
+
+def _line(time: str, origin: str, level: str, message: str) -> str:
+    return f"2024-10-09 {time}.000000 UTC+0000 - {origin} - {level} - {message}\n"
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_log_index(temporary_archive: str) -> None:
+    path = os.path.join(temporary_archive, "2024-10-09-debug.log")
+    with open(path, "w") as f:
+        f.write(_line("10:00:00", "main", "INFO", "Starting mainloop"))
+        f.write(_line("10:00:01", "opus", "DEBUG", "checking OPUS"))
+        f.write(_line("10:00:02", "opus", "EXCEPTION", "ValueError occured: Traceback\n"))
+        f.write("  File ...\n")
+    assert utils.LogIndex.update() == 3
+    assert utils.LogIndex.update() == 0
+
+    def _query(**kwargs: object) -> list[str]:
+        return [text for _, text in utils.LogIndex.query(**kwargs)]  # type: ignore
+
+    assert len(_query()) == 3
+    assert _query(origins=["opus"], levels=["EXCEPTION"]) == [
+        _line("10:00:02", "opus", "EXCEPTION", "ValueError occured: Traceback\n") + "  File ...\n"
+    ]
+    assert _query(substring="mainloop") == [_line("10:00:00", "main", "INFO", "Starting mainloop")]
+    t = next(utils.LogIndex.query(origins=["opus"]))[0]
+    assert _query(from_time=t, to_time=t + 1) == [
+        _line("10:00:01", "opus", "DEBUG", "checking OPUS")
+    ]
+    assert _query(newest_first=True)[0].startswith("2024-10-09 10:00:02")
+
+    # appended lines are indexed incrementally, incomplete lines are skipped
+    with open(path, "a") as f:
+        f.write("  ValueError\n")
+        f.write(_line("10:00:03", "main", "INFO", "Starting iteration"))
+        f.write("2024-10-09 10:00:04")
+    assert utils.LogIndex.update() == 1
+    assert _query(origins=["opus"], levels=["EXCEPTION"])[0].endswith("  File ...\n  ValueError\n")
+    assert _query(origins=["main"])[-1] == _line("10:00:03", "main", "INFO", "Starting iteration")
+
+    # rewritten files are indexed again
+    with open(path, "w") as f:
+        f.write(_line("11:00:00", "main", "INFO", "Starting mainloop"))
+    assert utils.LogIndex.update() == 1
+    assert len(_query()) == 1
+
+    # only the files of the days since `from_time` are indexed
+    old_path = os.path.join(temporary_archive, "2020-01-01-debug.log")
+    with open(old_path, "w") as f:
+        f.write(_line("10:00:00", "main", "INFO", "Starting mainloop"))
+    assert utils.LogIndex.update(from_time=t) == 0
+    assert len(_query(from_time=t)) == 1
+    assert utils.LogIndex.update() == 1
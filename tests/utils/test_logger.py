@@ -0,0 +1,80 @@
+import datetime
+import os
+import tempfile
+import threading
+from typing import Generator
+import pytest
+
+from packages.core import utils
+from packages.core.utils import logger as logger_module
+
+
+@pytest.fixture()
+def temporary_log_files(monkeypatch: pytest.MonkeyPatch) -> Generator[str, None, None]:
+    """Point the logger to a temporary directory."""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, "logs"))
+        os.mkdir(os.path.join(tmpdir, "logs", "archive"))
+        monkeypatch.setattr(logger_module, "_PROJECT_DIR", tmpdir)
+        monkeypatch.setattr(
+            logger_module, "_DEBUG_LOG_FILE", os.path.join(tmpdir, "logs", "debug.log")
+        )
+        yield tmpdir
+        utils.Logger.flush()
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_logger(temporary_log_files: str) -> None:
+    def _log_lines(thread_index: int) -> None:
+        logger = utils.Logger(origin=f"thread-{thread_index}")
+        for i in range(100):
+            logger.debug(f"line {i}")
+
+    threads = [threading.Thread(target=_log_lines, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    utils.Logger(origin="cli").info("cli line")
+    assert utils.Logger.flush()
+
+    today = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+    with open(os.path.join(temporary_log_files, "logs", "debug.log")) as f:
+        debug_log_lines = f.readlines()
+    with open(os.path.join(temporary_log_files, "logs", "archive", f"{today}-debug.log")) as f:
+        archive_lines = f.readlines()
+    with open(os.path.join(temporary_log_files, "logs", "archive", f"{today}-debug-cli.log")) as f:
+        cli_archive_lines = f.readlines()
+
+    assert len(debug_log_lines) == 800
+    assert debug_log_lines == archive_lines
+    assert any([l.endswith(" - thread-3 - DEBUG - line 99\n") for l in debug_log_lines])
+    assert len(cli_archive_lines) == 1
+
+    # lines older than 5 minutes are removed from debug.log
+    with open(os.path.join(temporary_log_files, "logs", "debug.log"), "w") as f:
+        f.write("2020-01-01 00:00:00.000000 UTC+0000 - main - INFO - old line\n")
+    utils.Logger(origin="main").info("new line")
+    utils.Logger.archive()
+    assert utils.Logger.flush()
+    with open(os.path.join(temporary_log_files, "logs", "debug.log")) as f:
+        debug_log_lines = f.readlines()
+    assert len(debug_log_lines) == 1
+    assert debug_log_lines[0].endswith(" - main - INFO - new line\n")
+
+    # later archives cut at the byte offset of the batches written by this process
+    sink = logger_module._sink  # pyright: ignore[reportPrivateUsage]
+    assert sink is not None
+    for line in ["batch 1", "batch 2"]:
+        utils.Logger(origin="main").info(line)
+        assert utils.Logger.flush()
+    assert len(sink.debug_log_index) == 3
+    sink.debug_log_index[0] = (0, sink.debug_log_index[0][1])
+    sink.debug_log_index[1] = (0, sink.debug_log_index[1][1])
+    utils.Logger.archive()
+    assert utils.Logger.flush()
+    with open(os.path.join(temporary_log_files, "logs", "debug.log")) as f:
+        debug_log_lines = f.readlines()
+    assert [l.split(" - ")[-1] for l in debug_log_lines] == ["batch 1\n", "batch 2\n"]
@@ -0,0 +1,41 @@
+import statistics
+import numpy as np
+import pytest
+
+from packages.core import utils
+
+
+@pytest.mark.order(3)
+@pytest.mark.ci
+def test_statistics_ring() -> None:
+    ring = utils.StatisticsRing(max_size=5, ewma_alpha=0.5)
+    assert ring.get() == []
+    assert (ring.mean(), ring.std(), ring.min(), ring.max(), ring.ewma) == (None,) * 5
+
+    values: list[float] = np.random.default_rng(0).random(200).tolist()
+    ewma = values[0]
+    for i, value in enumerate(values):
+        ring.append(value)
+        if i > 0:
+            ewma += 0.5 * (value - ewma)
+        window = values[max(i - 4, 0) : i + 1]
+        assert ring.get() == window
+        assert ring.is_full() == (i >= 4)
+        assert ring.sum() == pytest.approx(sum(window))
+        assert ring.mean() == pytest.approx(statistics.mean(window))
+        assert ring.variance() == pytest.approx(statistics.pvariance(window), abs=1e-12)
+        assert (ring.min(), ring.max()) == (min(window), max(window))
+        assert ring.ewma == pytest.approx(ewma)
+
+    # resizing keeps the newest values
+    ring.set_max_size(3)
+    assert ring.get() == values[-3:]
+    assert (ring.min(), ring.max()) == (min(values[-3:]), max(values[-3:]))
+    assert ring.ewma == pytest.approx(ewma)
+    ring.set_max_size(6)
+    assert ring.get() == values[-3:]
+    assert not ring.is_full()
+
+    ring.clear()
+    assert ring.get() == []
+    assert ring.mean() is None